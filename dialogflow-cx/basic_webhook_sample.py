@@ -62,32 +62,38 @@ class BasicWebhookSample(ds.DialogflowSample):
         self.set_agent_delegator(
             dg.AgentDelegator(self, display_name=agent_display_name)
         )
-        self.webhook_delegator = dg.WebhookDelegator(
-            self, display_name=self._WEBHOOK_DISPLAY_NAME, uri=webhook_uri
+        self.webhook_delegator = self.register_delegator(
+            dg.WebhookDelegator(
+                self, display_name=self._WEBHOOK_DISPLAY_NAME, uri=webhook_uri
+            )
         )
-        self.intent_delegator = dg.IntentDelegator(
-            self,
-            display_name=self._INTENT_DISPLAY_NAME,
-            training_phrases=self._INTENT_TRAINING_PHRASES_TEXT,
+        self.intent_delegator = self.register_delegator(
+            dg.IntentDelegator(
+                self,
+                display_name=self._INTENT_DISPLAY_NAME,
+                training_phrases=self._INTENT_TRAINING_PHRASES_TEXT,
+            )
         )
-        self.page_delegator = dg.FulfillmentPageDelegator(
-            self,
-            display_name=self._PAGE_DISPLAY_NAME,
-            entry_fulfillment_text=self._PAGE_ENTRY_FULFILLMENT_TEXT,
-            webhook_delegator=self.webhook_delegator,
-            tag=self._PAGE_WEBHOOK_ENTRY_TAG,
+        self.page_delegator = self.register_delegator(
+            dg.FulfillmentPageDelegator(
+                self,
+                display_name=self._PAGE_DISPLAY_NAME,
+                entry_fulfillment_text=self._PAGE_ENTRY_FULFILLMENT_TEXT,
+                webhook_delegator=self.webhook_delegator,
+                tag=self._PAGE_WEBHOOK_ENTRY_TAG,
+            )
         )
         self.set_start_flow_delegator(dg.StartFlowDelegator(self))
+        # Transition routes to the intent and page are removed before deleting them.
+        self.start_flow_delegator.add_dependency(
+            self.intent_delegator, self.page_delegator
+        )
         self.start_page_delegator = dg.StartPageDelegator(self)
         self.set_session_delegator(dg.SessionsDelegator(self))
 
     def setup(self, wait=2):
         """Initializes the sample by communicating with the Dialogflow API."""
-        self.agent_delegator.setup()
-        self.webhook_delegator.setup()
-        self.intent_delegator.setup()
-        self.page_delegator.setup()
-        self.start_flow_delegator.setup()
+        self.setup_delegators()
         self.start_flow_delegator.append_transition_route(
             target_page=self.page_delegator.page.name,
             intent=self.intent_delegator.intent.name,
@@ -96,11 +102,7 @@ class BasicWebhookSample(ds.DialogflowSample):
 
     def tear_down(self):
         """Deletes the sample components via the Dialogflow API."""
-        self.page_delegator.tear_down()
-        self.start_flow_delegator.tear_down()
-        self.intent_delegator.tear_down()
-        self.webhook_delegator.tear_down()
-        self.agent_delegator.tear_down()
+        self.tear_down_delegators()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,208 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs many Dialogflow CX test cases together and aggregates their results."""
+
+import dataclasses
+from typing import Dict, List, Optional
+
+import google.cloud.dialogflowcx as cx
+
+
+def get_agent_response_differences(result):
+    """Lists the agent response differences of each conversation turn."""
+    return [
+        list(conversation_turn.virtual_agent_output.differences)
+        for conversation_turn in result.conversation_turns
+    ]
+
+
+def get_session_parameters(result):
+    """Lists the session parameters at the end of each conversation turn."""
+    session_parameters = []
+    for conversation_turn in result.conversation_turns:
+        if conversation_turn.virtual_agent_output.session_parameters:
+            session_parameters.append(
+                dict(conversation_turn.virtual_agent_output.session_parameters)
+            )
+        else:
+            session_parameters.append({})
+    return session_parameters
+
+
+def get_test_case_name(result_name):
+    """Gets the test case name from the name of one of its results."""
+    return result_name.split("/results/")[0]
+
+
+@dataclasses.dataclass
+class TestCaseOutcome:
+    """Outcome of a single test case run."""
+
+    name: str
+    display_name: str = ""
+    test_result: Optional[cx.TestResult] = None
+    differences: Dict[int, list] = dataclasses.field(default_factory=dict)
+    session_parameters: Optional[List[dict]] = None
+    expected_session_parameters: Optional[List[dict]] = None
+    error: Optional[str] = None
+
+    @property
+    def session_parameters_mismatch(self):
+        """Checks if the session parameters differ from the expected ones."""
+        return (
+            self.expected_session_parameters is not None
+            and self.session_parameters != self.expected_session_parameters
+        )
+
+    @property
+    def passed(self):
+        """Checks if the test case passed without differences or mismatches."""
+        return (
+            self.error is None
+            and self.test_result == cx.TestResult.PASSED
+            and not self.differences
+            and not self.session_parameters_mismatch
+        )
+
+
+def get_outcome(test_case, result, expected_session_parameters=None):
+    """Evaluates a TestCaseResult against its test case."""
+    differences = get_agent_response_differences(result)
+    return TestCaseOutcome(
+        name=test_case.name,
+        display_name=test_case.display_name,
+        test_result=result.test_result,
+        differences={index: diff for index, diff in enumerate(differences) if diff},
+        session_parameters=get_session_parameters(result),
+        expected_session_parameters=expected_session_parameters,
+    )
+
+
+@dataclasses.dataclass
+class BatchTestReport:
+    """Aggregated outcomes of a batch of test cases."""
+
+    outcomes: List[TestCaseOutcome] = dataclasses.field(default_factory=list)
+
+    @property
+    def passed(self):
+        """Outcomes of the test cases that passed."""
+        return [outcome for outcome in self.outcomes if outcome.passed]
+
+    @property
+    def failed(self):
+        """Outcomes of the test cases that failed or could not run."""
+        return [outcome for outcome in self.outcomes if not outcome.passed]
+
+    def summary(self):
+        """Counts outcomes, differences and session parameter mismatches."""
+        return {
+            "total": len(self.outcomes),
+            "passed": len(self.passed),
+            "failed": len(self.failed),
+            "errors": sum(1 for outcome in self.outcomes if outcome.error),
+            "differences": sum(
+                len(diff)
+                for outcome in self.outcomes
+                for diff in outcome.differences.values()
+            ),
+            "session_parameters_mismatches": sum(
+                1 for outcome in self.outcomes if outcome.session_parameters_mismatch
+            ),
+        }
+
+
+class BatchTestRunner:
+    """Runs test cases through BatchRunTestCases or bounded concurrent RunTestCase."""
+
+    def __init__(self, client, waiter, max_concurrent=8):
+        self.client = client
+        self.waiter = waiter
+        self.max_concurrent = max_concurrent
+
+    def iter_outcomes(self, test_cases, expected_session_parameters=None):
+        """Yields outcomes as each RunTestCase operation completes.
+
+        At most max_concurrent operations are in flight. expected_session_parameters
+        optionally maps test case names to the expected per-turn parameters.
+        """
+        test_cases = list(test_cases)
+        expected_session_parameters = expected_session_parameters or {}
+        starters = [
+            lambda name=test_case.name: self.client.run_test_case(
+                request=cx.RunTestCaseRequest(name=name)
+            )
+            for test_case in test_cases
+        ]
+        for index, lro in self.waiter.as_completed_bounded(
+            starters, self.max_concurrent
+        ):
+            test_case = test_cases[index]
+            try:
+                result = lro.result().result
+            except Exception as exc:  # pylint: disable=broad-except
+                yield TestCaseOutcome(
+                    name=test_case.name,
+                    display_name=test_case.display_name,
+                    error=str(exc),
+                )
+                continue
+            yield get_outcome(
+                test_case, result, expected_session_parameters.get(test_case.name)
+            )
+
+    def run_concurrent(
+        self, test_cases, expected_session_parameters=None, callback=None
+    ):
+        """Runs test cases as concurrent operations, calling callback per outcome."""
+        report = BatchTestReport()
+        for outcome in self.iter_outcomes(test_cases, expected_session_parameters):
+            report.outcomes.append(outcome)
+            if callback:
+                callback(outcome)
+        return report
+
+    def run_batch(
+        self, parent, test_cases, expected_session_parameters=None, callback=None
+    ):
+        """Runs test cases in a single BatchRunTestCases operation."""
+        test_cases = {test_case.name: test_case for test_case in test_cases}
+        expected_session_parameters = expected_session_parameters or {}
+        lro = self.client.batch_run_test_cases(
+            request=cx.BatchRunTestCasesRequest(
+                parent=parent, test_cases=list(test_cases)
+            )
+        )
+        report = BatchTestReport()
+        for result in self.waiter.wait(lro).results:
+            name = get_test_case_name(result.name)
+            outcome = get_outcome(
+                test_cases.pop(name, cx.TestCase(name=name)),
+                result,
+                expected_session_parameters.get(name),
+            )
+            report.outcomes.append(outcome)
+            if callback:
+                callback(outcome)
+        for test_case in test_cases.values():
+            outcome = TestCaseOutcome(
+                name=test_case.name,
+                display_name=test_case.display_name,
+                error="No result returned by BatchRunTestCases",
+            )
+            report.outcomes.append(outcome)
+            if callback:
+                callback(outcome)
+        return report
@@ -0,0 +1,447 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Throughput and latency benchmark of the webhook handlers.
+
+Generates realistic Dialogflow CX webhook requests for every tag of
+webhook.main.webhook_fcn and of the telecom cx_prebuilt_agents_telecom, then
+calls the entry points in-process (with RequestMock) and through a local HTTP
+server. Results are saved as JSON, and can be compared with a baseline to fail
+on regressions. Run from the dialogflow-cx directory:
+
+    python -m benchmarks.webhook_load --output benchmark.json
+    python -m benchmarks.webhook_load --baseline benchmark.json
+"""
+
+import argparse
+import concurrent.futures
+import dataclasses
+import datetime
+import http.client
+import http.server
+import importlib.util
+import json
+import pathlib
+import platform
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List
+
+from load_driver import percentile
+from utilities import RequestMock
+from webhook import main as webhook_main
+from webhook import responses
+
+TELECOM_SRC = (
+    pathlib.Path(__file__).resolve().parent.parent
+    / "vpc-sc-demo"
+    / "components"
+    / "webhook"
+    / "telecom-webhook-src"
+)
+# Modules of the telecom webhook imported by its main.py, in dependency order.
+TELECOM_MODULES = ("coverage_tables", "data_store", "helpers", "router")
+
+AGENT_NAME = "projects/PROJECT_ID/locations/global/agents/AGENT_ID"
+
+
+def build_request_dict(tag, text="", form_parameters=None, session_parameters=None):
+    """Builds a webhook request with all the fields Dialogflow CX sends."""
+    request_dict = webhook_main.build_request_dict_basic(tag, text)
+    form_parameters = form_parameters or {}
+    request_dict.update(
+        {
+            "detectIntentResponseId": str(uuid.uuid4()),
+            "languageCode": "en",
+            "intentInfo": {
+                "lastMatchedIntent": f"{AGENT_NAME}/intents/INTENT_ID",
+                "displayName": "MOCK_INTENT",
+                "confidence": 0.92,
+            },
+            "pageInfo": {
+                "currentPage": f"{AGENT_NAME}/flows/FLOW_ID/pages/PAGE_ID",
+                "displayName": "MOCK_PAGE",
+                "formInfo": {
+                    "parameterInfo": [
+                        {
+                            "displayName": name,
+                            "required": True,
+                            "state": "VALID",
+                            "value": value,
+                            "justCollected": True,
+                        }
+                        for name, value in form_parameters.items()
+                    ]
+                },
+            },
+            "sessionInfo": {
+                "session": f"{AGENT_NAME}/sessions/{uuid.uuid4()}",
+                "parameters": {**form_parameters, **(session_parameters or {})},
+            },
+        }
+    )
+    return request_dict
+
+
+WEBHOOK_PAYLOADS = {
+    "basic_webhook": [build_request_dict("basic_webhook", "I want a shirt")],
+    "echo_webhook": [build_request_dict("echo_webhook", "Echo this back")],
+    "validate_form": [
+        build_request_dict("validate_form", "I am 32", {"age": 32}),
+        build_request_dict("validate_form", "I am -1", {"age": -1}),
+    ],
+    "set_session_param": [
+        build_request_dict(
+            "set_session_param",
+            "Set color to blue",
+            session_parameters={"key": "color", "val": "blue"},
+        )
+    ],
+}
+
+TELECOM_PAYLOADS = {
+    "detectCustomerAnomaly": [
+        build_request_dict(
+            "detectCustomerAnomaly",
+            "Why is my bill so high?",
+            {
+                "phone_number": 999999,
+                "bill_state": "current",
+                "bill_amount": {"amount": 1000},
+            },
+        ),
+        build_request_dict(
+            "detectCustomerAnomaly",
+            "What about last month?",
+            {"phone_number": 8231234789, "bill_state": "previous"},
+        ),
+    ],
+    "validatePhoneLine": [
+        build_request_dict(
+            "validatePhoneLine", "My number", {"phone_number": phone_number}
+        )
+        for phone_number in ["5555555555", "1231231234", "9999999999", "0000000000"]
+    ],
+    "cruisePlanCoverage": [
+        build_request_dict("cruisePlanCoverage", port, {"destination": port})
+        for port in ["Mexico", "Bahamas"]
+    ],
+    "internationalCoverage": [
+        build_request_dict("internationalCoverage", country, {"destination": country})
+        for country in ["Japan", "Russia", "Antarctica"]
+    ],
+    "cheapestPlan": [
+        build_request_dict("cheapestPlan", f"{days} days", {"trip_duration": days})
+        for days in [3, 14, 45]
+    ],
+}
+
+
+@dataclasses.dataclass
+class Target:
+    """A webhook entry point and the payloads of each of its tags."""
+
+    name: str
+    entry_point: Callable
+    payloads: Dict[str, List[dict]]
+
+
+def load_module(name, path):
+    """Imports the module of a file."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_telecom_webhook():
+    """Imports the telecom webhook, which is deployed from its own directory.
+
+    Its modules import each other by top-level names, like router. They are
+    loaded by path and only bound to those names while the webhook is loaded,
+    so that they do not shadow the modules of the same names, e.g. webhook.router.
+    """
+    saved = {name: sys.modules.get(name) for name in TELECOM_MODULES}
+    try:
+        for name in TELECOM_MODULES:
+            sys.modules[name] = load_module(name, TELECOM_SRC / f"{name}.py")
+        return load_module("telecom_webhook_main", TELECOM_SRC / "main.py")
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def get_targets():
+    """Returns the benchmarked webhook entry points."""
+    telecom = load_telecom_webhook()
+    return [
+        Target("webhook_fcn", webhook_main.webhook_fcn, WEBHOOK_PAYLOADS),
+        Target("telecom", telecom.cx_prebuilt_agents_telecom, TELECOM_PAYLOADS),
+    ]
+
+
+def encode_result(result):
+    """Encodes a handler result the way the HTTP layer would."""
+    if isinstance(result, bytes):
+        return result
+    if isinstance(result, str):
+        return result.encode()
+    return json.dumps({} if result is None else result).encode()
+
+
+def summarize(latencies, errors, duration):
+    """Summarizes the latencies (seconds) of one benchmark run."""
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "duration_s": duration,
+        "throughput_rps": len(latencies) / duration if duration else None,
+        "p50_ms": percentile(latencies, 0.50) * 1000 if latencies else None,
+        "p95_ms": percentile(latencies, 0.95) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else None,
+    }
+
+
+def format_value(value, format_spec):
+    """Formats a summary value, which is None when no request succeeded."""
+    return "n/a" if value is None else format(value, format_spec)
+
+
+def run_requests(send, payloads, num_requests, concurrency):
+    """Sends num_requests payloads (cycling) from concurrency threads."""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(indices):
+        nonlocal errors
+        local_latencies = []
+        local_errors = 0
+        for index in indices:
+            start = time.perf_counter()
+            try:
+                send(payloads[index % len(payloads)])
+            except Exception:  # pylint: disable=broad-except
+                local_errors += 1
+                continue
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(
+            executor.map(
+                worker,
+                [range(i, num_requests, concurrency) for i in range(concurrency)],
+            )
+        )
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def run_in_process(target, tag, num_requests, concurrency=1):
+    """Calls the entry point directly with RequestMock requests."""
+    requests = [RequestMock(payload=payload) for payload in target.payloads[tag]]
+    return run_requests(
+        lambda request: encode_result(target.entry_point(request)),
+        requests,
+        num_requests,
+        concurrency,
+    )
+
+
+class LocalWebhookServer:
+    """Serves an entry point over HTTP/1.1 on localhost, in a background thread."""
+
+    def __init__(self, entry_point):
+        class Handler(http.server.BaseHTTPRequestHandler):
+            """Passes POSTed JSON bodies to the entry point."""
+
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; avoid delayed ACK stalls.
+            disable_nagle_algorithm = True
+
+            def do_POST(self):  # pylint: disable=invalid-name
+                """Handles a webhook request."""
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                try:
+                    request = RequestMock(payload=responses.loads(body))
+                    status, response = 200, encode_result(entry_point(request))
+                except Exception:  # pylint: disable=broad-except
+                    status, response = 500, b"{}"
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def port(self):
+        """The port the server listens on."""
+        return self.server.server_address[1]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_over_http(target, tag, num_requests, concurrency=1, port=None):
+    """POSTs the payloads to the entry point served by a local HTTP server."""
+    bodies = [json.dumps(payload).encode() for payload in target.payloads[tag]]
+    connections = threading.local()
+
+    def send(body):
+        if not hasattr(connections, "connection"):
+            connections.connection = http.client.HTTPConnection("127.0.0.1", port)
+        connections.connection.request(
+            "POST", "/", body, {"Content-Type": "application/json"}
+        )
+        response = connections.connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+
+    return run_requests(send, bodies, num_requests, concurrency)
+
+
+def run_benchmark(num_requests=1000, concurrency=1, modes=("in_process", "http")):
+    """Benchmarks every tag of every target; keys are target/mode/tag."""
+    results = {}
+    for target in get_targets():
+        if "in_process" in modes:
+            for tag in target.payloads:
+                results[f"{target.name}/in_process/{tag}"] = run_in_process(
+                    target, tag, num_requests, concurrency
+                )
+        if "http" in modes:
+            with LocalWebhookServer(target.entry_point) as server:
+                for tag in target.payloads:
+                    results[f"{target.name}/http/{tag}"] = run_over_http(
+                        target, tag, num_requests, concurrency, port=server.port
+                    )
+    return results
+
+
+def get_metadata(num_requests, concurrency):
+    """Describes the environment of a benchmark run."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "json_backend": responses.JSON_BACKEND,
+        "requests_per_tag": num_requests,
+        "concurrency": concurrency,
+    }
+
+
+def compare(results, baseline, threshold=0.2):
+    """Lists runs with new errors, or p95 or throughput worse by over threshold."""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        if result["errors"] > reference["errors"]:
+            regressions.append(
+                f"{key}: errors {reference['errors']} -> {result['errors']}"
+            )
+        if not result["p95_ms"] or not reference["p95_ms"]:
+            continue
+        if result["p95_ms"] > reference["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{key}: p95 {reference['p95_ms']:.3f}ms -> {result['p95_ms']:.3f}ms"
+            )
+        if result["throughput_rps"] < reference["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{key}: throughput {reference['throughput_rps']:.0f}rps -> "
+                f"{result['throughput_rps']:.0f}rps"
+            )
+    return regressions
+
+
+def main():
+    """Runs the benchmark, prints and saves the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000, help="Per tag.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["in_process", "http"],
+        choices=["in_process", "http"],
+    )
+    parser.add_argument("--output", help="Saves the results to this JSON file.")
+    parser.add_argument("--baseline", help="JSON results to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.requests, args.concurrency, args.modes)
+    for key, result in results.items():
+        print(
+            f"{key}: {format_value(result['throughput_rps'], '.0f')} req/s "
+            f"p50={format_value(result['p50_ms'], '.3f')}ms "
+            f"p95={format_value(result['p95_ms'], '.3f')}ms "
+            f"p99={format_value(result['p99_ms'], '.3f')}ms "
+            f"errors={result['errors']}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(
+                {
+                    "metadata": get_metadata(args.requests, args.concurrency),
+                    "results": results,
+                },
+                output_file,
+                indent=2,
+            )
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
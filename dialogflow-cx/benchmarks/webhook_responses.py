@@ -0,0 +1,127 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Microbenchmark of webhook response serialization.
+
+Compares building responses as nested dicts serialized with json.dumps (as the
+handlers used to) with the precomputed templates of webhook.responses.
+
+Run from the dialogflow-cx directory:
+
+    python -m benchmarks.webhook_responses --number 100000
+"""
+
+import argparse
+import json
+import timeit
+
+from webhook import responses
+
+TEXT = "Webhook received: I want to order a shirt (Tag: basic_webhook)"
+PARAMETERS = {"size": "large", "color": "blue", "key": None, "val": None}
+
+
+def legacy_text_response():
+    """Builds and serializes the text response the way the handlers used to."""
+    return json.dumps(
+        {
+            "fulfillment_response": {
+                "messages": [
+                    {
+                        "text": {
+                            "text": [TEXT],
+                            "allow_playback_interruption": False,
+                        }
+                    }
+                ]
+            }
+        }
+    )
+
+
+def legacy_text_and_parameters_response():
+    """Builds and serializes a response setting session parameters, as before."""
+    return json.dumps(
+        {
+            "fulfillment_response": {
+                "messages": [
+                    {
+                        "text": {
+                            "text": ["Session parameter set"],
+                        }
+                    }
+                ]
+            },
+            "session_info": {"parameters": PARAMETERS},
+        }
+    )
+
+
+def template_text_response():
+    """Renders the text response from its template."""
+    return responses.text_response(TEXT, allow_playback_interruption=False)
+
+
+def template_text_and_parameters_response():
+    """Renders a response setting session parameters from its template."""
+    return responses.text_and_parameters_response("Session parameter set", PARAMETERS)
+
+
+CASES = {
+    "text": (legacy_text_response, template_text_response),
+    "text_and_parameters": (
+        legacy_text_and_parameters_response,
+        template_text_and_parameters_response,
+    ),
+}
+
+
+def time_per_call(function, number, repeat):
+    """Best time per call, in microseconds, over repeat runs of number calls."""
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number * 1e6
+
+
+def run(number=100000, repeat=5):
+    """Times every case; returns {case: {"legacy_us", "template_us", "speedup"}}."""
+    results = {}
+    for name, (legacy, template) in CASES.items():
+        assert json.loads(legacy()) == json.loads(template())
+        legacy_us = time_per_call(legacy, number, repeat)
+        template_us = time_per_call(template, number, repeat)
+        results[name] = {
+            "legacy_us": legacy_us,
+            "template_us": template_us,
+            "speedup": legacy_us / template_us,
+        }
+    return results
+
+
+def main():
+    """Prints the benchmark results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"JSON backend: {responses.JSON_BACKEND}")
+    for name, result in run(args.number, args.repeat).items():
+        print(
+            f"{name}: legacy={result['legacy_us']:.2f}us "
+            f"template={result['template_us']:.2f}us "
+            f"speedup={result['speedup']:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Process-wide registry of gRPC channels and API clients shared by delegators.
+
+Async channels only work on the event loop they were created on, so async
+channels and clients are pooled per running event loop.
+"""
+
+import asyncio
+import threading
+
+DEFAULT_KEEPALIVE_TIME_MS = 30000
+DEFAULT_KEEPALIVE_TIMEOUT_MS = 10000
+
+
+def is_async_client_class(client_class):
+    """Checks if a client class is one of the *AsyncClient classes."""
+    return client_class.__name__.endswith("AsyncClient")
+
+
+def get_client_loop(client_class):
+    """Returns the running event loop for an async client class, None otherwise."""
+    if not is_async_client_class(client_class):
+        return None
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class ClientPool:
+    """Hands out API clients that share one gRPC channel per endpoint and credentials.
+
+    Every Dialogflow CX service on a regional endpoint is served by the same
+    host, so a single channel (and a single TLS handshake) can carry the
+    Agents, Intents, Pages, Flows, Webhooks, Sessions and TestCases clients.
+    """
+
+    def __init__(
+        self,
+        keepalive_time_ms=DEFAULT_KEEPALIVE_TIME_MS,
+        keepalive_timeout_ms=DEFAULT_KEEPALIVE_TIMEOUT_MS,
+    ):
+        self.channel_options = [
+            ("grpc.keepalive_time_ms", keepalive_time_ms),
+            ("grpc.keepalive_timeout_ms", keepalive_timeout_ms),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+            ("grpc.max_send_message_length", -1),
+            ("grpc.max_receive_message_length", -1),
+        ]
+        self._channels = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @property
+    def channel_count(self):
+        """Number of channels currently open."""
+        return len(self._channels)
+
+    @property
+    def client_count(self):
+        """Number of clients currently handed out."""
+        return len(self._clients)
+
+    def get_channel(  # pylint: disable=too-many-arguments
+        self, transport_class, endpoint, credentials, is_async=False, loop=None
+    ):
+        """Returns the shared channel for an endpoint, credentials and event loop."""
+        key = (endpoint, credentials, is_async, loop)
+        with self._lock:
+            if key not in self._channels:
+                self._forget_closed_loops()
+                host = endpoint if ":" in endpoint else f"{endpoint}:443"
+                self._channels[key] = transport_class.create_channel(
+                    host,
+                    credentials=credentials,
+                    options=self.channel_options,
+                )
+            return self._channels[key]
+
+    def get_client(self, client_class, client_options, credentials):
+        """Returns a client of client_class on the shared channel of its endpoint."""
+        endpoint = client_options["api_endpoint"]
+        loop = get_client_loop(client_class)
+        key = (client_class, endpoint, credentials, loop)
+        with self._lock:
+            if key in self._clients:
+                return self._clients[key]
+
+        is_async = is_async_client_class(client_class)
+        transport_class = client_class.get_transport_class(
+            "grpc_asyncio" if is_async else "grpc"
+        )
+        channel = self.get_channel(
+            transport_class, endpoint, credentials, is_async, loop
+        )
+        client = client_class(
+            transport=transport_class(host=endpoint, channel=channel),
+            client_options=client_options,
+        )
+        with self._lock:
+            return self._clients.setdefault(key, client)
+
+    def _forget_closed_loops(self):
+        """Drops the channels and clients of event loops that are closed."""
+        for pool in (self._channels, self._clients):
+            for key in [key for key in pool if key[-1] and key[-1].is_closed()]:
+                del pool[key]
+
+    def close(self):
+        """Closes the synchronous channels and forgets every client.
+
+        Async channels are closed by async_close, from their event loop.
+        """
+        with self._lock:
+            for (_, _, is_async, _), channel in self._channels.items():
+                if not is_async:
+                    channel.close()
+            self._channels.clear()
+            self._clients.clear()
+
+    async def async_close(self):
+        """Closes the channels of the running event loop and forgets their clients."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            channels = [
+                self._channels.pop(key)
+                for key in list(self._channels)
+                if key[-1] is loop
+            ]
+            for key in [key for key in self._clients if key[-1] is loop]:
+                del self._clients[key]
+        for channel in channels:
+            await channel.close()
+
+
+_DEFAULT_POOL = ClientPool()
+
+
+def get_default_pool():
+    """Accesses the process-wide client pool."""
+    return _DEFAULT_POOL
+
+
+def get_client(client_class, client_options, credentials):
+    """Returns a client of client_class from the process-wide client pool."""
+    return _DEFAULT_POOL.get_client(client_class, client_options, credentials)
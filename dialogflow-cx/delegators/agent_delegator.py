@@ -29,6 +29,7 @@ class AgentDelegator(ClientDelegator):
     _DEFAULT_LANGUAGE_CODE = "en"
     _DEFAULT_TIME_ZONE = "America/Los_Angeles"
     _CLIENT_CLASS = cx.AgentsClient
+    _RESOURCE_KIND = "agents"
 
     def __init__(self, controller: ds.DialogflowSample, **kwargs) -> None:
         super().__init__(controller, **kwargs)
@@ -38,37 +39,43 @@ class AgentDelegator(ClientDelegator):
         )
         self.time_zone = kwargs.get("time_zone", self._DEFAULT_TIME_ZONE)
 
+    def get_agent(self):
+        """Create an Agent object to be pushed to the API."""
+        return cx.Agent(
+            display_name=self.display_name,
+            default_language_code=self.default_language_code,
+            time_zone=self.time_zone,
+        )
+
     def setup(self):
         """Initializes the agent delegator."""
-        try:
-            agent = cx.Agent(
-                display_name=self.display_name,
-                default_language_code=self.default_language_code,
-                time_zone=self.time_zone,
-            )
-            request = {"agent": agent, "parent": self.parent}
-            self._agent = self.client.create_agent(request=request)
-        except google.api_core.exceptions.AlreadyExists:
-            request = cx.ListAgentsRequest(
-                parent=self.parent,
-            )
-            for agent in self.client.list_agents(request=request):
-                if agent.display_name == self.display_name:
-                    request = cx.GetAgentRequest(
-                        name=agent.name,
-                    )
-                    self._agent = self.client.get_agent(request=request)
-                    break
+        self._agent = self.get_or_create(
+            create=lambda: self.client.create_agent(
+                request={"agent": self.get_agent(), "parent": self.parent}
+            ),
+            list_resources=lambda: self.client.list_agents(
+                request=cx.ListAgentsRequest(parent=self.parent)
+            ),
+            get=lambda name: self.client.get_agent(
+                request=cx.GetAgentRequest(name=name)
+            ),
+        )
 
     def tear_down(self):
         """Destroys the Dialogflow agent."""
         request = cx.DeleteAgentRequest(name=self.agent.name)
         try:
             self.client.delete_agent(request=request)
+            self.forget(request.name)
             self._agent = None
         except google.api_core.exceptions.NotFound:
             pass
 
+    @property
+    def dependencies(self):
+        """The agent is the root of the resource graph."""
+        return self._dependencies
+
     @property
     def parent(self):
         """Accesses the parent of the agent."""
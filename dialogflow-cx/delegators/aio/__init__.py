@@ -0,0 +1,40 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Asyncio delegators module, built on the Dialogflow CX async clients."""
+
+from ..auth_delegator import AuthDelegator
+from ..client_delegator import ClientDelegator
+from .agent_delegator import AgentDelegator
+from .intent_delegator import AnnotatedIntentDelegator, IntentDelegator
+from .page_delegator import FulfillmentPageDelegator, PageDelegator, StartPageDelegator
+from .sessions_delegator import SessionsDelegator
+from .start_flow_delegator import StartFlowDelegator
+from .test_case_delegator import TestCaseDelegator
+from .webhook_delegator import WebhookDelegator
+
+__all__ = (
+    "AgentDelegator",
+    "AuthDelegator",
+    "ClientDelegator",
+    "IntentDelegator",
+    "AnnotatedIntentDelegator",
+    "FulfillmentPageDelegator",
+    "PageDelegator",
+    "StartPageDelegator",
+    "SessionsDelegator",
+    "StartFlowDelegator",
+    "TestCaseDelegator",
+    "WebhookDelegator",
+)
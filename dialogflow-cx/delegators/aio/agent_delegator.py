@@ -0,0 +1,50 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Async Agent Delegator module. Coordinates agent state with Dialogflow."""
+
+import google.api_core.exceptions
+import google.cloud.dialogflowcx as cx
+
+from .. import agent_delegator
+
+
+class AgentDelegator(agent_delegator.AgentDelegator):
+    """Class for organizing async interactions with the Dialogflow Agent API."""
+
+    _CLIENT_CLASS = cx.AgentsAsyncClient
+
+    async def setup(self):  # pylint: disable=invalid-overridden-method
+        """Initializes the agent delegator."""
+        self._agent = await self.async_get_or_create(
+            create=lambda: self.client.create_agent(
+                request={"agent": self.get_agent(), "parent": self.parent}
+            ),
+            list_resources=lambda: self.client.list_agents(
+                request=cx.ListAgentsRequest(parent=self.parent)
+            ),
+            get=lambda name: self.client.get_agent(
+                request=cx.GetAgentRequest(name=name)
+            ),
+        )
+
+    async def tear_down(self):  # pylint: disable=invalid-overridden-method
+        """Destroys the Dialogflow agent."""
+        request = cx.DeleteAgentRequest(name=self.agent.name)
+        try:
+            await self.client.delete_agent(request=request)
+            self.forget(request.name)
+            self._agent = None
+        except google.api_core.exceptions.NotFound:
+            pass
@@ -0,0 +1,57 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Async Dialogflow Intents API interactions."""
+
+import google.api_core.exceptions
+import google.cloud.dialogflowcx as cx
+
+from .. import intent_delegator
+
+
+class IntentDelegator(intent_delegator.IntentDelegator):
+    """Class for organizing async interactions with the Dialogflow Intents API."""
+
+    _CLIENT_CLASS = cx.IntentsAsyncClient
+
+    async def setup(self):  # pylint: disable=invalid-overridden-method
+        """Initializes the intent delegator."""
+        self._intent = await self.async_get_or_create(
+            create=lambda: self.client.create_intent(
+                parent=self.parent,
+                intent=self.get_intent(),
+            ),
+            list_resources=lambda: self.client.list_intents(
+                request=cx.ListIntentsRequest(parent=self.parent)
+            ),
+            get=lambda name: self.client.get_intent(
+                request=cx.GetIntentRequest(name=name)
+            ),
+        )
+
+    async def tear_down(self):  # pylint: disable=invalid-overridden-method
+        """Destroys the Dialogflow intent."""
+        request = cx.DeleteIntentRequest(name=self.intent.name)
+        try:
+            await self.client.delete_intent(request=request)
+            self.forget(request.name)
+            self._intent = None
+        except google.api_core.exceptions.NotFound:
+            pass
+
+
+class AnnotatedIntentDelegator(
+    IntentDelegator, intent_delegator.AnnotatedIntentDelegator
+):
+    """Async IntentDelegator with annotated spans of text for parameter detection."""
@@ -0,0 +1,75 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Async Dialogflow Pages API interactions."""
+
+import google.api_core.exceptions
+import google.cloud.dialogflowcx as cx
+
+from .. import page_delegator
+
+
+class PageDelegator(page_delegator.PageDelegator):
+    """Class for organizing async interactions with the Dialogflow Pages API."""
+
+    _CLIENT_CLASS = cx.PagesAsyncClient
+
+    async def setup(self):  # pylint: disable=invalid-overridden-method
+        """Initializes the page delegator."""
+        self._page = await self.async_get_or_create(
+            create=lambda: self.client.create_page(
+                parent=self.parent,
+                page=self.get_page(),
+            ),
+            list_resources=lambda: self.client.list_pages(
+                request=cx.ListPagesRequest(parent=self.parent)
+            ),
+            get=lambda name: self.client.get_page(request=cx.GetPageRequest(name=name)),
+        )
+
+    async def tear_down(self, force=True):  # pylint: disable=invalid-overridden-method
+        """Destroys the Dialogflow page."""
+        request = cx.DeletePageRequest(name=self.page.name, force=force)
+        try:
+            await self.client.delete_page(request=request)
+            self.forget(request.name)
+            self._page = None
+        except google.api_core.exceptions.NotFound:
+            pass
+
+    async def append_transition_route(  # pylint: disable=invalid-overridden-method
+        self, target_page, intent=None, condition=None, trigger_fulfillment=None
+    ):
+        """Appends a transition route to the page."""
+        transition_route = cx.TransitionRoute(
+            condition=condition,
+            trigger_fulfillment=trigger_fulfillment,
+            intent=intent,
+            target_page=target_page,
+        )
+        self.page.transition_routes.append(transition_route)
+        await self.client.update_page(page=self.page)
+
+
+class StartPageDelegator(PageDelegator, page_delegator.StartPageDelegator):
+    """Special async delegator necessary when the start page is a transition target."""
+
+
+class FulfillmentPageDelegator(PageDelegator, page_delegator.FulfillmentPageDelegator):
+    """Class for organizing async interactions with the Pages API with fulfillments."""
+
+    async def setup(self):
+        """Initializes the fulfillment page delegator."""
+        self._entry_fulfillment = self.get_entry_fulfillment()
+        await super().setup()
@@ -0,0 +1,47 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Async Dialogflow Sessions API interactions."""
+
+import google.cloud.dialogflowcx as cx
+
+from .. import sessions_delegator
+
+
+class SessionsDelegator(sessions_delegator.SessionsDelegator):
+    """Class for organizing async interactions with the Dialogflow Sessions API."""
+
+    _CLIENT_CLASS = cx.SessionsAsyncClient
+
+    async def async_acquire_token(self):
+        """Awaits a detect_intent token from the rate limiter, if any."""
+        limiter = self.rate_limiter
+        if limiter is not None:
+            await limiter.async_acquire()
+
+    def _get_retry_hooks(self):
+        return {"detect_intent": self.async_acquire_token}
+
+    async def detect_intent(  # pylint: disable=invalid-overridden-method
+        self,
+        text,
+        drop_none_params=True,
+        **kwargs,
+    ):
+        """Run detect_intent for a session against an Agent."""
+        request = self.get_detect_intent_request(text, **kwargs)
+        if not self._owns_client:
+            await self.async_acquire_token()
+        response = await self.client.detect_intent(request)
+        return self.parse_detect_intent_response(response, drop_none_params)
@@ -0,0 +1,47 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Async Dialogflow Flows API interactions."""
+
+import google.cloud.dialogflowcx as cx
+
+from .. import start_flow_delegator
+
+
+class StartFlowDelegator(start_flow_delegator.StartFlowDelegator):
+    """Class for organizing async interactions with the Dialogflow Flows API."""
+
+    _CLIENT_CLASS = cx.FlowsAsyncClient
+
+    async def setup(self):  # pylint: disable=invalid-overridden-method
+        """Initializes the start flow delegator."""
+        flow_name = self.controller.start_flow
+        self._flow = await self.client.get_flow(name=flow_name)
+
+    async def append_transition_route(  # pylint: disable=invalid-overridden-method
+        self, target_page, intent
+    ):
+        """Appends a transition route to the flow."""
+        self.flow.transition_routes.append(
+            cx.TransitionRoute(
+                intent=intent,
+                target_page=target_page,
+            )
+        )
+        await self.client.update_flow(flow=self.flow)
+
+    async def tear_down(self):  # pylint: disable=invalid-overridden-method
+        """Removes the appended transition routes; required to delete agent."""
+        self.flow.transition_routes = self.flow.transition_routes[:1]
+        await self.client.update_flow(flow=self.flow)
@@ -0,0 +1,79 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Async Dialogflow TestCase API interactions."""
+
+import asyncio
+
+import google.api_core.exceptions
+import google.cloud.dialogflowcx as cx
+import lro_waiter
+from utilities import is_nlu_model_not_found
+
+from .. import test_case_delegator
+
+
+class TestCaseDelegator(test_case_delegator.TestCaseDelegator):
+    """Class for organizing async interactions with the Dialogflow TestCases API."""
+
+    _CLIENT_CLASS = cx.TestCasesAsyncClient
+
+    async def setup(self):  # pylint: disable=invalid-overridden-method
+        """Initializes the test cases delegator."""
+        self._test_case = await self.async_get_or_create(
+            create=lambda: self.client.create_test_case(
+                parent=self.parent,
+                test_case=self.get_test_case(),
+            ),
+            list_resources=lambda: self.client.list_test_cases(
+                request=cx.ListTestCasesRequest(parent=self.parent)
+            ),
+            get=lambda name: self.client.get_test_case(
+                request=cx.GetTestCaseRequest(name=name)
+            ),
+        )
+
+    async def tear_down(self):  # pylint: disable=invalid-overridden-method
+        """Destroys the test case."""
+        request = cx.BatchDeleteTestCasesRequest(
+            parent=self.parent,
+            names=[self.test_case.name],
+        )
+        try:
+            await self.client.batch_delete_test_cases(request=request)
+            self.forget(self.test_case.name)
+            self._test_case = None
+        except google.api_core.exceptions.NotFound:
+            pass
+
+    async def run_test_case(  # pylint: disable=invalid-overridden-method
+        self, wait=10, max_retries=3
+    ):
+        """Runs the test case, backing off from wait seconds while the flow trains."""
+        retry_count = 0
+        retry_delays = lro_waiter.backoff_delays(initial_delay=wait, max_delay=6 * wait)
+        while retry_count < max_retries:
+            lro = await self.client.run_test_case(
+                request=cx.RunTestCaseRequest(name=self.test_case.name)
+            )
+            try:
+                result = (await self.controller.lro_waiter.async_wait(lro)).result
+                self.check_test_case_result(result)
+                return
+            except google.api_core.exceptions.NotFound as exc:
+                if not is_nlu_model_not_found(exc):
+                    raise
+                retry_count += 1
+                await asyncio.sleep(next(retry_delays))
+        raise RuntimeError(f"Retry count exceeded: {retry_count}")
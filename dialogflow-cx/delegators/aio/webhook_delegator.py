@@ -0,0 +1,51 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Async Dialogflow Webhooks API interactions."""
+
+import google.api_core.exceptions
+import google.cloud.dialogflowcx as cx
+
+from .. import webhook_delegator
+
+
+class WebhookDelegator(webhook_delegator.WebhookDelegator):
+    """Class for organizing async interactions with the Dialogflow Webhooks API."""
+
+    _CLIENT_CLASS = cx.WebhooksAsyncClient
+
+    async def setup(self):  # pylint: disable=invalid-overridden-method
+        """Initializes the webhook delegator."""
+        self._webhook = await self.async_get_or_create(
+            create=lambda: self.client.create_webhook(
+                parent=self.parent,
+                webhook=self.get_webhook(),
+            ),
+            list_resources=lambda: self.client.list_webhooks(
+                request=cx.ListWebhooksRequest(parent=self.parent)
+            ),
+            get=lambda name: self.client.get_webhook(
+                request=cx.GetWebhookRequest(name=name)
+            ),
+        )
+
+    async def tear_down(self):  # pylint: disable=invalid-overridden-method
+        """Destroys the Dialogflow webhook."""
+        request = cx.DeleteWebhookRequest(name=self.webhook.name)
+        try:
+            await self.client.delete_webhook(request=request)
+            self.forget(request.name)
+            self._webhook = None
+        except google.api_core.exceptions.NotFound:
+            pass
@@ -14,35 +14,127 @@
 
 """Module for the base class for API delegators for Dialogflow CX samples."""
 
+import client_pool
 import dialogflow_sample as ds
+import display_name_index
+import google.api_core.exceptions
+import retry_policy
 
 
 class ClientDelegator:
     """Base class for API delegators for Dialogflow CX samples."""
 
     _CLIENT_CLASS = object  # Override in subclass
+    _RESOURCE_KIND = None  # Override in subclass
 
     def __init__(self, controller: ds.DialogflowSample, client=None, display_name=None):
         self.controller = controller
         self._client = client
+        self._owns_client = client is None
+        self._client_loop = None
         self._display_name = display_name
+        self._dependencies = []
 
     @property
     def client(self):
-        """Accesses the API client for the delegator."""
-        if self._client is None:
-            self._client = self._CLIENT_CLASS(
-                client_options=self.controller.client_options,
-                credentials=self.controller.auth_delegator.credentials,
+        """Accesses the API client for the delegator.
+
+        Pooled async clients are bound to their event loop, so another one is
+        fetched when the delegator is used from a new loop.
+        """
+        loop = client_pool.get_client_loop(self._CLIENT_CLASS)
+        if self._owns_client and (
+            self._client is None or self._client_loop is not loop
+        ):
+            self._client_loop = loop
+            self._client = retry_policy.RetryingClient(
+                client_pool.get_client(
+                    self._CLIENT_CLASS,
+                    client_options=self.controller.client_options,
+                    credentials=self.controller.auth_delegator.credentials,
+                ),
+                self.controller.retry_engine,
+                hooks=self._get_retry_hooks(),
             )
         return self._client
 
+    def _get_retry_hooks(self):
+        """Callables run before every attempt of a client method, by name."""
+        return {}
+
     @property
     def parent(self):
         """Accesses agent name, i.e. the parent for the most delegator components."""
         return self.controller.agent_delegator.agent.name
 
+    @property
+    def dependencies(self):
+        """Accesses the delegators that must be set up before this one."""
+        return [self.controller.agent_delegator] + self._dependencies
+
+    def add_dependency(self, *delegators):
+        """Declares delegators that must be set up before this one."""
+        self._dependencies.extend(delegators)
+
     @property
     def display_name(self):
         """Accesses the display_name for the delegator."""
         return self._display_name
+
+    @property
+    def display_name_index(self):
+        """Accesses the display name index shared by all delegators."""
+        return display_name_index.get_default_index()
+
+    def get_or_create(self, create, list_resources, get):
+        """Gets the resource with this display name, creating it if needed.
+
+        A cached resource name is fetched directly; on AlreadyExists, the
+        parent is indexed with a single list pass that later lookups reuse.
+        AlreadyExists is re-raised if no resource has the display name.
+        """
+        index = self.display_name_index
+        name = index.get(self._RESOURCE_KIND, self.parent, self.display_name)
+        if name:
+            try:
+                return get(name)
+            except google.api_core.exceptions.NotFound:
+                index.remove(self._RESOURCE_KIND, self.parent, name)
+        try:
+            resource = create()
+        except google.api_core.exceptions.AlreadyExists:
+            name = index.lookup(
+                self._RESOURCE_KIND, self.parent, self.display_name, list_resources
+            )
+            if not name:
+                raise
+            return get(name)
+        index.add(self._RESOURCE_KIND, self.parent, resource)
+        return resource
+
+    async def async_get_or_create(self, create, list_resources, get):
+        """Awaitable get_or_create, for the delegators of async clients."""
+        index = self.display_name_index
+        name = index.get(self._RESOURCE_KIND, self.parent, self.display_name)
+        if name:
+            try:
+                return await get(name)
+            except google.api_core.exceptions.NotFound:
+                index.remove(self._RESOURCE_KIND, self.parent, name)
+        try:
+            resource = await create()
+        except google.api_core.exceptions.AlreadyExists:
+            if not index.is_built(self._RESOURCE_KIND, self.parent):
+                await index.async_build(
+                    self._RESOURCE_KIND, self.parent, await list_resources()
+                )
+            name = index.get(self._RESOURCE_KIND, self.parent, self.display_name)
+            if not name:
+                raise
+            return await get(name)
+        index.add(self._RESOURCE_KIND, self.parent, resource)
+        return resource
+
+    def forget(self, name):
+        """Removes a deleted resource from the display name index."""
+        self.display_name_index.remove(self._RESOURCE_KIND, self.parent, name)
@@ -27,6 +27,7 @@ class IntentDelegator(ClientDelegator):
     """Class for organizing interactions with the Dialogflow Intents API."""
 
     _CLIENT_CLASS = cx.IntentsClient
+    _RESOURCE_KIND = "intents"
 
     def __init__(
         self,
@@ -67,29 +68,25 @@ class IntentDelegator(ClientDelegator):
 
     def setup(self):
         """Initializes the intent delegator."""
-        intent = self.get_intent()
-        try:
-            self._intent = self.client.create_intent(
-                parent=self.parent,
-                intent=intent,
-            )
-        except google.api_core.exceptions.AlreadyExists:
-            request = cx.ListIntentsRequest(
+        self._intent = self.get_or_create(
+            create=lambda: self.client.create_intent(
                 parent=self.parent,
-            )
-            for intent in self.client.list_intents(request=request):
-                if intent.display_name == self.display_name:
-                    request = cx.GetIntentRequest(
-                        name=intent.name,
-                    )
-                    self._intent = self.client.get_intent(request=request)
-                    return
+                intent=self.get_intent(),
+            ),
+            list_resources=lambda: self.client.list_intents(
+                request=cx.ListIntentsRequest(parent=self.parent)
+            ),
+            get=lambda name: self.client.get_intent(
+                request=cx.GetIntentRequest(name=name)
+            ),
+        )
 
     def tear_down(self):
         """Destroys the Dialogflow intent."""
         request = cx.DeleteIntentRequest(name=self.intent.name)
         try:
             self.client.delete_intent(request=request)
+            self.forget(request.name)
             self._intent = None
         except google.api_core.exceptions.NotFound:
             pass
@@ -25,6 +25,7 @@ class PageDelegator(ClientDelegator):
     """Class for organizing interactions with the Dialogflow Pages API."""
 
     _CLIENT_CLASS = cx.PagesClient
+    _RESOURCE_KIND = "pages"
 
     def __init__(self, controller: ds.DialogflowSample, **kwargs) -> None:
         self._page = None
@@ -48,32 +49,32 @@ class PageDelegator(ClientDelegator):
         """Accesses the entry fullfillment set for this page."""
         return self._entry_fulfillment
 
-    def setup(self):
-        """Initializes the page delegator."""
-        page = cx.Page(
+    def get_page(self):
+        """Create a Page object to be pushed to the API."""
+        return cx.Page(
             display_name=self.display_name,
             entry_fulfillment=self.entry_fulfillment,
         )
-        try:
-            self._page = self.client.create_page(
-                parent=self.controller.start_flow,
-                page=page,
-            )
-        except google.api_core.exceptions.AlreadyExists:
-            request = cx.ListPagesRequest(parent=self.parent)
-            for curr_page in self.client.list_pages(request=request):
-                if curr_page.display_name == self.display_name:
-                    request = cx.GetPageRequest(
-                        name=curr_page.name,
-                    )
-                    self._page = self.client.get_page(request=request)
-                    return
+
+    def setup(self):
+        """Initializes the page delegator."""
+        self._page = self.get_or_create(
+            create=lambda: self.client.create_page(
+                parent=self.parent,
+                page=self.get_page(),
+            ),
+            list_resources=lambda: self.client.list_pages(
+                request=cx.ListPagesRequest(parent=self.parent)
+            ),
+            get=lambda name: self.client.get_page(request=cx.GetPageRequest(name=name)),
+        )
 
     def tear_down(self, force=True):
         """Destroys the Dialogflow page."""
         request = cx.DeletePageRequest(name=self.page.name, force=force)
         try:
             self.client.delete_page(request=request)
+            self.forget(request.name)
             self._page = None
         except google.api_core.exceptions.NotFound:
             pass
@@ -123,13 +124,15 @@ class FulfillmentPageDelegator(PageDelegator):
         self._webhook_delegator = kwargs.pop("webhook_delegator", None)
         self._tag = kwargs.pop("tag", None)
         super().__init__(controller, **kwargs)
+        if self._webhook_delegator:
+            self.add_dependency(self._webhook_delegator)
 
-    def setup(self):
-        """Initializes the fulfillment page delegator."""
+    def get_entry_fulfillment(self):
+        """Create the entry Fulfillment of the page, including the webhook."""
         webhook_name = (
             self._webhook_delegator.webhook.name if self._webhook_delegator else None
         )
-        self._entry_fulfillment = cx.Fulfillment(
+        return cx.Fulfillment(
             {
                 "messages": [
                     cx.ResponseMessage(
@@ -142,4 +145,8 @@ class FulfillmentPageDelegator(PageDelegator):
                 "tag": self._tag,
             }
         )
+
+    def setup(self):
+        """Initializes the fulfillment page delegator."""
+        self._entry_fulfillment = self.get_entry_fulfillment()
         super().setup()
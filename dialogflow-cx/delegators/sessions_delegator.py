@@ -18,7 +18,7 @@ import uuid
 
 import dialogflow_sample as ds
 import google.cloud.dialogflowcx as cx
-from utilities import retry_call
+import rate_limiter
 
 from .client_delegator import ClientDelegator
 
@@ -30,22 +30,41 @@ class SessionsDelegator(ClientDelegator):
 
     def __init__(self, controller: ds.DialogflowSample, **kwargs) -> None:
         self.language_code = kwargs.pop("language_code", "en")
+        self._rate_limiter = kwargs.pop("rate_limiter", None)
         super().__init__(controller, **kwargs)
 
-    def detect_intent(
-        self,
-        text,
-        drop_none_params=True,
-        **kwargs,
-    ):
-        """Run detect_intent for a session against an Agent."""
+    @property
+    def rate_limiter(self):
+        """The limiter for detect_intent calls, if any.
+
+        Falls back to the limiter configured for the project and location in
+        the process-wide registry, so that every session shares its quota.
+        """
+        if self._rate_limiter is not None:
+            return self._rate_limiter
+        return rate_limiter.get_default_registry().find(
+            self.controller.project_id, self.controller.location
+        )
+
+    def acquire_token(self):
+        """Waits for a detect_intent token from the rate limiter, if any."""
+        limiter = self.rate_limiter
+        if limiter is not None:
+            limiter.acquire()
+
+    def _get_retry_hooks(self):
+        # Retries of detect_intent count against the quota like first calls.
+        return {"detect_intent": self.acquire_token}
+
+    def get_detect_intent_request(self, text, **kwargs):
+        """Builds the DetectIntentRequest for a session against an Agent."""
         parameters = kwargs.pop("parameters", {})
         session_id = kwargs.pop("session_id", str(uuid.uuid1()))
         current_page = kwargs.pop(
             "current_page", self.controller.start_flow_delegator.start_page_name
         )
 
-        request = cx.DetectIntentRequest(
+        return cx.DetectIntentRequest(
             session=f"{self.controller.agent_delegator.agent.name}/sessions/{session_id}",
             query_input=cx.QueryInput(
                 text=cx.TextInput(
@@ -59,16 +78,16 @@ class SessionsDelegator(ClientDelegator):
             ),
         )
 
-        with retry_call(self.client.detect_intent, request) as response:
-            responses = [
-                x.text.text[0] for x in response.query_result.response_messages
-            ]
-            current_page = response.query_result.current_page.name
-            parameters = response.query_result.parameters
-            if parameters is None:
-                parameters = {}
-            else:
-                parameters = dict(parameters)
+    @staticmethod
+    def parse_detect_intent_response(response, drop_none_params=True):
+        """Extracts responses, current page and parameters from a response."""
+        responses = [x.text.text[0] for x in response.query_result.response_messages]
+        current_page = response.query_result.current_page.name
+        parameters = response.query_result.parameters
+        if parameters is None:
+            parameters = {}
+        else:
+            parameters = dict(parameters)
 
         # Parameters that are "None" are removed from the session.
         #  drop_none_params=True performs the same behavior client-side,
@@ -79,3 +98,17 @@ class SessionsDelegator(ClientDelegator):
             }
 
         return responses, current_page, parameters
+
+    def detect_intent(
+        self,
+        text,
+        drop_none_params=True,
+        **kwargs,
+    ):
+        """Run detect_intent for a session against an Agent."""
+        request = self.get_detect_intent_request(text, **kwargs)
+        if not self._owns_client:
+            # Injected clients are not retried, nor limited by the retry hooks.
+            self.acquire_token()
+        response = self.client.detect_intent(request)
+        return self.parse_detect_intent_response(response, drop_none_params)
@@ -16,10 +16,13 @@
 
 import time
 
+import batch_test_runner
 import dialogflow_sample as ds
 import google.api_core.exceptions
 import google.auth
 import google.cloud.dialogflowcx as cx
+import lro_waiter
+from utilities import is_nlu_model_not_found
 
 from .client_delegator import ClientDelegator
 
@@ -32,6 +35,7 @@ class TestCaseDelegator(ClientDelegator):
     """Class for organizing interactions with the Dialogflow TestCases API."""
 
     _CLIENT_CLASS = cx.TestCasesClient
+    _RESOURCE_KIND = "testCases"
 
     def __init__(self, controller: ds.DialogflowSample, **kwargs) -> None:
         self._is_webhook_enabled = kwargs.pop("is_webhook_enabled", False)
@@ -47,29 +51,31 @@ class TestCaseDelegator(ClientDelegator):
             raise RuntimeError("Test Case not yet created")
         return self._test_case
 
+    def get_test_case(self):
+        """Create a TestCase object to be pushed to the API."""
+        return cx.TestCase(
+            display_name=self.display_name,
+            test_case_conversation_turns=[
+                t.get_conversation_turn(self._is_webhook_enabled)
+                for t in self._conversation_turns
+            ],
+            test_config=cx.TestConfig(flow=self.controller.start_flow),
+        )
+
     def setup(self):
         """Initializes the test cases delegator."""
-        try:
-            self._test_case = self.client.create_test_case(
-                parent=self.controller.agent_delegator.agent.name,
-                test_case=cx.TestCase(
-                    display_name=self.display_name,
-                    test_case_conversation_turns=[
-                        t.get_conversation_turn(self._is_webhook_enabled)
-                        for t in self._conversation_turns
-                    ],
-                    test_config=cx.TestConfig(flow=self.controller.start_flow),
-                ),
-            )
-        except google.api_core.exceptions.AlreadyExists:
-            request = cx.ListTestCasesRequest(parent=self.parent)
-            for curr_test_case in self.client.list_test_cases(request=request):
-                if curr_test_case.display_name == self.display_name:
-                    request = cx.GetTestCaseRequest(
-                        name=curr_test_case.name,
-                    )
-                    self._test_case = self.client.get_test_case(request=request)
-                    return
+        self._test_case = self.get_or_create(
+            create=lambda: self.client.create_test_case(
+                parent=self.parent,
+                test_case=self.get_test_case(),
+            ),
+            list_resources=lambda: self.client.list_test_cases(
+                request=cx.ListTestCasesRequest(parent=self.parent)
+            ),
+            get=lambda name: self.client.get_test_case(
+                request=cx.GetTestCaseRequest(name=name)
+            ),
+        )
 
     def tear_down(self):
         """Destroys the test case."""
@@ -79,37 +85,65 @@ class TestCaseDelegator(ClientDelegator):
         )
         try:
             self.client.batch_delete_test_cases(request=request)
+            self.forget(self.test_case.name)
             self._test_case = None
         except google.api_core.exceptions.NotFound:
             pass
 
     def run_test_case(self, wait=10, max_retries=3):
-        """Runs the test case."""
+        """Runs the test case, backing off from wait seconds while the flow trains."""
         retry_count = 0
-        result = None
+        retry_delays = lro_waiter.backoff_delays(initial_delay=wait, max_delay=6 * wait)
         while retry_count < max_retries:
-            time.sleep(wait)
             lro = self.client.run_test_case(
                 request=cx.RunTestCaseRequest(name=self.test_case.name)
             )
-            while lro.running():
-                try:
-                    result = lro.result().result
-                    agent_response_differences = [
-                        conversation_turn.virtual_agent_output.differences
-                        for conversation_turn in result.conversation_turns
-                    ]
-                    test_case_fail = result.test_result != cx.TestResult.PASSED
-                    if any(agent_response_differences) or test_case_fail:
-                        raise DialogflowTestCaseFailure(
-                            f'Test "{self.test_case.display_name}" failed'
-                        )
-                    return
-                except google.api_core.exceptions.NotFound as exc:
-                    if str(exc) == (
-                        "404 com.google.apps.framework.request.NotFoundException: "
-                        "NLU model for flow '00000000-0000-0000-0000-000000000000' does not exist. "
-                        "Please try again after retraining the flow."
-                    ):
-                        retry_count += 1
+            try:
+                result = self.controller.lro_waiter.wait(lro).result
+                self.check_test_case_result(result)
+                return
+            except google.api_core.exceptions.NotFound as exc:
+                if not is_nlu_model_not_found(exc):
+                    raise
+                retry_count += 1
+                time.sleep(next(retry_delays))
         raise RuntimeError(f"Retry count exceeded: {retry_count}")
+
+    def check_test_case_result(self, result):
+        """Raises DialogflowTestCaseFailure if the test case result has failed."""
+        agent_response_differences = [
+            conversation_turn.virtual_agent_output.differences
+            for conversation_turn in result.conversation_turns
+        ]
+        test_case_fail = result.test_result != cx.TestResult.PASSED
+        if any(agent_response_differences) or test_case_fail:
+            raise DialogflowTestCaseFailure(
+                f'Test "{self.test_case.display_name}" failed'
+            )
+
+    @classmethod
+    def run_test_cases(
+        cls, test_case_delegators, batch=True, max_concurrent=8, callback=None
+    ):
+        """Runs the test cases of many delegators together.
+
+        Raises DialogflowTestCaseFailure listing the failed test cases, if any.
+        """
+        test_case_delegators = list(test_case_delegators)
+        if not test_case_delegators:
+            return batch_test_runner.BatchTestReport()
+        delegator = test_case_delegators[0]
+        runner = batch_test_runner.BatchTestRunner(
+            delegator.client,
+            delegator.controller.lro_waiter,
+            max_concurrent=max_concurrent,
+        )
+        test_cases = [curr.test_case for curr in test_case_delegators]
+        if batch:
+            report = runner.run_batch(delegator.parent, test_cases, callback=callback)
+        else:
+            report = runner.run_concurrent(test_cases, callback=callback)
+        if report.failed:
+            names = ", ".join(f'"{outcome.display_name}"' for outcome in report.failed)
+            raise DialogflowTestCaseFailure(f"Tests {names} failed")
+        return report
@@ -26,6 +26,7 @@ class WebhookDelegator(ClientDelegator):
     """Class for organizing interactions with the Dialogflow Webhooks API."""
 
     _CLIENT_CLASS = cx.WebhooksClient
+    _RESOURCE_KIND = "webhooks"
 
     def __init__(self, controller: ds.DialogflowSample, **kwargs) -> None:
         self._uri = kwargs.pop("uri")
@@ -39,36 +40,36 @@ class WebhookDelegator(ClientDelegator):
             raise RuntimeError("Webhook not yet created")
         return self._webhook
 
-    def setup(self):
-        """Initializes the webhook delegator."""
-        webhook = cx.Webhook(
+    def get_webhook(self):
+        """Create a Webhook object to be pushed to the API."""
+        return cx.Webhook(
             {
                 "display_name": self.display_name,
                 "generic_web_service": {"uri": self._uri},
             }
         )
-        try:
-            self._webhook = self.client.create_webhook(
-                parent=self.parent,
-                webhook=webhook,
-            )
-        except google.api_core.exceptions.AlreadyExists:
-            request = cx.ListWebhooksRequest(
+
+    def setup(self):
+        """Initializes the webhook delegator."""
+        self._webhook = self.get_or_create(
+            create=lambda: self.client.create_webhook(
                 parent=self.parent,
-            )
-            for webhook in self.client.list_webhooks(request=request):
-                if webhook.display_name == self.display_name:
-                    request = cx.GetWebhookRequest(
-                        name=webhook.name,
-                    )
-                    self._webhook = self.client.get_webhook(request=request)
-                    break
+                webhook=self.get_webhook(),
+            ),
+            list_resources=lambda: self.client.list_webhooks(
+                request=cx.ListWebhooksRequest(parent=self.parent)
+            ),
+            get=lambda name: self.client.get_webhook(
+                request=cx.GetWebhookRequest(name=name)
+            ),
+        )
 
     def tear_down(self):
         """Destroys the Dialogflow webhook."""
         request = cx.DeleteWebhookRequest(name=self.webhook.name)
         try:
             self.client.delete_webhook(request=request)
+            self.forget(request.name)
             self._webhook = None
         except google.api_core.exceptions.NotFound:
             pass
@@ -18,8 +18,15 @@
 import time
 import uuid
 
+import batch_test_runner
+import client_pool
+import display_name_index
 import google.api_core.exceptions
 import google.cloud.dialogflowcx as cx
+import load_driver
+import lro_waiter
+import resource_graph
+import retry_policy
 
 
 class UnexpectedResponseFailure(AssertionError):
@@ -44,6 +51,9 @@ class DialogflowSample:
         self._test_cases_client = None
         self._start_flow_delegator = None
         self._session_delegator = None
+        self._delegators = []
+        self._lro_waiter = lro_waiter.LroWaiter()
+        self._retry_engine = retry_policy.get_default_engine()
 
     def set_auth_delegator(self, auth_delegator):
         """Sets the AuthDelegator for the sample."""
@@ -51,7 +61,7 @@ class DialogflowSample:
 
     def set_agent_delegator(self, agent_delegator):
         """Sets the AgentDelegator for the sample."""
-        self._agent_delegator = agent_delegator
+        self._agent_delegator = self.register_delegator(agent_delegator)
 
     def set_session_delegator(self, session_delegator):
         """Sets the SessionDelegator for the sample."""
@@ -59,7 +69,21 @@ class DialogflowSample:
 
     def set_start_flow_delegator(self, start_flow_delegator):
         """Sets the AgentDelegator for the sample."""
-        self._start_flow_delegator = start_flow_delegator
+        self._start_flow_delegator = self.register_delegator(start_flow_delegator)
+
+    def set_lro_waiter(self, waiter):
+        """Sets the LroWaiter used for long-running operations of the sample."""
+        self._lro_waiter = waiter
+
+    def set_retry_engine(self, retry_engine):
+        """Sets the RetryEngine used for the API calls of the sample."""
+        self._retry_engine = retry_engine
+
+    def register_delegator(self, delegator):
+        """Adds a delegator to the resource graph of the sample."""
+        if delegator not in self._delegators:
+            self._delegators.append(delegator)
+        return delegator
 
     def set_credentials(self, credentials):
         """Sets the AgentDelegator for the sample."""
@@ -85,6 +109,21 @@ class DialogflowSample:
         """Accesses the start_flow_delegator for the sample."""
         return self._session_delegator
 
+    @property
+    def lro_waiter(self):
+        """Accesses the lro_waiter for the sample."""
+        return self._lro_waiter
+
+    @property
+    def retry_engine(self):
+        """Accesses the retry_engine for the sample."""
+        return self._retry_engine
+
+    @property
+    def delegators(self):
+        """Accesses the delegators in the resource graph of the sample."""
+        return list(self._delegators)
+
     @property
     def credentials(self):
         """Accesses the agent_delegator for the sample."""
@@ -114,19 +153,29 @@ class DialogflowSample:
     def test_cases_client(self):
         """Accesses the test_case_delegators for the sample."""
         if self._test_cases_client is None:
-            self._test_cases_client = cx.TestCasesClient(
-                client_options=self.client_options,
-                credentials=self.credentials,
+            self._test_cases_client = retry_policy.RetryingClient(
+                client_pool.get_client(
+                    cx.TestCasesClient,
+                    client_options=self.client_options,
+                    credentials=self.auth_delegator.credentials,
+                ),
+                self.retry_engine,
             )
         return self._test_cases_client
 
+    def setup_delegators(self, max_workers=None):
+        """Sets up the resource graph, creating independent resources concurrently."""
+        resource_graph.setup_graph(self.delegators, max_workers=max_workers)
+
+    def tear_down_delegators(self, max_workers=None):
+        """Tears down the resource graph in reverse topological order."""
+        resource_graph.tear_down_graph(self.delegators, max_workers=max_workers)
+
     def setup(self, wait=0):
         """Set up sample. Especially, train the start flow."""
         request = cx.TrainFlowRequest(name=self.start_flow_delegator.flow.name)
         lro = self.start_flow_delegator.client.train_flow(request=request)
-        time.time()
-        while lro.running():
-            time.sleep(0.1)
+        self.lro_waiter.wait(lro)
         time.sleep(wait)
 
     #  pylint: disable=too-many-arguments
@@ -167,30 +216,68 @@ class DialogflowSample:
                 print(f"    Ending Parameters: {parameters}")
                 print(f"    Ending Page: {current_page}")
 
+    #  pylint: disable=too-many-arguments
+    def run_load(
+        self,
+        user_text_list,
+        num_sessions,
+        max_workers=None,
+        qps=None,
+        ramp_up=0,
+        wait=1,
+        parameters=None,
+        current_page=None,
+        quiet=False,
+    ):
+        """Runs many concurrent conversations with this agent, reporting latency."""
+        time.sleep(wait)
+
+        # Build the client once, before the workers share it.
+        self.session_delegator.client  # pylint: disable=pointless-statement
+        report = load_driver.run_load(
+            self.session_delegator.detect_intent,
+            user_text_list,
+            num_sessions,
+            max_workers=max_workers,
+            qps=qps,
+            ramp_up=ramp_up,
+            parameters=parameters,
+            current_page=current_page,
+        )
+        if not quiet:
+            report.print_report()
+        return report
+
     def create_test_case(self, display_name, test_case_conversation_turns, flow=None):
         """Create a test case."""
         if flow is None:
             flow = self.start_flow
+        parent = self.agent_delegator.agent.name
+        index = display_name_index.get_default_index()
         try:
             test_case = self.test_cases_client.create_test_case(
-                parent=self.agent_delegator.agent.name,
+                parent=parent,
                 test_case=cx.TestCase(
                     display_name=display_name,
                     test_case_conversation_turns=test_case_conversation_turns,
                     test_config=cx.TestConfig(flow=flow),
                 ),
             )
+            index.add("testCases", parent, test_case)
         except google.api_core.exceptions.AlreadyExists:
-            request = cx.ListTestCasesRequest(parent=self.agent_delegator.agent.name)
-            for curr_test_case in self.test_cases_client.list_test_cases(
-                request=request
-            ):
-                if curr_test_case.display_name == display_name:
-                    request = cx.GetTestCaseRequest(
-                        name=curr_test_case.name,
-                    )
-                    test_case = self.test_cases_client.get_test_case(request=request)
-                    break
+            name = index.lookup(
+                "testCases",
+                parent,
+                display_name,
+                lambda: self.test_cases_client.list_test_cases(
+                    request=cx.ListTestCasesRequest(parent=parent)
+                ),
+            )
+            if not name:
+                raise
+            test_case = self.test_cases_client.get_test_case(
+                request=cx.GetTestCaseRequest(name=name)
+            )
         return test_case
 
     def run_test_case(self, test_case, expected_session_parameters):
@@ -198,26 +285,15 @@ class DialogflowSample:
         lro = self.test_cases_client.run_test_case(
             request=cx.RunTestCaseRequest(name=test_case.name)
         )
-        while lro.running():
-            time.sleep(0.1)
-        result = lro.result().result
-        agent_response_differences = [
-            conversation_turn.virtual_agent_output.differences
-            for conversation_turn in result.conversation_turns
-        ]
+        result = self.lro_waiter.wait(lro).result
+        agent_response_differences = batch_test_runner.get_agent_response_differences(
+            result
+        )
 
         if any(agent_response_differences):
             raise UnexpectedResponseFailure(agent_response_differences)
 
-        final_session_parameters = []
-        for conversation_turn in result.conversation_turns:
-            if conversation_turn.virtual_agent_output.session_parameters:
-                final_session_parameters.append(
-                    dict(conversation_turn.virtual_agent_output.session_parameters)
-                )
-            else:
-                final_session_parameters.append({})
-
+        final_session_parameters = batch_test_runner.get_session_parameters(result)
         if expected_session_parameters != final_session_parameters:
             raise SessionParametersFailure(
                 f"{expected_session_parameters!r} != {final_session_parameters!r}"
@@ -225,3 +301,34 @@ class DialogflowSample:
 
         if result.test_result != cx.TestResult.PASSED:
             raise TestCaseFailure
+
+    #  pylint: disable=too-many-arguments
+    def run_test_cases(
+        self,
+        test_cases,
+        expected_session_parameters=None,
+        batch=False,
+        max_concurrent=8,
+        callback=None,
+    ):
+        """Runs many test cases together, returning a BatchTestReport.
+
+        With batch=True the test cases run in one BatchRunTestCases operation;
+        otherwise at most max_concurrent RunTestCase operations are in flight
+        and callback is called with each outcome as soon as it finishes.
+        expected_session_parameters maps test case names to the expected
+        session parameters of each turn.
+        """
+        runner = batch_test_runner.BatchTestRunner(
+            self.test_cases_client, self.lro_waiter, max_concurrent=max_concurrent
+        )
+        if batch:
+            return runner.run_batch(
+                self.agent_delegator.agent.name,
+                test_cases,
+                expected_session_parameters,
+                callback=callback,
+            )
+        return runner.run_concurrent(
+            test_cases, expected_session_parameters, callback=callback
+        )
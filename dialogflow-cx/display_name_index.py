@@ -0,0 +1,93 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Process-wide cache mapping display names to Dialogflow resource names."""
+
+import threading
+
+
+class DisplayNameIndex:
+    """Maps (kind, parent, display_name) to resource names.
+
+    The index of a parent is built with a single pass over its list method,
+    then kept up to date as delegators create and delete resources, so
+    repeated lookups cost no API calls.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self._built = set()
+        self._lock = threading.Lock()
+
+    def is_built(self, kind, parent):
+        """Checks if the index for kind under parent has been built."""
+        return (kind, parent) in self._built
+
+    def get(self, kind, parent, display_name):
+        """Returns the cached resource name, without calling the API."""
+        with self._lock:
+            return self._indexes.get((kind, parent), {}).get(display_name)
+
+    def build(self, kind, parent, resources):
+        """Indexes all the resources listed under parent."""
+        index = {resource.display_name: resource.name for resource in resources}
+        with self._lock:
+            self._indexes[(kind, parent)] = index
+            self._built.add((kind, parent))
+
+    async def async_build(self, kind, parent, resources):
+        """Indexes all the resources listed under parent by an async pager."""
+        index = {}
+        async for resource in resources:
+            index[resource.display_name] = resource.name
+        with self._lock:
+            self._indexes[(kind, parent)] = index
+            self._built.add((kind, parent))
+
+    def lookup(self, kind, parent, display_name, list_resources):
+        """Returns the resource name, building the index with list_resources()."""
+        if not self.is_built(kind, parent):
+            self.build(kind, parent, list_resources())
+        return self.get(kind, parent, display_name)
+
+    def add(self, kind, parent, resource):
+        """Records a created resource."""
+        with self._lock:
+            self._indexes.setdefault((kind, parent), {})[
+                resource.display_name
+            ] = resource.name
+
+    def remove(self, kind, parent, name):
+        """Forgets a deleted resource."""
+        with self._lock:
+            index = self._indexes.get((kind, parent), {})
+            for display_name, curr_name in list(index.items()):
+                if curr_name == name:
+                    del index[display_name]
+
+    def invalidate(self, kind=None, parent=None):
+        """Drops the indexes matching kind and parent (all of them by default)."""
+        with self._lock:
+            for curr_kind, curr_parent in list(self._indexes):
+                if kind in (None, curr_kind) and parent in (None, curr_parent):
+                    del self._indexes[(curr_kind, curr_parent)]
+                    self._built.discard((curr_kind, curr_parent))
+
+
+_DEFAULT_INDEX = DisplayNameIndex()
+
+
+def get_default_index():
+    """Accesses the process-wide display name index."""
+    return _DEFAULT_INDEX
@@ -0,0 +1,158 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Concurrent multi-session conversation load driver for Dialogflow CX agents."""
+
+import concurrent.futures
+import dataclasses
+import math
+import threading
+import time
+import uuid
+from typing import Dict, List
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of values; None if the list is empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Pacer:
+    """Spaces calls evenly so that all threads together stay under a target QPS."""
+
+    def __init__(self, qps=None):
+        self.interval = 1.0 / qps if qps else 0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Blocks until the next call slot is available."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        time.sleep(max(slot - now, 0))
+
+
+@dataclasses.dataclass
+class TurnStats:
+    """Latencies and errors collected for one turn index across sessions."""
+
+    latencies: List[float] = dataclasses.field(default_factory=list)
+    errors: int = 0
+
+    def summary(self):
+        """Summarizes the latency percentiles (seconds) and error count."""
+        return {
+            "count": len(self.latencies),
+            "errors": self.errors,
+            "p50": percentile(self.latencies, 0.50),
+            "p95": percentile(self.latencies, 0.95),
+            "p99": percentile(self.latencies, 0.99),
+        }
+
+
+@dataclasses.dataclass
+class LoadReport:
+    """Per-turn statistics of a load run."""
+
+    turns: Dict[int, TurnStats] = dataclasses.field(default_factory=dict)
+    duration: float = 0
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def record(self, turn_index, latency=None, error=False):
+        """Records the outcome of a single detect_intent call."""
+        with self._lock:
+            stats = self.turns.setdefault(turn_index, TurnStats())
+            if error:
+                stats.errors += 1
+            else:
+                stats.latencies.append(latency)
+
+    def summary(self):
+        """Summarizes every turn index of the load run."""
+        return {index: stats.summary() for index, stats in sorted(self.turns.items())}
+
+    def print_report(self):
+        """Prints the per-turn summary."""
+        print(f"Load run duration: {self.duration:.2f}s")
+        for index, summary in self.summary().items():
+            latencies = " ".join(
+                f"{key}={summary[key] * 1000:.1f}ms"
+                for key in ["p50", "p95", "p99"]
+                if summary[key] is not None
+            )
+            print(
+                f"  Turn {index}: count={summary['count']} "
+                f"errors={summary['errors']} {latencies}"
+            )
+
+
+#  pylint: disable=too-many-arguments
+def run_load(
+    detect_intent,
+    user_text_list,
+    num_sessions,
+    max_workers=None,
+    qps=None,
+    ramp_up=0,
+    parameters=None,
+    current_page=None,
+):
+    """Runs num_sessions independent conversations concurrently.
+
+    Each session sends user_text_list turn by turn, carrying the parameters
+    and current page forward. At most max_workers sessions are in flight,
+    calls are paced to qps across all sessions, and session starts are spread
+    evenly over ramp_up seconds. A failed turn ends its session.
+    """
+    report = LoadReport()
+    pacer = Pacer(qps)
+    if max_workers is None:
+        max_workers = min(num_sessions, 32)
+    start_time = time.monotonic()
+
+    def run_session(session_index):
+        start_delay = start_time + ramp_up * session_index / num_sessions
+        time.sleep(max(start_delay - time.monotonic(), 0))
+        session_id = str(uuid.uuid1())
+        session_parameters = dict(parameters or {})
+        session_page = current_page
+        for turn_index, text in enumerate(user_text_list):
+            pacer.wait()
+            call_start = time.monotonic()
+            try:
+                _, session_page, session_parameters = detect_intent(
+                    text,
+                    parameters=session_parameters,
+                    current_page=session_page,
+                    session_id=session_id,
+                )
+            except Exception:  # pylint: disable=broad-except
+                report.record(turn_index, error=True)
+                return
+            report.record(turn_index, latency=time.monotonic() - call_start)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(run_session, range(num_sessions)))
+    report.duration = time.monotonic() - start_time
+    return report
@@ -0,0 +1,159 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Waits on Dialogflow long-running operations with exponential backoff."""
+
+import asyncio
+import collections
+import concurrent.futures
+import random
+import time
+
+
+def backoff_delays(initial_delay=0.1, max_delay=10.0, multiplier=2.0, jitter=0.5):
+    """Yields exponentially growing delays, randomized by +/- jitter (a fraction)."""
+    delay = initial_delay
+    while True:
+        yield min(delay * (1 + jitter * random.uniform(-1, 1)), max_delay)
+        delay = min(delay * multiplier, max_delay)
+
+
+class LroWaiter:
+    """Polls long-running operations with exponential backoff and jitter.
+
+    Operations are polled through done(), which refreshes the operation from
+    the API, so fast operations complete quickly and slow ones are not polled
+    at a fixed high rate.
+    """
+
+    #  pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        initial_delay=0.1,
+        max_delay=10.0,
+        multiplier=2.0,
+        jitter=0.5,
+        timeout=None,
+        max_workers=8,
+        sleep=time.sleep,
+    ):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._sleep = sleep
+        self._executor = None
+
+    def delays(self):
+        """Yields the polling delays of this waiter.
+
+        Once a finite iterator is exhausted, operations are polled every
+        max_delay seconds.
+        """
+        return backoff_delays(
+            initial_delay=self.initial_delay,
+            max_delay=self.max_delay,
+            multiplier=self.multiplier,
+            jitter=self.jitter,
+        )
+
+    def as_completed(self, lros):
+        """Yields (index, lro) for each operation, in the order they complete."""
+        pending = dict(enumerate(lros))
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        delays = self.delays()
+        while pending:
+            for index, lro in list(pending.items()):
+                if lro.done():
+                    del pending[index]
+                    yield index, lro
+            if not pending:
+                return
+            delay = next(delays, self.max_delay)
+            if deadline is not None:
+                if time.monotonic() + delay > deadline:
+                    raise TimeoutError(
+                        f"{len(pending)} operations still running after {self.timeout}s"
+                    )
+            self._sleep(delay)
+
+    def as_completed_bounded(self, starters, max_in_flight):
+        """Yields (index, lro) as operations complete, starting them lazily.
+
+        starters are zero-argument callables that each start an operation; at
+        most max_in_flight of them are running at any time. The polling
+        backoff restarts whenever an operation completes.
+        """
+        queue = collections.deque(enumerate(starters))
+        in_flight = {}
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        delays = self.delays()
+        while queue or in_flight:
+            while queue and len(in_flight) < max_in_flight:
+                index, start = queue.popleft()
+                in_flight[index] = start()
+            completed = [index for index, lro in in_flight.items() if lro.done()]
+            for index in completed:
+                yield index, in_flight.pop(index)
+            if completed:
+                delays = self.delays()
+                continue
+            delay = next(delays, self.max_delay)
+            if deadline is not None and time.monotonic() + delay > deadline:
+                raise TimeoutError(
+                    f"{len(in_flight) + len(queue)} operations not done "
+                    f"after {self.timeout}s"
+                )
+            self._sleep(delay)
+
+    def wait(self, lro):
+        """Waits for an operation to complete and returns its result."""
+        for _, done_lro in self.as_completed([lro]):
+            return done_lro.result()
+        return None  # pragma: no cover
+
+    def wait_all(self, lros):
+        """Waits for all operations together and returns their results, in order."""
+        lros = list(lros)
+        results = [None] * len(lros)
+        for index, lro in self.as_completed(lros):
+            results[index] = lro.result()
+        return results
+
+    def submit(self, lro):
+        """Waits for an operation in the background, returning a Future."""
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers
+            )
+        return self._executor.submit(self.wait, lro)
+
+    def add_done_callback(self, lro, callback):
+        """Calls callback(lro) once the operation completes."""
+        future = self.submit(lro)
+        future.add_done_callback(lambda _: callback(lro))
+        return future
+
+    async def async_wait(self, lro):
+        """Waits for an operation of an async client and returns its result."""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        delays = self.delays()
+        while not await lro.done():
+            delay = next(delays, self.max_delay)
+            if deadline is not None and time.monotonic() + delay > deadline:
+                raise TimeoutError(f"Operation still running after {self.timeout}s")
+            await asyncio.sleep(delay)
+        return await lro.result()
@@ -0,0 +1,163 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Client-side token bucket rate limiting for Dialogflow quotas."""
+
+import asyncio
+import collections
+import threading
+import time
+
+# Matches the conservative DetectIntent rate used by the NLU evaluation notebook.
+DEFAULT_QPS = 10
+
+
+class TokenBucket:
+    """Thread- and async-safe token bucket.
+
+    Tokens refill continuously at rate per second, up to burst. A caller that
+    finds the bucket empty reserves the next free slot and sleeps until then,
+    so concurrent callers are spread 1/rate apart instead of all waking up at
+    the start of the next period.
+    """
+
+    #  pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        rate,
+        burst=None,
+        window=1.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.burst = max(rate, 1) if burst is None else burst
+        self.window = window
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._granted = collections.deque()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self._tokens + (now - self._updated) * self.rate, self.burst)
+        self._updated = now
+
+    def _grant(self, now, at, tokens):
+        """Records tokens granted at a time, forgetting grants out of the window."""
+        while self._granted and self._granted[0][0] <= now - self.window:
+            self._granted.popleft()
+        self._granted.append((at, tokens))
+
+    def _reserve(self, tokens):
+        """Takes tokens, going into debt if needed; returns the time to wait."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= tokens
+            delay = max(-self._tokens / self.rate, 0)
+            self._grant(now, now + delay, tokens)
+            return delay
+
+    def try_acquire(self, tokens=1):
+        """Takes tokens without waiting; returns False if there are not enough."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            self._grant(now, now, tokens)
+            return True
+
+    def acquire(self, tokens=1):
+        """Blocks until tokens are available; returns the time waited."""
+        delay = self._reserve(tokens)
+        if delay:
+            self._sleep(delay)
+        return delay
+
+    async def async_acquire(self, tokens=1):
+        """Awaits until tokens are available; returns the time waited."""
+        delay = self._reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+    @property
+    def tokens(self):
+        """Tokens currently available; negative while callers are queued."""
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens
+
+    @property
+    def observed_rate(self):
+        """Tokens granted per second over the last window."""
+        with self._lock:
+            now = self._clock()
+            while self._granted and self._granted[0][0] <= now - self.window:
+                self._granted.popleft()
+            granted = sum(tokens for at, tokens in self._granted if at <= now)
+            return granted / self.window
+
+    @property
+    def utilization(self):
+        """Fraction of the configured rate used over the last window."""
+        return self.observed_rate / self.rate
+
+
+class RateLimiterRegistry:
+    """Shares one TokenBucket per project and location quota."""
+
+    def __init__(self):
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def configure(self, project_id, location, qps=DEFAULT_QPS, burst=None):
+        """Sets the quota of a project and location; returns its limiter."""
+        limiter = TokenBucket(qps, burst=burst)
+        with self._lock:
+            self._limiters[(project_id, location)] = limiter
+        return limiter
+
+    def find(self, project_id, location):
+        """Returns the limiter of a project and location, if one is configured."""
+        with self._lock:
+            return self._limiters.get((project_id, location))
+
+    def get(self, project_id, location, qps=DEFAULT_QPS, burst=None):
+        """Returns the limiter of a project and location, configuring it if needed."""
+        with self._lock:
+            key = (project_id, location)
+            if key not in self._limiters:
+                self._limiters[key] = TokenBucket(qps, burst=burst)
+            return self._limiters[key]
+
+    def utilization(self):
+        """Utilization of every configured limiter."""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {key: limiter.utilization for key, limiter in limiters.items()}
+
+
+_DEFAULT_REGISTRY = RateLimiterRegistry()
+
+
+def get_default_registry():
+    """Accesses the process-wide rate limiter registry."""
+    return _DEFAULT_REGISTRY
@@ -0,0 +1,143 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Scheduler for setting up and tearing down a graph of delegators concurrently."""
+
+import asyncio
+import concurrent.futures
+
+
+class ResourceGraphCycleError(ValueError):
+    """Exception to raise when the delegator dependencies contain a cycle."""
+
+
+def get_dependency_map(delegators):
+    """Maps each delegator to the delegators it depends on, within the graph."""
+    nodes = list(dict.fromkeys(delegators))
+    node_set = set(nodes)
+    return {
+        node: [dep for dep in node.dependencies if dep in node_set and dep is not node]
+        for node in nodes
+    }
+
+
+def get_dependent_map(dependency_map):
+    """Inverts a dependency map: maps each delegator to those depending on it."""
+    dependent_map = {node: [] for node in dependency_map}
+    for node, dependencies in dependency_map.items():
+        for dependency in dependencies:
+            dependent_map[dependency].append(node)
+    return dependent_map
+
+
+def topological_levels(dependency_map):
+    """Groups delegators in levels; every level only depends on previous ones."""
+    remaining = {node: len(deps) for node, deps in dependency_map.items()}
+    dependent_map = get_dependent_map(dependency_map)
+    levels = []
+    current = [node for node, count in remaining.items() if count == 0]
+    while current:
+        levels.append(current)
+        next_level = []
+        for node in current:
+            del remaining[node]
+            for dependent in dependent_map[node]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    next_level.append(dependent)
+        current = next_level
+    if remaining:
+        raise ResourceGraphCycleError(
+            f"Dependency cycle between: {[type(node).__name__ for node in remaining]}"
+        )
+    return levels
+
+
+def run_graph(blocking_map, action, max_workers=None):
+    """Runs action on every node once all the nodes blocking it have finished.
+
+    Independent nodes run concurrently, so the wall-clock time is proportional
+    to the depth of the graph instead of the number of nodes. The first
+    exception raised by an action stops the scheduling of new nodes and is
+    re-raised once the in-flight actions have finished.
+    """
+    topological_levels(blocking_map)
+    remaining = {node: len(blockers) for node, blockers in blocking_map.items()}
+    unblocks = get_dependent_map(blocking_map)
+    if max_workers is None:
+        max_workers = max(len(blocking_map), 1)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {
+            executor.submit(action, node): node
+            for node, count in remaining.items()
+            if count == 0
+        }
+        error = None
+        while in_flight:
+            done, _ = concurrent.futures.wait(
+                in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                node = in_flight.pop(future)
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                if error:
+                    continue
+                for unblocked in unblocks[node]:
+                    remaining[unblocked] -= 1
+                    if remaining[unblocked] == 0:
+                        in_flight[executor.submit(action, unblocked)] = unblocked
+        if error:
+            raise error
+
+
+def setup_graph(delegators, max_workers=None):
+    """Sets up delegators, each one after all of its dependencies."""
+    run_graph(
+        get_dependency_map(delegators),
+        lambda delegator: delegator.setup(),
+        max_workers=max_workers,
+    )
+
+
+def tear_down_graph(delegators, max_workers=None):
+    """Tears down delegators in reverse topological order."""
+    run_graph(
+        get_dependent_map(get_dependency_map(delegators)),
+        lambda delegator: delegator.tear_down(),
+        max_workers=max_workers,
+    )
+
+
+async def async_run_graph(blocking_map, action):
+    """Awaits action on every node once all the nodes blocking it have finished."""
+    for level in topological_levels(blocking_map):
+        await asyncio.gather(*(action(node) for node in level))
+
+
+async def async_setup_graph(delegators):
+    """Sets up async delegators, each one after all of its dependencies."""
+    await async_run_graph(
+        get_dependency_map(delegators), lambda delegator: delegator.setup()
+    )
+
+
+async def async_tear_down_graph(delegators):
+    """Tears down async delegators in reverse topological order."""
+    await async_run_graph(
+        get_dependent_map(get_dependency_map(delegators)),
+        lambda delegator: delegator.tear_down(),
+    )
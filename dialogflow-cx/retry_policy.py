@@ -0,0 +1,282 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Retry policies, budgets and accounting for Dialogflow API calls."""
+
+import asyncio
+import collections
+import dataclasses
+import functools
+import threading
+import time
+from typing import Callable, Optional
+
+import google.api_core.exceptions
+from lro_waiter import backoff_delays
+from utilities import is_nlu_model_not_found
+
+
+@dataclasses.dataclass(frozen=True)
+class RetryPolicy:
+    """How to retry one class of errors."""
+
+    max_attempts: int = 5
+    initial_delay: float = 0.5
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 0.5
+    predicate: Optional[Callable[[Exception], bool]] = None
+
+    def applies_to(self, exc):
+        """Checks if the policy retries this particular exception."""
+        return self.predicate is None or self.predicate(exc)
+
+    def delays(self):
+        """Yields the backoff delays of this policy."""
+        return backoff_delays(
+            initial_delay=self.initial_delay,
+            max_delay=self.max_delay,
+            multiplier=self.multiplier,
+            jitter=self.jitter,
+        )
+
+
+DEFAULT_POLICIES = {
+    google.api_core.exceptions.ServiceUnavailable: RetryPolicy(),
+    google.api_core.exceptions.DeadlineExceeded: RetryPolicy(max_attempts=3),
+    google.api_core.exceptions.InternalServerError: RetryPolicy(max_attempts=3),
+    google.api_core.exceptions.Aborted: RetryPolicy(max_attempts=3),
+    google.api_core.exceptions.ResourceExhausted: RetryPolicy(
+        max_attempts=6, initial_delay=2.0, max_delay=60.0
+    ),
+    # Raised by detect_intent and run_test_case while the flow is still training.
+    google.api_core.exceptions.NotFound: RetryPolicy(
+        max_attempts=4, initial_delay=1.0, predicate=is_nlu_model_not_found
+    ),
+}
+
+
+class RetryBudget:
+    """Token bucket that caps retries to a fraction of successful calls.
+
+    Each retry spends one token and each success earns token_ratio tokens, so
+    a sustained outage stops retrying instead of multiplying the load.
+    """
+
+    def __init__(self, max_tokens=100.0, token_ratio=0.1):
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        """Tokens currently available for retries."""
+        return self._tokens
+
+    def try_spend(self):
+        """Spends a token for a retry; returns False if the budget is exhausted."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def record_success(self):
+        """Earns back a fraction of a token."""
+        with self._lock:
+            self._tokens = min(self._tokens + self.token_ratio, self.max_tokens)
+
+
+class RetryEngine:
+    """Calls API methods, retrying errors according to per-class policies."""
+
+    #  pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        policies=None,
+        deadline=None,
+        budget=None,
+        sleep=time.sleep,
+        clock=time.monotonic,
+    ):
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.deadline = deadline
+        self.budget = RetryBudget() if budget is None else budget
+        self.retry_counts = collections.Counter()
+        self.failure_counts = collections.Counter()
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def get_policy(self, exc):
+        """Finds the policy of the most specific error class of exc, if any."""
+        for exc_class in type(exc).__mro__:
+            policy = self.policies.get(exc_class)
+            if policy is not None:
+                return policy if policy.applies_to(exc) else None
+        return None
+
+    def _next_delay(self, exc, attempt, delays, deadline, call_site):
+        """Returns the delay before the next attempt, or None to give up."""
+        policy = self.get_policy(exc)
+        if policy is None or attempt >= policy.max_attempts:
+            return None
+        if call_site not in delays:
+            delays[call_site] = policy.delays()
+        delay = next(delays[call_site])
+        if deadline is not None and self._clock() + delay > deadline:
+            return None
+        if not self.budget.try_spend():
+            return None
+        with self._lock:
+            self.retry_counts[call_site] += 1
+        return delay
+
+    def _give_up(self, call_site):
+        with self._lock:
+            self.failure_counts[call_site] += 1
+
+    def call(
+        self,
+        method,
+        *args,
+        call_site=None,
+        deadline=None,
+        before_attempt=None,
+        **kwargs,
+    ):
+        """Calls method, retrying according to the policies.
+
+        before_attempt, if given, is called before every attempt, e.g. to take
+        a rate limiter token for each retry as well as for the first call.
+        """
+        call_site = call_site or getattr(method, "__qualname__", repr(method))
+        deadline = self._get_deadline(deadline)
+        delays = {}
+        attempt = 1
+        while True:
+            if before_attempt is not None:
+                before_attempt()
+            try:
+                result = method(*args, **kwargs)
+            except Exception as exc:  # pylint: disable=broad-except
+                delay = self._next_delay(exc, attempt, delays, deadline, call_site)
+                if delay is None:
+                    self._give_up(call_site)
+                    raise
+                self._sleep(delay)
+                attempt += 1
+                continue
+            self.budget.record_success()
+            return result
+
+    async def async_call(
+        self,
+        method,
+        *args,
+        call_site=None,
+        deadline=None,
+        before_attempt=None,
+        **kwargs,
+    ):
+        """Awaits method, retrying according to the policies.
+
+        before_attempt, if given, is awaited before every attempt.
+        """
+        call_site = call_site or getattr(method, "__qualname__", repr(method))
+        deadline = self._get_deadline(deadline)
+        delays = {}
+        attempt = 1
+        while True:
+            if before_attempt is not None:
+                await before_attempt()
+            try:
+                result = await method(*args, **kwargs)
+            except Exception as exc:  # pylint: disable=broad-except
+                delay = self._next_delay(exc, attempt, delays, deadline, call_site)
+                if delay is None:
+                    self._give_up(call_site)
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.budget.record_success()
+            return result
+
+    def _get_deadline(self, deadline):
+        timeout = self.deadline if deadline is None else deadline
+        return None if timeout is None else self._clock() + timeout
+
+    def stats(self):
+        """Retries consumed and calls failed after retrying, per call site."""
+        with self._lock:
+            return {
+                "retries": dict(self.retry_counts),
+                "failures": dict(self.failure_counts),
+                "budget_tokens": self.budget.tokens,
+            }
+
+
+class RetryingClient:
+    """Wraps an API client so every method call goes through a RetryEngine.
+
+    hooks maps method names to a before_attempt callable for the engine.
+    """
+
+    def __init__(self, client, engine, hooks=None):
+        self._client = client
+        self._engine = engine
+        self._hooks = hooks or {}
+        self._client_name = type(client).__name__
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        call_site = f"{self._client_name}.{name}"
+        before_attempt = self._hooks.get(name)
+        if asyncio.iscoroutinefunction(attr):
+
+            @functools.wraps(attr)
+            async def async_method(*args, **kwargs):
+                return await self._engine.async_call(
+                    attr,
+                    *args,
+                    call_site=call_site,
+                    before_attempt=before_attempt,
+                    **kwargs,
+                )
+
+            return async_method
+
+        @functools.wraps(attr)
+        def method(*args, **kwargs):
+            return self._engine.call(
+                attr,
+                *args,
+                call_site=call_site,
+                before_attempt=before_attempt,
+                **kwargs,
+            )
+
+        return method
+
+
+_DEFAULT_ENGINE = RetryEngine()
+
+
+def get_default_engine():
+    """Accesses the process-wide retry engine."""
+    return _DEFAULT_ENGINE
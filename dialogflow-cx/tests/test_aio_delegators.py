@@ -0,0 +1,194 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Hermetic tests for the asyncio delegators."""
+
+import asyncio
+
+import client_pool
+import display_name_index
+import google.api_core.exceptions
+import google.cloud.dialogflowcx as cx
+import mock
+import pytest
+import retry_policy
+from delegators import aio
+
+
+@pytest.fixture(autouse=True)
+def empty_display_name_index():
+    """Forgets the resources indexed by the other tests."""
+    display_name_index.get_default_index().invalidate()
+
+
+async def async_pager(items):
+    """Mocks the async pager returned by list methods of the async clients."""
+    for item in items:
+        yield item
+
+
+def get_controller():
+    """Mocks the DialogflowSample controller of the delegators."""
+    controller = mock.MagicMock()
+    controller.project_id = "MOCK_PROJECT_ID"
+    controller.location = "global"
+    return controller
+
+
+@pytest.mark.hermetic
+def test_agent_delegator_setup_tear_down():
+    """Creates and deletes an agent through the async client."""
+    client = mock.AsyncMock()
+    client.create_agent.return_value = cx.Agent(name="MOCK_AGENT_NAME")
+    delegator = aio.AgentDelegator(
+        get_controller(), client=client, display_name="MOCK_DISPLAY_NAME"
+    )
+
+    asyncio.run(delegator.setup())
+    assert delegator.agent.name == "MOCK_AGENT_NAME"
+
+    asyncio.run(delegator.tear_down())
+    client.delete_agent.assert_awaited_once()
+
+
+@pytest.mark.hermetic
+def test_agent_delegator_client_per_loop():
+    """Pooled clients are fetched again when the delegator runs on a new loop."""
+    clients = []
+
+    def get_client(*args, **kwargs):  # pylint: disable=unused-argument
+        client = mock.AsyncMock()
+        client.create_agent.return_value = cx.Agent(name="MOCK_AGENT_NAME")
+        clients.append(client)
+        return client
+
+    delegator = aio.AgentDelegator(get_controller(), display_name="MOCK_DISPLAY_NAME")
+    with mock.patch.object(
+        client_pool, "get_client", side_effect=get_client
+    ), mock.patch.object(
+        retry_policy,
+        "RetryingClient",
+        side_effect=lambda client, engine, hooks: client,
+    ):
+        asyncio.run(delegator.setup())
+        asyncio.run(delegator.tear_down())
+    assert len(clients) == 2
+    clients[0].create_agent.assert_awaited_once()
+    clients[1].delete_agent.assert_awaited_once()
+
+
+@pytest.mark.hermetic
+def test_agent_delegator_already_exists():
+    """Falls back to the existing agent with the same display name."""
+    client = mock.AsyncMock()
+    client.create_agent.side_effect = google.api_core.exceptions.AlreadyExists("")
+    client.list_agents.return_value = async_pager(
+        [
+            cx.Agent(name="OTHER_AGENT_NAME", display_name="OTHER"),
+            cx.Agent(name="MOCK_AGENT_NAME", display_name="MOCK_DISPLAY_NAME"),
+        ]
+    )
+    client.get_agent.side_effect = lambda request: cx.Agent(name=request.name)
+    delegator = aio.AgentDelegator(
+        get_controller(), client=client, display_name="MOCK_DISPLAY_NAME"
+    )
+
+    asyncio.run(delegator.setup())
+    assert delegator.agent.name == "MOCK_AGENT_NAME"
+
+
+@pytest.mark.hermetic
+def test_agent_delegator_already_exists_not_found():
+    """Re-raises AlreadyExists if no agent has the display name."""
+    client = mock.AsyncMock()
+    client.create_agent.side_effect = google.api_core.exceptions.AlreadyExists("")
+    client.list_agents.return_value = async_pager(
+        [cx.Agent(name="OTHER_AGENT_NAME", display_name="OTHER")]
+    )
+    delegator = aio.AgentDelegator(
+        get_controller(), client=client, display_name="MOCK_DISPLAY_NAME"
+    )
+
+    with pytest.raises(google.api_core.exceptions.AlreadyExists):
+        asyncio.run(delegator.setup())
+    client.get_agent.assert_not_awaited()
+
+
+@pytest.mark.hermetic
+def test_sessions_delegator_detect_intent():
+    """Runs detect_intent through the async client."""
+    client = mock.AsyncMock()
+    client.detect_intent.return_value = cx.DetectIntentResponse(
+        query_result=cx.QueryResult(
+            response_messages=[
+                cx.ResponseMessage(text=cx.ResponseMessage.Text(text=["MOCK_TEXT"]))
+            ],
+            current_page=cx.Page(name="MOCK_PAGE_NAME"),
+        )
+    )
+    controller = get_controller()
+    controller.agent_delegator.agent.name = "MOCK_AGENT_NAME"
+    delegator = aio.SessionsDelegator(controller, client=client)
+
+    responses, current_page, parameters = asyncio.run(
+        delegator.detect_intent("MOCK_USER_INPUT", current_page="MOCK_PAGE_NAME")
+    )
+    assert responses == ["MOCK_TEXT"]
+    assert current_page == "MOCK_PAGE_NAME"
+    assert not parameters
+
+
+@pytest.mark.hermetic
+def test_sessions_delegator_rate_limiter():
+    """Acquires a token from the rate limiter before each detect_intent."""
+    client = mock.AsyncMock()
+    client.detect_intent.return_value = cx.DetectIntentResponse()
+    limiter = mock.AsyncMock()
+    controller = get_controller()
+    controller.agent_delegator.agent.name = "MOCK_AGENT_NAME"
+    delegator = aio.SessionsDelegator(controller, client=client, rate_limiter=limiter)
+
+    asyncio.run(
+        delegator.detect_intent("MOCK_USER_INPUT", current_page="MOCK_PAGE_NAME")
+    )
+    limiter.async_acquire.assert_awaited_once()
+    client.detect_intent.assert_awaited_once()
+
+
+@pytest.mark.hermetic
+def test_sessions_delegator_rate_limiter_retries():
+    """Takes a token from the rate limiter for every retried detect_intent."""
+    client = mock.AsyncMock()
+    client.detect_intent.side_effect = [
+        google.api_core.exceptions.ResourceExhausted("MOCK"),
+        cx.DetectIntentResponse(),
+    ]
+    limiter = mock.AsyncMock()
+    controller = get_controller()
+    controller.agent_delegator.agent.name = "MOCK_AGENT_NAME"
+    controller.retry_engine = retry_policy.RetryEngine(
+        policies={
+            google.api_core.exceptions.ResourceExhausted: retry_policy.RetryPolicy(
+                initial_delay=0
+            )
+        }
+    )
+    delegator = aio.SessionsDelegator(controller, rate_limiter=limiter)
+
+    with mock.patch.object(client_pool, "get_client", return_value=client):
+        asyncio.run(
+            delegator.detect_intent("MOCK_USER_INPUT", current_page="MOCK_PAGE_NAME")
+        )
+    assert limiter.async_acquire.await_count == 2
+    assert client.detect_intent.await_count == 2
@@ -0,0 +1,124 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for running many test cases together."""
+
+import batch_test_runner
+import google.cloud.dialogflowcx as cx
+import lro_waiter
+import mock
+import pytest
+
+
+def get_result(name, test_result=cx.TestResult.PASSED, differences=(), params=None):
+    """Builds a single-turn TestCaseResult."""
+    virtual_agent_output = cx.ConversationTurn.VirtualAgentOutput(
+        differences=list(differences)
+    )
+    if params:
+        virtual_agent_output.session_parameters = params
+    return cx.TestCaseResult(
+        name=f"{name}/results/MOCK_RESULT_ID",
+        test_result=test_result,
+        conversation_turns=[
+            cx.ConversationTurn(virtual_agent_output=virtual_agent_output)
+        ],
+    )
+
+
+def get_lro(result):
+    """Mocks an operation that is already done."""
+    lro = mock.Mock()
+    lro.done.return_value = True
+    lro.result.return_value = result
+    return lro
+
+
+TEST_CASES = [
+    cx.TestCase(name="MOCK_AGENT/testCases/PASS", display_name="pass"),
+    cx.TestCase(name="MOCK_AGENT/testCases/DIFF", display_name="diff"),
+    cx.TestCase(name="MOCK_AGENT/testCases/PARAMS", display_name="params"),
+]
+
+RESULTS = {
+    "MOCK_AGENT/testCases/PASS": get_result("MOCK_AGENT/testCases/PASS"),
+    "MOCK_AGENT/testCases/DIFF": get_result(
+        "MOCK_AGENT/testCases/DIFF",
+        test_result=cx.TestResult.FAILED,
+        differences=[cx.TestRunDifference(description="XFAIL")],
+    ),
+    "MOCK_AGENT/testCases/PARAMS": get_result(
+        "MOCK_AGENT/testCases/PARAMS", params={"key": "MOCK_VAL"}
+    ),
+}
+
+EXPECTED_SESSION_PARAMETERS = {"MOCK_AGENT/testCases/PARAMS": [{"key": "OTHER"}]}
+
+
+def assert_report(report):
+    """Checks the aggregated outcomes of TEST_CASES."""
+    assert {outcome.display_name for outcome in report.passed} == {"pass"}
+    assert report.summary() == {
+        "total": 3,
+        "passed": 1,
+        "failed": 2,
+        "errors": 0,
+        "differences": 1,
+        "session_parameters_mismatches": 1,
+    }
+
+
+@pytest.mark.hermetic
+def test_run_concurrent():
+    """Runs test cases as concurrent RunTestCase operations."""
+    client = mock.Mock()
+    client.run_test_case.side_effect = lambda request: get_lro(
+        cx.RunTestCaseResponse(result=RESULTS[request.name])
+    )
+    runner = batch_test_runner.BatchTestRunner(
+        client, lro_waiter.LroWaiter(), max_concurrent=2
+    )
+    outcomes = []
+    report = runner.run_concurrent(
+        TEST_CASES, EXPECTED_SESSION_PARAMETERS, callback=outcomes.append
+    )
+    assert outcomes == report.outcomes
+    assert_report(report)
+
+
+@pytest.mark.hermetic
+def test_run_concurrent_error():
+    """Operation errors are reported as failed outcomes."""
+    lro = mock.Mock()
+    lro.done.return_value = True
+    lro.result.side_effect = RuntimeError("MOCK_ERROR")
+    client = mock.Mock()
+    client.run_test_case.return_value = lro
+    runner = batch_test_runner.BatchTestRunner(client, lro_waiter.LroWaiter())
+    report = runner.run_concurrent(TEST_CASES[:1])
+    assert report.failed[0].error == "MOCK_ERROR"
+
+
+@pytest.mark.hermetic
+def test_run_batch():
+    """Runs test cases in a single BatchRunTestCases operation."""
+    client = mock.Mock()
+    client.batch_run_test_cases.return_value = get_lro(
+        cx.BatchRunTestCasesResponse(results=list(RESULTS.values()))
+    )
+    runner = batch_test_runner.BatchTestRunner(client, lro_waiter.LroWaiter())
+    report = runner.run_batch("MOCK_AGENT", TEST_CASES, EXPECTED_SESSION_PARAMETERS)
+    request = client.batch_run_test_cases.call_args.kwargs["request"]
+    assert list(request.test_cases) == [test_case.name for test_case in TEST_CASES]
+    assert_report(report)
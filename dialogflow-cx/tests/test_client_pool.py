@@ -0,0 +1,134 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the shared channel and client pool."""
+
+import asyncio
+
+import client_pool
+import mock
+import pytest
+
+
+class MockTransport:
+    """Mocks a gRPC transport class of a Dialogflow CX client."""
+
+    create_channel = mock.MagicMock(side_effect=lambda *args, **kwargs: mock.Mock())
+
+    def __init__(self, host, channel):
+        self.host = host
+        self.channel = channel
+
+
+class MockAgentsClient:
+    """Mocks a Dialogflow CX client class."""
+
+    def __init__(self, transport, client_options):
+        self.transport = transport
+        self.client_options = client_options
+
+    @classmethod
+    def get_transport_class(cls, label):
+        """Mocks the transport class lookup of the client."""
+        assert label == "grpc"
+        return MockTransport
+
+
+class MockPagesClient(MockAgentsClient):
+    """Mocks a second Dialogflow CX client class."""
+
+
+class MockAsyncTransport(MockTransport):
+    """Mocks the grpc_asyncio transport, whose channels close asynchronously."""
+
+    create_channel = mock.MagicMock(
+        side_effect=lambda *args, **kwargs: mock.Mock(close=mock.AsyncMock())
+    )
+
+
+class MockAgentsAsyncClient(MockAgentsClient):
+    """Mocks a Dialogflow CX async client class."""
+
+    @classmethod
+    def get_transport_class(cls, label):
+        """Mocks the transport class lookup of the client."""
+        assert label == "grpc_asyncio"
+        return MockAsyncTransport
+
+
+@pytest.mark.hermetic
+def test_client_pool_shares_channel():
+    """Clients for the same endpoint and credentials share one channel."""
+    pool = client_pool.ClientPool()
+    credentials = object()
+    options = {"api_endpoint": "global-dialogflow.googleapis.com"}
+
+    agents_client = pool.get_client(MockAgentsClient, options, credentials)
+    pages_client = pool.get_client(MockPagesClient, options, credentials)
+
+    assert pool.channel_count == 1
+    assert pool.client_count == 2
+    assert agents_client.transport.channel is pages_client.transport.channel
+    assert pool.get_client(MockAgentsClient, options, credentials) is agents_client
+    (host,) = MockTransport.create_channel.call_args.args
+    assert host == "global-dialogflow.googleapis.com:443"
+    assert (
+        "grpc.keepalive_time_ms",
+        client_pool.DEFAULT_KEEPALIVE_TIME_MS,
+    ) in MockTransport.create_channel.call_args.kwargs["options"]
+
+
+@pytest.mark.hermetic
+def test_client_pool_keys():
+    """Different endpoints or credentials get their own channel."""
+    pool = client_pool.ClientPool()
+    credentials = object()
+    pool.get_client(MockAgentsClient, {"api_endpoint": "a"}, credentials)
+    pool.get_client(MockAgentsClient, {"api_endpoint": "b"}, credentials)
+    pool.get_client(MockAgentsClient, {"api_endpoint": "a"}, object())
+    assert pool.channel_count == 3
+
+    pool.close()
+    assert pool.channel_count == 0
+    assert pool.client_count == 0
+
+
+@pytest.mark.hermetic
+def test_client_pool_async_per_loop():
+    """Async clients are pooled per event loop, and closed from their loop."""
+    pool = client_pool.ClientPool()
+    credentials = object()
+    options = {"api_endpoint": "a"}
+
+    async def get_client():
+        client = pool.get_client(MockAgentsAsyncClient, options, credentials)
+        assert pool.get_client(MockAgentsAsyncClient, options, credentials) is client
+        return client
+
+    first = asyncio.run(get_client())
+    second = asyncio.run(get_client())
+    assert second is not first
+    assert second.transport.channel is not first.transport.channel
+    assert pool.channel_count == 1
+    assert pool.client_count == 1
+
+    async def get_and_close():
+        client = await get_client()
+        await pool.async_close()
+        return client
+
+    third = asyncio.run(get_and_close())
+    third.transport.channel.close.assert_awaited_once()
+    assert pool.channel_count == 0
+    assert pool.client_count == 0
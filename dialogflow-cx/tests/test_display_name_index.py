@@ -0,0 +1,69 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the display name index."""
+
+import collections
+
+import display_name_index
+import pytest
+
+Resource = collections.namedtuple("Resource", ["display_name", "name"])
+
+
+class MockLister:
+    """Counts calls to a mocked list method."""
+
+    def __init__(self, resources):
+        self.resources = resources
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return iter(self.resources)
+
+
+@pytest.mark.hermetic
+def test_lookup_lists_once():
+    """The index of a parent is built with a single list pass."""
+    index = display_name_index.DisplayNameIndex()
+    lister = MockLister([Resource("first", "agents/1"), Resource("second", "agents/2")])
+    assert index.lookup("agents", "MOCK_PARENT", "first", lister) == "agents/1"
+    assert index.lookup("agents", "MOCK_PARENT", "second", lister) == "agents/2"
+    assert index.lookup("agents", "MOCK_PARENT", "missing", lister) is None
+    assert lister.calls == 1
+
+
+@pytest.mark.hermetic
+def test_add_remove():
+    """Created resources are cached without building, deleted ones are dropped."""
+    index = display_name_index.DisplayNameIndex()
+    index.add("intents", "MOCK_PARENT", Resource("first", "intents/1"))
+    assert index.get("intents", "MOCK_PARENT", "first") == "intents/1"
+    assert not index.is_built("intents", "MOCK_PARENT")
+
+    index.remove("intents", "MOCK_PARENT", "intents/1")
+    assert index.get("intents", "MOCK_PARENT", "first") is None
+
+
+@pytest.mark.hermetic
+def test_invalidate():
+    """Invalidated indexes are rebuilt on the next lookup."""
+    index = display_name_index.DisplayNameIndex()
+    lister = MockLister([Resource("first", "pages/1")])
+    index.lookup("pages", "MOCK_PARENT", "first", lister)
+    index.invalidate(parent="MOCK_PARENT")
+    assert index.get("pages", "MOCK_PARENT", "first") is None
+    index.lookup("pages", "MOCK_PARENT", "first", lister)
+    assert lister.calls == 2
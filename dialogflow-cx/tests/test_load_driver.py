@@ -0,0 +1,83 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the concurrent conversation load driver."""
+
+import threading
+
+import load_driver
+import pytest
+
+
+class MockDetectIntent:
+    """Mocks SessionsDelegator.detect_intent, failing on a given text."""
+
+    def __init__(self, fail_text=None):
+        self.fail_text = fail_text
+        self.session_ids = set()
+        self.lock = threading.Lock()
+
+    def __call__(self, text, parameters=None, current_page=None, session_id=None):
+        with self.lock:
+            self.session_ids.add(session_id)
+        if text == self.fail_text:
+            raise RuntimeError("MOCK_ERROR")
+        return [f"MOCK_RESPONSE {text}"], "MOCK_PAGE", {"turn": text}
+
+
+@pytest.mark.hermetic
+@pytest.mark.parametrize(
+    "values,fraction,expected",
+    [
+        ([], 0.5, None),
+        ([3, 1, 2], 0.5, 2),
+        (list(range(1, 101)), 0.95, 95),
+        (list(range(1, 101)), 0.99, 99),
+    ],
+)
+def test_percentile(values, fraction, expected):
+    """Nearest-rank percentiles."""
+    assert load_driver.percentile(values, fraction) == expected
+
+
+@pytest.mark.hermetic
+def test_run_load():
+    """Every session runs every turn, each with its own session ID."""
+    detect_intent = MockDetectIntent()
+    report = load_driver.run_load(
+        detect_intent, ["first", "second"], num_sessions=5, max_workers=3
+    )
+    assert len(detect_intent.session_ids) == 5
+    summary = report.summary()
+    assert list(summary) == [0, 1]
+    assert all(turn["count"] == 5 and turn["errors"] == 0 for turn in summary.values())
+
+
+@pytest.mark.hermetic
+def test_run_load_errors():
+    """A failed turn is counted, and ends its session."""
+    detect_intent = MockDetectIntent(fail_text="first")
+    report = load_driver.run_load(detect_intent, ["first", "second"], num_sessions=3)
+    assert report.summary() == {
+        0: {"count": 0, "errors": 3, "p50": None, "p95": None, "p99": None}
+    }
+
+
+@pytest.mark.hermetic
+def test_run_load_qps():
+    """Calls are paced to the target QPS across sessions."""
+    report = load_driver.run_load(
+        MockDetectIntent(), ["first"], num_sessions=5, max_workers=5, qps=50
+    )
+    assert report.duration >= 4 / 50
@@ -0,0 +1,164 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the long-running operation waiter."""
+
+import asyncio
+import itertools
+import threading
+
+import lro_waiter
+import pytest
+
+
+class MockOperation:
+    """Mocks an Operation that completes after a number of done() polls."""
+
+    def __init__(self, polls, result=None):
+        self.polls = polls
+        self._result = result
+
+    def done(self):
+        """Mocks done(), counting down the remaining polls."""
+        self.polls -= 1
+        return self.polls <= 0
+
+    def result(self):
+        """Mocks result()."""
+        return self._result
+
+
+class MockAsyncOperation(MockOperation):
+    """Mocks an AsyncOperation."""
+
+    async def done(self):  # pylint: disable=invalid-overridden-method
+        """Mocks the awaitable done()."""
+        return super().done()
+
+    async def result(self):  # pylint: disable=invalid-overridden-method
+        """Mocks the awaitable result()."""
+        return super().result()
+
+
+@pytest.mark.hermetic
+def test_backoff_delays():
+    """Delays grow exponentially, up to max_delay."""
+    delays = lro_waiter.backoff_delays(
+        initial_delay=1, max_delay=5, multiplier=2, jitter=0
+    )
+    assert list(itertools.islice(delays, 5)) == [1, 2, 4, 5, 5]
+
+
+@pytest.mark.hermetic
+def test_backoff_delays_jitter():
+    """Jitter keeps delays within the requested fraction."""
+    delays = lro_waiter.backoff_delays(initial_delay=1, max_delay=10, jitter=0.5)
+    assert all(0.5 <= delay <= 1.5 for delay in itertools.islice(delays, 1))
+
+
+@pytest.mark.hermetic
+def test_wait():
+    """Waits with backoff between polls, and returns the result."""
+    sleeps = []
+    waiter = lro_waiter.LroWaiter(initial_delay=1, jitter=0, sleep=sleeps.append)
+    assert waiter.wait(MockOperation(polls=3, result="MOCK_RESULT")) == "MOCK_RESULT"
+    assert sleeps == [1, 2]
+
+
+class FiniteDelaysWaiter(lro_waiter.LroWaiter):
+    """Waiter whose delays run out."""
+
+    def delays(self):
+        """Yields a single delay."""
+        return iter([1])
+
+
+@pytest.mark.hermetic
+def test_wait_finite_delays():
+    """Polls every max_delay once the delays run out."""
+    sleeps = []
+    waiter = FiniteDelaysWaiter(max_delay=5, sleep=sleeps.append)
+    assert waiter.wait(MockOperation(polls=4, result="MOCK_RESULT")) == "MOCK_RESULT"
+    assert sleeps == [1, 5, 5]
+
+
+@pytest.mark.hermetic
+def test_wait_all():
+    """Waits for operations together, returning results in order."""
+    sleeps = []
+    waiter = lro_waiter.LroWaiter(initial_delay=1, jitter=0, sleep=sleeps.append)
+    lros = [
+        MockOperation(polls=3, result="SLOW"),
+        MockOperation(polls=1, result="FAST"),
+    ]
+    assert list(index for index, _ in waiter.as_completed(lros)) == [1, 0]
+    lros = [
+        MockOperation(polls=3, result="SLOW"),
+        MockOperation(polls=1, result="FAST"),
+    ]
+    assert waiter.wait_all(lros) == ["SLOW", "FAST"]
+
+
+@pytest.mark.hermetic
+def test_wait_timeout():
+    """Gives up once the next poll would exceed the timeout."""
+    waiter = lro_waiter.LroWaiter(initial_delay=1, timeout=0.5, sleep=lambda _: None)
+    with pytest.raises(TimeoutError):
+        waiter.wait(MockOperation(polls=3))
+
+
+@pytest.mark.hermetic
+def test_add_done_callback():
+    """Calls back with the operation once it completes."""
+    completed = []
+    called = threading.Event()
+    waiter = lro_waiter.LroWaiter(initial_delay=0.001)
+    lro = MockOperation(polls=2, result="MOCK_RESULT")
+
+    def callback(done_lro):
+        completed.append(done_lro)
+        called.set()
+
+    future = waiter.add_done_callback(lro, callback)
+    assert future.result(timeout=5) == "MOCK_RESULT"
+    assert called.wait(timeout=5)
+    assert completed == [lro]
+
+
+@pytest.mark.hermetic
+def test_async_wait():
+    """Waits for an operation of an async client."""
+    waiter = lro_waiter.LroWaiter(initial_delay=0.001)
+    lro = MockAsyncOperation(polls=3, result="MOCK_RESULT")
+    assert asyncio.run(waiter.async_wait(lro)) == "MOCK_RESULT"
+
+
+@pytest.mark.hermetic
+def test_as_completed_bounded():
+    """Keeps at most max_in_flight operations running."""
+    started = []
+
+    def get_starter(index):
+        def start():
+            started.append(index)
+            return MockOperation(polls=2, result=index)
+
+        return start
+
+    waiter = lro_waiter.LroWaiter(initial_delay=1, jitter=0, sleep=lambda _: None)
+    completed = []
+    for index, lro in waiter.as_completed_bounded(map(get_starter, range(5)), 2):
+        assert len(started) - len(completed) <= 2
+        completed.append((index, lro.result()))
+    assert sorted(completed) == [(index, index) for index in range(5)]
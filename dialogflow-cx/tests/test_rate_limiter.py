@@ -0,0 +1,129 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the token bucket rate limiter."""
+
+import asyncio
+
+import pytest
+import rate_limiter
+
+
+class MockClock:
+    """Fake monotonic clock; sleeping advances it."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        """Records the delay and advances the clock."""
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+def get_bucket(rate, burst=None):
+    """Builds a TokenBucket driven by a MockClock."""
+    clock = MockClock()
+    bucket = rate_limiter.TokenBucket(rate, burst=burst, clock=clock, sleep=clock.sleep)
+    return bucket, clock
+
+
+@pytest.mark.hermetic
+def test_burst_then_smooth():
+    """The burst is served immediately, then calls are spaced 1/rate apart."""
+    bucket, clock = get_bucket(rate=10, burst=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.1)
+    assert bucket.acquire() == pytest.approx(0.1)
+    assert clock.now == pytest.approx(0.2)
+
+
+@pytest.mark.hermetic
+def test_concurrent_reservations_are_spread():
+    """Callers that queue up reserve successive slots, not the same one."""
+    bucket, _ = get_bucket(rate=10, burst=1)
+    delays = [bucket._reserve(1) for _ in range(4)]  # pylint: disable=protected-access
+    assert delays == pytest.approx([0, 0.1, 0.2, 0.3])
+    assert bucket.tokens == pytest.approx(-3)
+
+
+@pytest.mark.hermetic
+def test_try_acquire():
+    """try_acquire never waits and refills over time."""
+    bucket, clock = get_bucket(rate=1, burst=1)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.now += 1
+    assert bucket.try_acquire()
+
+
+@pytest.mark.hermetic
+def test_utilization():
+    """Utilization is the fraction of the rate granted over the window."""
+    bucket, clock = get_bucket(rate=10)
+    for _ in range(5):
+        bucket.acquire()
+    assert bucket.utilization == pytest.approx(0.5)
+    clock.now += 2
+    assert bucket.utilization == 0
+
+
+@pytest.mark.hermetic
+def test_granted_bounded():
+    """Grants out of the window are forgotten without reading utilization."""
+    bucket, _ = get_bucket(rate=10)
+    for _ in range(1000):
+        bucket.acquire()
+    assert len(bucket._granted) <= 11  # pylint: disable=protected-access
+    assert bucket.utilization == pytest.approx(1)
+
+
+@pytest.mark.hermetic
+def test_async_acquire():
+    """async_acquire waits for its reserved slot."""
+    bucket = rate_limiter.TokenBucket(100, burst=1)
+
+    async def acquire_all():
+        return await asyncio.gather(*(bucket.async_acquire() for _ in range(3)))
+
+    delays = asyncio.run(acquire_all())
+    assert sorted(delays) == pytest.approx([0, 0.01, 0.02], abs=0.005)
+
+
+@pytest.mark.hermetic
+def test_invalid_rate():
+    """A rate of zero is rejected."""
+    with pytest.raises(ValueError):
+        rate_limiter.TokenBucket(0)
+
+
+@pytest.mark.hermetic
+def test_registry():
+    """Limiters are shared per project and location."""
+    registry = rate_limiter.RateLimiterRegistry()
+    assert registry.find("MOCK_PROJECT_ID", "global") is None
+    limiter = registry.configure("MOCK_PROJECT_ID", "global", qps=5)
+    assert limiter.rate == 5
+    assert registry.find("MOCK_PROJECT_ID", "global") is limiter
+    assert registry.get("MOCK_PROJECT_ID", "global") is limiter
+    assert registry.get("MOCK_PROJECT_ID", "us-central1") is not limiter
+    assert set(registry.utilization()) == {
+        ("MOCK_PROJECT_ID", "global"),
+        ("MOCK_PROJECT_ID", "us-central1"),
+    }
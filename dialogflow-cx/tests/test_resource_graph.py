@@ -0,0 +1,135 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the resource graph scheduler."""
+
+import asyncio
+import threading
+
+import pytest
+import resource_graph
+
+
+class MockDelegator:
+    """Records setup and tear_down calls in a shared log."""
+
+    def __init__(self, name, log, dependencies=(), barrier=None, error=None):
+        self.name = name
+        self.log = log
+        self.dependencies = list(dependencies)
+        self.barrier = barrier
+        self.error = error
+
+    def setup(self):
+        """Mock setup, optionally waiting for concurrent siblings."""
+        if self.barrier:
+            self.barrier.wait(timeout=5)
+        if self.error:
+            raise self.error
+        self.log.append(("setup", self.name))
+
+    def tear_down(self):
+        """Mock tear_down."""
+        if self.barrier:
+            self.barrier.wait(timeout=5)
+        self.log.append(("tear_down", self.name))
+
+
+def get_sample_graph(log, barrier=None):
+    """Agent -> (webhook, intent) -> page, mirroring BasicWebhookSample."""
+    agent = MockDelegator("agent", log)
+    webhook = MockDelegator("webhook", log, [agent], barrier)
+    intent = MockDelegator("intent", log, [agent], barrier)
+    page = MockDelegator("page", log, [agent, webhook])
+    return [page, intent, webhook, agent]
+
+
+@pytest.mark.hermetic
+def test_setup_graph_order():
+    """Dependencies are set up before their dependents."""
+    log = []
+    resource_graph.setup_graph(get_sample_graph(log))
+    order = [name for _, name in log]
+    assert order[0] == "agent"
+    assert order.index("webhook") < order.index("page")
+    assert set(order) == {"agent", "webhook", "intent", "page"}
+
+
+@pytest.mark.hermetic
+def test_setup_graph_concurrent():
+    """Independent delegators are set up concurrently."""
+    log = []
+    barrier = threading.Barrier(2)
+    resource_graph.setup_graph(get_sample_graph(log, barrier))
+    assert not barrier.broken
+
+
+@pytest.mark.hermetic
+def test_tear_down_graph_order():
+    """Dependents are torn down before their dependencies."""
+    log = []
+    resource_graph.tear_down_graph(get_sample_graph(log))
+    order = [name for _, name in log]
+    assert order[-1] == "agent"
+    assert order.index("page") < order.index("webhook")
+
+
+@pytest.mark.hermetic
+def test_setup_graph_error():
+    """The first failure is raised and blocks dependents."""
+    log = []
+    agent = MockDelegator("agent", log, error=RuntimeError("MOCK_ERROR"))
+    page = MockDelegator("page", log, [agent])
+    with pytest.raises(RuntimeError, match="MOCK_ERROR"):
+        resource_graph.setup_graph([agent, page])
+    assert not log
+
+
+@pytest.mark.hermetic
+def test_topological_levels_cycle():
+    """Dependency cycles are rejected."""
+    log = []
+    first = MockDelegator("first", log)
+    second = MockDelegator("second", log, [first])
+    first.dependencies.append(second)
+    with pytest.raises(resource_graph.ResourceGraphCycleError):
+        resource_graph.setup_graph([first, second])
+
+
+class MockAsyncDelegator(MockDelegator):
+    """Records awaited setup and tear_down calls in a shared log."""
+
+    async def setup(self):
+        """Mock async setup."""
+        self.log.append(("setup", self.name))
+
+    async def tear_down(self):
+        """Mock async tear_down."""
+        self.log.append(("tear_down", self.name))
+
+
+@pytest.mark.hermetic
+def test_async_setup_and_tear_down_graph():
+    """Async delegators are set up and torn down in dependency order."""
+    log = []
+    agent = MockAsyncDelegator("agent", log)
+    intent = MockAsyncDelegator("intent", log, [agent])
+    asyncio.run(resource_graph.async_setup_graph([intent, agent]))
+    asyncio.run(resource_graph.async_tear_down_graph([intent, agent]))
+    assert log == [
+        ("setup", "agent"),
+        ("setup", "intent"),
+        ("tear_down", "intent"),
+        ("tear_down", "agent"),
+    ]
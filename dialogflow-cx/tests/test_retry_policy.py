@@ -0,0 +1,153 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the retry engine of Dialogflow API calls."""
+
+import asyncio
+
+import google.api_core.exceptions
+import mock
+import pytest
+import retry_policy
+
+NLU_NOT_FOUND = (
+    "com.google.apps.framework.request.NotFoundException: "
+    "NLU model for flow '00000000-0000-0000-0000-000000000000' does not exist. "
+    "Please try again after retraining the flow."
+)
+
+
+class FlakyMethod:
+    """Raises the given errors before succeeding."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, request):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return f"MOCK_RESPONSE {request}"
+
+
+def get_engine(**kwargs):
+    """Builds an engine that does not actually sleep."""
+    return retry_policy.RetryEngine(sleep=lambda _: None, **kwargs)
+
+
+@pytest.mark.hermetic
+def test_retry_transient_errors():
+    """Transient errors are retried, and the retries counted per call site."""
+    engine = get_engine()
+    method = FlakyMethod(
+        google.api_core.exceptions.ServiceUnavailable("MOCK"),
+        google.api_core.exceptions.ResourceExhausted("MOCK"),
+    )
+    assert engine.call(method, "MOCK", call_site="MOCK_SITE") == "MOCK_RESPONSE MOCK"
+    assert method.calls == 3
+    assert engine.stats()["retries"] == {"MOCK_SITE": 2}
+
+
+@pytest.mark.hermetic
+def test_no_retry_unrelated_errors():
+    """Errors without a policy propagate immediately, instead of returning None."""
+    engine = get_engine()
+    method = FlakyMethod(google.api_core.exceptions.NotFound("MOCK"))
+    with pytest.raises(google.api_core.exceptions.NotFound):
+        engine.call(method, "MOCK", call_site="MOCK_SITE")
+    assert method.calls == 1
+    assert engine.stats()["failures"] == {"MOCK_SITE": 1}
+
+
+@pytest.mark.hermetic
+def test_retry_nlu_model_not_found():
+    """NotFound is only retried while the flow is training."""
+    engine = get_engine()
+    method = FlakyMethod(google.api_core.exceptions.NotFound(NLU_NOT_FOUND))
+    assert engine.call(method, "MOCK") == "MOCK_RESPONSE MOCK"
+
+
+@pytest.mark.hermetic
+def test_max_attempts():
+    """Retries stop after the policy's max_attempts."""
+    policy = retry_policy.RetryPolicy(max_attempts=2)
+    engine = get_engine(policies={google.api_core.exceptions.Aborted: policy})
+    method = FlakyMethod(*[google.api_core.exceptions.Aborted("MOCK")] * 3)
+    with pytest.raises(google.api_core.exceptions.Aborted):
+        engine.call(method, "MOCK")
+    assert method.calls == 2
+
+
+@pytest.mark.hermetic
+def test_deadline():
+    """Retries stop once the next backoff would pass the deadline."""
+    engine = get_engine(deadline=0.1)
+    method = FlakyMethod(*[google.api_core.exceptions.ServiceUnavailable("MOCK")] * 3)
+    with pytest.raises(google.api_core.exceptions.ServiceUnavailable):
+        engine.call(method, "MOCK")
+    assert method.calls == 1
+
+
+@pytest.mark.hermetic
+def test_retry_budget():
+    """Retries stop once the retry budget is spent."""
+    engine = get_engine(budget=retry_policy.RetryBudget(max_tokens=1))
+    method = FlakyMethod(*[google.api_core.exceptions.ServiceUnavailable("MOCK")] * 3)
+    with pytest.raises(google.api_core.exceptions.ServiceUnavailable):
+        engine.call(method, "MOCK")
+    assert method.calls == 2
+
+
+@pytest.mark.hermetic
+def test_before_attempt():
+    """before_attempt runs before the first call and before every retry."""
+    engine = get_engine()
+    method = FlakyMethod(google.api_core.exceptions.ResourceExhausted("MOCK"))
+    before_attempt = mock.Mock()
+    engine.call(method, "MOCK", before_attempt=before_attempt)
+    assert before_attempt.call_count == method.calls == 2
+
+
+@pytest.mark.hermetic
+def test_retrying_client():
+    """Every sync and async client method goes through the engine."""
+
+    class MockClient:
+        """Mocks an API client."""
+
+        def __init__(self):
+            self.detect_intent = FlakyMethod(
+                google.api_core.exceptions.ServiceUnavailable("MOCK")
+            )
+
+        async def get_agent(self, request):
+            """Mocks an async client method."""
+            return await asyncio.sleep(0, result=f"MOCK_AGENT {request}")
+
+    engine = retry_policy.RetryEngine(
+        policies={
+            google.api_core.exceptions.ServiceUnavailable: retry_policy.RetryPolicy(
+                initial_delay=0
+            )
+        }
+    )
+    before_attempt = mock.Mock()
+    client = retry_policy.RetryingClient(
+        MockClient(), engine, hooks={"detect_intent": before_attempt}
+    )
+    assert client.detect_intent("MOCK") == "MOCK_RESPONSE MOCK"
+    assert before_attempt.call_count == 2
+    assert asyncio.run(client.get_agent("MOCK")) == "MOCK_AGENT MOCK"
+    assert engine.stats()["retries"] == {"MockClient.detect_intent": 1}
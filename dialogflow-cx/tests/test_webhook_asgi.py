@@ -0,0 +1,161 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the ASGI webhook adapter."""
+
+import asyncio
+import json
+import threading
+
+import pytest
+from webhook.asgi import create_app, create_sample_app
+from webhook.main import build_request_dict_basic, extract_text
+from webhook.router import WebhookRouter
+
+
+async def call_app(app, body, method="POST"):
+    """Sends one HTTP request to an ASGI app; returns (status, body)."""
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+    messages = [
+        {"type": "http.request", "body": body[:5], "more_body": True},
+        {"type": "http.request", "body": body[5:], "more_body": False},
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": "/"}, receive, send)
+    return sent[0]["status"], b"".join(message.get("body", b"") for message in sent)
+
+
+@pytest.mark.hermetic
+def test_sample_app():
+    """The sample handlers are served unchanged."""
+    request_dict = build_request_dict_basic("basic_webhook", "MOCK TEXT")
+    status, body = asyncio.run(call_app(create_sample_app(), request_dict))
+    assert status == 200
+    assert extract_text(body) == "Webhook received: MOCK TEXT (Tag: basic_webhook)"
+
+
+@pytest.mark.hermetic
+def test_concurrent_handlers():
+    """Sync handlers run in threads and async handlers on the loop, concurrently."""
+    router = WebhookRouter()
+    barrier = threading.Barrier(2, timeout=5)
+
+    @router.route("sync")
+    def sync_handler(_):
+        barrier.wait()
+        return {"handler": "sync"}
+
+    @router.route("async")
+    async def async_handler(_):
+        await asyncio.sleep(0)
+        return {"handler": "async"}
+
+    async def run():
+        app = create_app(router)
+        return await asyncio.gather(
+            call_app(app, build_request_dict_basic("sync", "")),
+            call_app(app, build_request_dict_basic("sync", "")),
+            call_app(app, build_request_dict_basic("async", "")),
+        )
+
+    results = asyncio.run(run())
+    assert [status for status, _ in results] == [200, 200, 200]
+    assert json.loads(results[2][1]) == {"handler": "async"}
+    assert router.stats()["sync"]["count"] == 2
+
+
+@pytest.mark.hermetic
+@pytest.mark.parametrize(
+    "body,method,expected_status",
+    [
+        (b"not json", "POST", 400),
+        (build_request_dict_basic("UNKNOWN_TAG", ""), "POST", 500),
+        (build_request_dict_basic("UNKNOWN_TAG", ""), "GET", 405),
+    ],
+)
+def test_errors(body, method, expected_status):
+    """Invalid requests and failing handlers are answered with an error status."""
+    app = create_app(WebhookRouter())
+    status, _ = asyncio.run(call_app(app, body, method=method))
+    assert status == expected_status
+
+
+@pytest.mark.hermetic
+def test_unencodable_result():
+    """A result that is not JSON serializable is answered with a 500 JSON body."""
+    router = WebhookRouter()
+
+    @router.route("set")
+    def set_handler(_):
+        return {"MOCK_VALUE"}
+
+    app = create_app(router)
+    status, body = asyncio.run(call_app(app, build_request_dict_basic("set", "")))
+    assert status == 500
+    assert json.loads(body) == {"error": "Webhook handler failed"}
+
+
+@pytest.mark.hermetic
+def test_graceful_shutdown():
+    """Shutdown waits for in-flight requests, then refuses new ones."""
+    router = WebhookRouter()
+    events = {}
+
+    @router.route("slow")
+    async def slow_handler(_):
+        await events["release"].wait()
+
+    async def run():
+        release = events["release"] = asyncio.Event()
+        app = create_app(router)
+        request = asyncio.ensure_future(
+            call_app(app, build_request_dict_basic("slow", ""))
+        )
+        await asyncio.sleep(0.01)
+        assert app.in_flight == 1
+        shutdown = asyncio.ensure_future(app.shutdown())
+        await asyncio.sleep(0.01)
+        assert not shutdown.done()
+        release.set()
+        await shutdown
+        refused = await call_app(app, build_request_dict_basic("slow", ""))
+        return await request, refused
+
+    (status, body), (refused_status, _) = asyncio.run(run())
+    assert (status, body) == (200, b"{}")
+    assert refused_status == 503
+
+
+@pytest.mark.hermetic
+def test_lifespan():
+    """The lifespan protocol completes startup and shutdown."""
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(create_app(WebhookRouter())({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
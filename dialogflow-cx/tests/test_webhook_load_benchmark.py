@@ -0,0 +1,77 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the webhook load benchmark."""
+
+import sys
+
+import pytest
+from benchmarks import webhook_load
+
+
+@pytest.mark.hermetic
+def test_every_tag_has_payloads():
+    """New handlers must come with benchmark payloads."""
+    for target in webhook_load.get_targets():
+        router = target.entry_point.__globals__["ROUTER"]
+        assert set(target.payloads) == set(router.tags), target.name
+
+
+@pytest.mark.hermetic
+def test_load_telecom_webhook_isolated():
+    """The telecom modules do not stay importable by their top-level names."""
+    path = list(sys.path)
+    modules = {name: sys.modules.get(name) for name in webhook_load.TELECOM_MODULES}
+    telecom = webhook_load.load_telecom_webhook()
+    assert telecom.router.__file__.startswith(str(webhook_load.TELECOM_SRC))
+    assert sys.path == path
+    for name, module in modules.items():
+        assert sys.modules.get(name) is module, name
+
+
+@pytest.mark.hermetic
+def test_format_value():
+    """Summary values of runs without successful requests print as n/a."""
+    assert webhook_load.format_value(1.23456, ".3f") == "1.235"
+    assert webhook_load.format_value(None, ".3f") == "n/a"
+
+
+@pytest.mark.hermetic
+def test_run_benchmark():
+    """Every tag is served without errors in-process and over HTTP."""
+    results = webhook_load.run_benchmark(num_requests=4, concurrency=2)
+    assert len(results) == 2 * (
+        len(webhook_load.WEBHOOK_PAYLOADS) + len(webhook_load.TELECOM_PAYLOADS)
+    )
+    for key, result in results.items():
+        assert result["requests"] == 4, key
+        assert result["errors"] == 0, key
+        assert result["p50_ms"] <= result["p99_ms"]
+
+
+@pytest.mark.hermetic
+def test_compare():
+    """Slower, less throughput or more errors than the baseline are regressions."""
+    baseline = {
+        "a": {"errors": 0, "p95_ms": 1.0, "throughput_rps": 1000},
+        "b": {"errors": 0, "p95_ms": 1.0, "throughput_rps": 1000},
+    }
+    results = {
+        "a": {"errors": 0, "p95_ms": 1.1, "throughput_rps": 950},
+        "b": {"errors": 1, "p95_ms": 2.0, "throughput_rps": 500},
+        "c": {"errors": 0, "p95_ms": 1.0, "throughput_rps": 1000},
+    }
+    regressions = webhook_load.compare(results, baseline, threshold=0.2)
+    assert len(regressions) == 3
+    assert all(regression.startswith("b: ") for regression in regressions)
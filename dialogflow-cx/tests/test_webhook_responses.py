@@ -0,0 +1,72 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the webhook response builder."""
+
+import json
+
+import pytest
+from webhook import responses
+
+
+@pytest.mark.hermetic
+def test_text_response():
+    """The rendered bytes decode to the same document as a nested dict."""
+    text = 'MOCK "TEXT" é'
+    assert json.loads(responses.text_response(text)) == {
+        "fulfillment_response": {"messages": [{"text": {"text": [text]}}]}
+    }
+    assert json.loads(
+        responses.text_response(text, allow_playback_interruption=False)
+    ) == {
+        "fulfillment_response": {
+            "messages": [
+                {"text": {"text": [text], "allow_playback_interruption": False}}
+            ]
+        }
+    }
+
+
+@pytest.mark.hermetic
+def test_text_and_parameters_response():
+    """Session parameters are serialized into their own slot."""
+    response = responses.text_and_parameters_response(
+        "MOCK_TEXT", {"MOCK_KEY": "MOCK_VAL", "key": None}
+    )
+    assert isinstance(response, bytes)
+    assert json.loads(response)["session_info"] == {
+        "parameters": {"MOCK_KEY": "MOCK_VAL", "key": None}
+    }
+
+
+@pytest.mark.hermetic
+def test_template_slots():
+    """Static chunks are precomputed around every slot, in document order."""
+    template = responses.ResponseTemplate(
+        {"a": responses.Slot("first"), "b": [1, responses.Slot("second")]}
+    )
+    assert template.slots == ["first", "second"]
+    assert template.chunks == [b'{"a":', b',"b":[1,', b"]}"]
+    assert json.loads(template.render(first={"x": 1}, second="y")) == {
+        "a": {"x": 1},
+        "b": [1, "y"],
+    }
+
+
+@pytest.mark.hermetic
+def test_loads_round_trip():
+    """loads accepts the bytes produced by dumps, whatever the backend."""
+    document = {"text": ["MOCK_TEXT"], "value": None}
+    assert responses.loads(responses.dumps(document)) == document
+    assert responses.JSON_BACKEND in ("orjson", "ujson", "json")
@@ -0,0 +1,123 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the webhook tag router."""
+
+import asyncio
+
+import pytest
+from utilities import RequestMock
+from webhook.main import ROUTER, build_request_dict_basic
+from webhook.router import DEFAULT_TAG, LatencyHistogram, WebhookRouter
+
+
+class CountingRequestMock(RequestMock):
+    """Counts how many times the request body is parsed."""
+
+    get_json_calls = 0
+
+    def get_json(self):
+        self.get_json_calls += 1
+        return super().get_json()
+
+
+@pytest.mark.hermetic
+def test_route_and_stats():
+    """Handlers receive the parsed body, which is parsed once per request."""
+    router = WebhookRouter()
+
+    @router.route("MOCK_TAG")
+    def handler(request_dict):
+        return request_dict["text"]
+
+    request = CountingRequestMock(payload=build_request_dict_basic("MOCK_TAG", "hi"))
+    assert router.handle(request) == "hi"
+    assert router.handle(request) == "hi"
+    assert request.get_json_calls == 2
+    assert handler.__name__ == "handler"
+
+    stats = router.stats()["MOCK_TAG"]
+    assert stats["count"] == 2
+    assert stats["errors"] == 0
+    assert sum(stats["latency_histogram"].values()) == 2
+
+
+@pytest.mark.hermetic
+def test_async_handler():
+    """Coroutine handlers are awaited by async_dispatch and run by dispatch."""
+    router = WebhookRouter()
+
+    @router.route("MOCK_TAG")
+    async def handler(request_dict):
+        await asyncio.sleep(0)
+        return request_dict["text"]
+
+    request_dict = build_request_dict_basic("MOCK_TAG", "hi")
+    assert asyncio.run(router.async_dispatch(request_dict)) == "hi"
+    assert router.dispatch(request_dict) == "hi"
+    assert router.stats()["MOCK_TAG"]["count"] == 2
+
+
+@pytest.mark.hermetic
+def test_handler_errors_are_counted():
+    """A failing handler is recorded as an error and its exception propagates."""
+    router = WebhookRouter()
+
+    @router.route("MOCK_TAG")
+    def handler(request_dict):
+        raise ValueError(request_dict["text"])
+
+    with pytest.raises(ValueError, match="MOCK_ERROR"):
+        router.dispatch(build_request_dict_basic("MOCK_TAG", "MOCK_ERROR"))
+    assert router.stats()["MOCK_TAG"]["errors"] == 1
+
+
+@pytest.mark.hermetic
+def test_unrecognized_tag():
+    """Unknown tags raise, unless a default handler is given."""
+    request_dict = build_request_dict_basic("UNKNOWN_TAG", "hi")
+    with pytest.raises(RuntimeError, match="Unrecognized tag: UNKNOWN_TAG"):
+        WebhookRouter().dispatch(request_dict)
+    router = WebhookRouter(default=lambda _: "DEFAULT")
+    assert router.dispatch(request_dict) == "DEFAULT"
+    assert list(router.stats()) == [DEFAULT_TAG]
+
+
+@pytest.mark.hermetic
+def test_duplicate_tag():
+    """A tag can only be registered once."""
+    router = WebhookRouter()
+    router.add_route("MOCK_TAG", lambda _: None)
+    with pytest.raises(ValueError):
+        router.add_route("MOCK_TAG", lambda _: None)
+
+
+@pytest.mark.hermetic
+def test_latency_histogram():
+    """Latencies land in the first bucket whose upper bound they do not exceed."""
+    histogram = LatencyHistogram(buckets=(0.01, 0.1))
+    for latency in [0.005, 0.01, 0.05, 2]:
+        histogram.record(latency)
+    assert histogram.as_dict() == {"0.01": 2, "0.1": 1, "+Inf": 1}
+
+
+@pytest.mark.hermetic
+def test_sample_webhook_tags():
+    """All the sample handlers are registered."""
+    assert set(ROUTER.tags) == {
+        "basic_webhook",
+        "echo_webhook",
+        "validate_form",
+        "set_session_param",
+    }
@@ -14,13 +14,10 @@
 
 """Helper functions for creating and testing Dialogflow CX samples."""
 
-import contextlib
-import time
 from contextlib import ExitStack
 from dataclasses import dataclass, field
 from typing import Mapping
 
-import google.api_core.exceptions
 import google.cloud.dialogflowcx as cx
 import mock
 from google.api_core.operation import Operation
@@ -137,31 +134,17 @@ def run_hermetic_test(sample):
         patch_client(sample.test_cases_client, "run_test_case", stack, return_value=lro)
         sample.setup()
         sample.run(user_input, quiet=True)
+        sample.run_load(user_input, num_sessions=2, wait=0, quiet=True)
         sample.tear_down()
 
 
-@contextlib.contextmanager
-def retry_call(api_method, request, max_retries=3, delay=1):
-    """Retry an api call multiple times if needed."""
-    retry_count = 0
-    result = None
-    while retry_count < max_retries:
-        try:
-            result = api_method(request)
-            break
-        except google.api_core.exceptions.NotFound as exc:
-            if str(exc) == (
-                "404 com.google.apps.framework.request.NotFoundException: "
-                "NLU model for flow '00000000-0000-0000-0000-000000000000' does not exist. "
-                "Please try again after retraining the flow."
-            ):
-                retry_count += 1
-                time.sleep(delay)
-
-    if retry_count == max_retries:
-        raise RuntimeError("Too many return attempts")
-
-    yield result
+def is_nlu_model_not_found(exc):
+    """Checks if a NotFound error is due to the flow still being trained."""
+    return str(exc) == (
+        "404 com.google.apps.framework.request.NotFoundException: "
+        "NLU model for flow '00000000-0000-0000-0000-000000000000' does not exist. "
+        "Please try again after retraining the flow."
+    )
 
 
 def create_conversational_turn(
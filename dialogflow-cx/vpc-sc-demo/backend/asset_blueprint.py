@@ -16,12 +16,16 @@
 
 import json
 import logging
-import tempfile
 
 import analytics_utilities as au
 import asset_utilities as asu
 import flask
 import get_token
+import jobs
+import status_utilities as su
+import tf_state
+import tf_stream
+import workspace_pool
 from invoke import context
 
 asset = flask.Blueprint("asset", __name__)
@@ -33,8 +37,146 @@ ACCESS_POLICY_RESOURCE = (
 )
 
 
+def get_asset_status(  # pylint: disable=too-many-locals
+    access_token, args, debug=False
+):
+    """Get status of the terraform-tracked assets of a project.
+
+    Returns a dictionary with the status, or with an error response.
+    """
+    target = args.get("target", None)
+    # Without update, the status is read from the state, without terraform.
+    update = args.get("update", "true").lower() != "false"
+    prefix = f'terraform/{args["project_id"]}'
+    resource_id_dict = {}
+    if update:
+        env = asu.get_terraform_env(access_token, args, debug=debug)
+        if "response" in env:
+            return env
+        ctx = context.Context()
+        module = "/deploy/terraform/main.tf"
+        pool = workspace_pool.get_workspace_pool()
+        with pool.checkout(args["project_id"]) as workspace:
+            result = workspace.initialize(ctx, module, env, prefix)
+            if result:
+                return {"response": result}
+            result = asu.tf_plan(ctx, module, workspace.workdir, env, target=target)
+        if result is not None:
+            if "response" in result:
+                return result
+            for hook in result["hooks"]["refresh_complete"]:
+                if "id_value" in hook:
+                    resource_id_dict[hook["resource"]["addr"]] = hook["id_value"]
+
+    state = tf_state.get_state(prefix)
+    if "response" in state:
+        return state
+    resources = state["resources"]
+    if not update:
+        resource_id_dict = state["resource_id_dict"]
+
+    if ACCESS_POLICY_RESOURCE in resource_id_dict:
+        access_policy_id = resource_id_dict[ACCESS_POLICY_RESOURCE]
+        response = asu.get_access_policy_title(access_token, access_policy_id)
+        if "response" in response:
+            return response
+        access_policy_title = response["access_policy_title"]
+    else:
+        access_policy_title = None
+
+    return {
+        "status_dict": {
+            "status": "OK",
+            "resources": resources,
+            "resource_id_dict": resource_id_dict,
+            "accessPolicyTitle": access_policy_title,
+        }
+    }
+
+
+def update_targets(  # pylint: disable=too-many-arguments,too-many-locals,too-many-return-statements
+    access_token, args, targets, destroy, debug=False
+):
+    """Use terraform to update targets of a project, all of them if None.
+
+    Returns a dictionary with the status, or with an error response.
+    """
+    env = asu.get_terraform_env(access_token, args, debug=debug)
+    if "response" in env:
+        return env
+    ctx = context.Context()
+    module = "/deploy/terraform/main.tf"
+    prefix = f'terraform/{args["project_id"]}'
+    pool = workspace_pool.get_workspace_pool()
+    with pool.checkout(args["project_id"]) as workspace:
+        result = workspace.initialize(ctx, module, env, prefix)
+        if result:
+            return {"response": result}
+        workdir = workspace.workdir
+
+        channels = tf_stream.CHANNELS
+        with channels.open_run(args["project_id"]) as channel:
+            if targets:
+                result = asu.tf_plan(
+                    ctx, module, workdir, env, target=targets, channel=channel
+                )
+                if result and "response" in result:
+                    return result
+                result = asu.tf_apply_targets(
+                    ctx, module, workdir, env, destroy, targets, channel=channel
+                )
+            else:
+                result = asu.tf_plan(ctx, module, workdir, env, channel=channel)
+                result = asu.tf_apply(
+                    ctx, module, workdir, env, destroy, channel=channel
+                )
+    # The access policy and perimeter may have been created or destroyed.
+    su.invalidate_resolution_cache(args["project_id"])
+    if targets:
+        if "response" in result:
+            return result
+    elif result:
+        return {"response": result}
+
+    state = tf_state.get_state(prefix)
+    if "response" in state:
+        return state
+
+    status_dict = {"status": "OK", "resources": state["resources"]}
+    if targets:
+        status_dict["targets"] = result["targets"]
+    return {"status_dict": status_dict}
+
+
+def get_response(result):
+    """Build the response to the result of get_asset_status or update_targets."""
+    if "response" in result:
+        return result["response"]
+    response = flask.Response(status=200, response=json.dumps(result["status_dict"]))
+    return au.register_action(
+        flask.request, response, au.ACTIONS.UPDATE_STATUS, {"service": "ingress"}
+    )
+
+
+def run_or_submit(project_id, function, *args):
+    """Respond with the result of function, or with its job if async is set."""
+    if flask.request.args.get("async") != "true":
+        return get_response(function(*args))
+    try:
+        job = jobs.get_job_queue().submit(project_id, function, *args)
+    except jobs.QueueFullError:
+        return flask.Response(
+            status=429,
+            response=json.dumps({"status": "BLOCKED", "reason": "TOO_MANY_JOBS"}),
+        )
+    return flask.Response(
+        status=202,
+        response=json.dumps({"status": "PENDING", "job": job.to_dict()}),
+    )
+
+
 @asset.route("/asset_status", methods=["GET"])
-def asset_status():  # pylint: disable=too-many-locals,too-many-return-statements,too-many-branches
+def asset_status():
     """Get status of terraform-tracked assets."""
     token_dict = get_token.get_token(flask.request, token_type="access_token")
     if "response" in token_dict:
@@ -50,69 +192,50 @@ def asset_status():  # pylint: disable=too-many-locals,too-many-return-statement
     if response:
         return response
 
-    target = flask.request.args.get("target", None)
-    update = flask.request.args.get("update", True)
-    env = asu.get_terraform_env(
+    return run_or_submit(
+        flask.request.args["project_id"],
+        get_asset_status,
         token_dict["access_token"],
-        flask.request.args,
-        debug=asu.get_debug(flask.request),
+        flask.request.args.to_dict(),
+        asu.get_debug(flask.request),
     )
-    if "response" in env:
-        return env["response"]
-    ctx = context.Context()
-    module = "/deploy/terraform/main.tf"
-    prefix = f'terraform/{flask.request.args["project_id"]}'
-    with tempfile.TemporaryDirectory() as workdir:
-        result = asu.tf_init(ctx, module, workdir, env, prefix)
 
-        if result:
-            return result
 
-        resource_id_dict = {}
-        if update:
-            result = asu.tf_plan(ctx, module, workdir, env, target=target)
-            if result is not None:
-                if "response" in result:
-                    return result["response"]
-                for hook in result["hooks"]["refresh_complete"]:
-                    if "id_value" in hook:
-                        resource_id_dict[hook["resource"]["addr"]] = hook["id_value"]
-
-        if ACCESS_POLICY_RESOURCE in resource_id_dict:
-            access_policy_id = resource_id_dict[ACCESS_POLICY_RESOURCE]
-            response = asu.get_access_policy_title(
-                token_dict["access_token"], access_policy_id
-            )
-            if "response" in response:
-                return response["response"]
-            access_policy_title = response["access_policy_title"]
-        else:
-            access_policy_title = None
-
-        result = asu.tf_state_list(ctx, module, workdir, env)
-        if "response" in result:
-            return result["response"]
-        resources = result["resources"]
-
-        response = flask.Response(
+@asset.route("/update_target", methods=["POST"])
+def update_target():
+    """Use terraform to update a target."""
+    token_dict = get_token.get_token(flask.request, token_type="access_token")
+    if "response" in token_dict:
+        return token_dict["response"]
+    if not flask.request.args.get("project_id"):
+        return flask.Response(
             status=200,
-            response=json.dumps(
-                {
-                    "status": "OK",
-                    "resources": resources,
-                    "resource_id_dict": resource_id_dict,
-                    "accessPolicyTitle": access_policy_title,
-                }
-            ),
-        )
-        return au.register_action(
-            flask.request, response, au.ACTIONS.UPDATE_STATUS, {"service": "ingress"}
+            response=json.dumps({"status": "BLOCKED", "reason": "NO_PROJECT_ID"}),
         )
+    response = asu.validate_project_id(
+        flask.request.args["project_id"], token_dict["access_token"]
+    )
+    if response:
+        return response
+    content = flask.request.get_json(silent=True) or {}
+    targets = content.get("targets")
+    if targets == ["all"]:
+        targets = None
+
+    return run_or_submit(
+        flask.request.args["project_id"],
+        update_targets,
+        token_dict["access_token"],
+        flask.request.args.to_dict(),
+        targets,
+        content.get("destroy", False),
+        asu.get_debug(flask.request),
+    )
 
 
-@asset.route("/update_target", methods=["POST"])
-def update_target():  # pylint: disable=too-many-return-statements,too-many-branches
-    """Use terraform to update a target."""
+@asset.route("/job_status", methods=["GET"])
+def job_status():
+    """Get the status of a job of /asset_status or /update_target."""
     token_dict = get_token.get_token(flask.request, token_type="access_token")
     if "response" in token_dict:
         return token_dict["response"]
@@ -126,52 +249,81 @@ def update_target():  # pylint: disable=too-many-return-statements,too-many-bran
     )
     if response:
         return response
-    content = flask.request.get_json(silent=True)
-    access_token = token_dict["access_token"]
 
-    env = asu.get_terraform_env(
-        access_token,
-        flask.request.args,
-        debug=asu.get_debug(flask.request),
+    job = jobs.get_job_queue().get(flask.request.args.get("job_id"))
+    if job is None or job.project_id != flask.request.args["project_id"]:
+        return flask.Response(
+            status=404,
+            response=json.dumps({"status": "ERROR", "reason": "JOB_NOT_FOUND"}),
+        )
+    return flask.Response(
+        status=200, response=json.dumps({"status": "OK", "job": job.to_dict()})
     )
-    if "response" in env:
-        return env["response"]
-    targets = content.get("targets")
-    destroy = content["destroy"]
 
-    if targets == ["all"]:
-        update_targets = None
-    else:
-        update_targets = targets
 
-    ctx = context.Context()
-    module = "/deploy/terraform/main.tf"
-    prefix = f'terraform/{flask.request.args["project_id"]}'
-    with tempfile.TemporaryDirectory() as workdir:
-        result = asu.tf_init(ctx, module, workdir, env, prefix)
-        if result:
-            return result
+@asset.route("/job_result", methods=["GET"])
+def job_result():  # pylint: disable=too-many-return-statements
+    """Get the response of a job, once it is finished."""
+    token_dict = get_token.get_token(flask.request, token_type="access_token")
+    if "response" in token_dict:
+        return token_dict["response"]
+    if not flask.request.args.get("project_id"):
+        return flask.Response(
+            status=200,
+            response=json.dumps({"status": "BLOCKED", "reason": "NO_PROJECT_ID"}),
+        )
+    response = asu.validate_project_id(
+        flask.request.args["project_id"], token_dict["access_token"]
+    )
+    if response:
+        return response
 
-        if update_targets:
-            for target in update_targets:
-                result = asu.tf_plan(ctx, module, workdir, env, target=target)
-                if result and "response" in result:
-                    return result["response"]
-                result = asu.tf_apply(ctx, module, workdir, env, destroy, target=target)
-        else:
-            result = asu.tf_plan(ctx, module, workdir, env)
-            result = asu.tf_apply(ctx, module, workdir, env, destroy)
-        if result:
-            return result
+    job = jobs.get_job_queue().get(flask.request.args.get("job_id"))
+    if job is None or job.project_id != flask.request.args["project_id"]:
+        return flask.Response(
+            status=404,
+            response=json.dumps({"status": "ERROR", "reason": "JOB_NOT_FOUND"}),
+        )
+    if not job.finished:
+        return flask.Response(
+            status=202,
+            response=json.dumps({"status": "PENDING", "job": job.to_dict()}),
+        )
+    if job.state == jobs.FAILED:
+        return flask.Response(
+            status=500,
+            response=json.dumps({"status": "ERROR", "job": job.to_dict()}),
+        )
+    return get_response(job.result)
 
-        result = asu.tf_state_list(ctx, module, workdir, env)
-        if "response" in result:
-            return result["response"]
 
-        response = flask.Response(
+@asset.route("/asset_events", methods=["GET"])
+def asset_events():
+    """Get the events of the latest terraform run of a project, as SSE.
+
+    Only the events published so far are sent, so the request does not hold
+    a server thread while terraform runs; EventSource reconnects for the next
+    ones, with the Last-Event-ID of the last event it got.
+    """
+    token_dict = get_token.get_token(flask.request, token_type="access_token")
+    if "response" in token_dict:
+        return token_dict["response"]
+    if not flask.request.args.get("project_id"):
+        return flask.Response(
             status=200,
-            response=json.dumps({"status": "OK", "resources": result["resources"]}),
-        )
-        return au.register_action(
-            flask.request, response, au.ACTIONS.UPDATE_STATUS, {"service": "ingress"}
+            response=json.dumps({"status": "BLOCKED", "reason": "NO_PROJECT_ID"}),
         )
+    response = asu.validate_project_id(
+        flask.request.args["project_id"], token_dict["access_token"]
+    )
+    if response:
+        return response
+
+    channel = tf_stream.CHANNELS.get(flask.request.args["project_id"])
+    return flask.Response(
+        flask.stream_with_context(
+            tf_stream.stream_events(channel, flask.request.headers.get("Last-Event-ID"))
+        ),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
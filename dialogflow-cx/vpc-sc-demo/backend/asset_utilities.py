@@ -21,14 +21,18 @@ import os
 
 import flask
 import google.auth.transport.requests
-import requests
+import http_session
 import status_utilities as su
+import tf_stream
 from flask import Response
 from google.oauth2 import service_account
 from invoke import task
 
 logger = logging.getLogger(__name__)
 
+# Number of resources terraform changes concurrently during an apply.
+PARALLELISM = int(os.environ.get("TF_PARALLELISM", "10"))
+
 
 RESOURCE_GROUP = {
     "module.service_directory": {
@@ -98,7 +102,7 @@ def get_access_policy_title(token, access_policy_id):
     """Get access_policy_title using the accesscontextmanager API."""
     headers = {}
     headers["Authorization"] = f"Bearer {token}"
-    result = requests.get(
+    result = http_session.get(
         f"https://accesscontextmanager.googleapis.com/v1/accessPolicies/{access_policy_id}",
         headers=headers,
         timeout=10,
@@ -134,20 +138,30 @@ def get_terraform_env(access_token, request_args, debug=False):
 
 
 @task
-def tf_init(context, module, workdir, env, prefix):
-    """Initialize terraform."""
+def tf_init(  # pylint: disable=too-many-arguments
+    context, module, workdir, env, prefix, upgrade=True, plugin_cache_dir=None
+):
+    """Initialize terraform.
+
+    Providers are only upgraded if upgrade is set, and are installed from
+    plugin_cache_dir when it is given.
+    """
     user_access_token = env.pop("GOOGLE_OAUTH_ACCESS_TOKEN")
     debug = "TF_LOG" in env
 
     credentials = get_credentials()
-    request = google.auth.transport.requests.Request()
+    request = google.auth.transport.requests.Request(session=http_session.get_session())
     credentials.refresh(request)
     env["GOOGLE_OAUTH_ACCESS_TOKEN"] = credentials.token
+    upgrade_option = "-upgrade " if upgrade else ""
+    run_kwargs = {}
+    if plugin_cache_dir:
+        run_kwargs["env"] = {"TF_PLUGIN_CACHE_DIR": plugin_cache_dir}
     promise = context.run(
         (
             f"cp {module} {workdir} && "
             f"terraform -chdir={workdir} init "
-            "-upgrade -reconfigure "
+            f"{upgrade_option}-reconfigure "
             f'-backend-config="access_token={env["GOOGLE_OAUTH_ACCESS_TOKEN"]}" '
             f'-backend-config="bucket={os.environ["TF_PLAN_STORAGE_BUCKET"]}" '
             f'-backend-config="prefix={prefix}"'
@@ -155,6 +169,7 @@ def tf_init(context, module, workdir, env, prefix):
         warn=True,
         hide=True,
         asynchronous=True,
+        **run_kwargs,
     )
     result = promise.join()
     env["GOOGLE_OAUTH_ACCESS_TOKEN"] = user_access_token
@@ -177,66 +192,71 @@ def tf_init(context, module, workdir, env, prefix):
         )
 
 
+def get_target_options(target):
+    """Get the -target options of a target address, or of a list of them."""
+    if not target:
+        return ""
+    targets = [target] if isinstance(target, str) else target
+    return " ".join(f"-target={curr_target}" for curr_target in targets)
+
+
+def get_apply_command(  # pylint: disable=too-many-arguments
+    module, workdir, env, destroy, target=None, verbose=False
+):
+    """Build the shell command of terraform apply."""
+    json_option = "-json" if "TF_LOG" not in env else ""
+    destroy_option = "--destroy" if destroy else ""
+    verbose_option = 'export TF_LOG="DEBUG" &&' if verbose else ""
+    return (
+        f"cp {module} {workdir} &&"
+        f"{verbose_option}"
+        f'terraform -chdir="{workdir}" apply -lock-timeout=10s {json_option}'
+        f" -parallelism={PARALLELISM}"
+        f' --auto-approve -var access_token=\'{env["GOOGLE_OAUTH_ACCESS_TOKEN"]}\' '
+        f"{destroy_option} {get_target_options(target)}"
+    )
+
+
 @task
-def tf_plan(context, module, workdir, env, target=None):
-    """Create terraform plan."""
+def tf_plan(  # pylint: disable=unused-argument,too-many-arguments
+    context, module, workdir, env, target=None, channel=None
+):
+    """Create terraform plan, of a target or of a list of them.
+
+    Events of the plan are published to channel, if given, as they come.
+    """
     debug = "TF_LOG" in env
-    target_option = f"-target={target}" if target else ""
     json_option = "-json" if not debug else ""
-    promise = context.run(
+    run = tf_stream.TerraformRun(channel).run(
         (
             f"cp {module} {workdir} && "
             f'terraform -chdir="{workdir}" plan {json_option} '
             "-refresh-only -var "
-            f'access_token=\'{env["GOOGLE_OAUTH_ACCESS_TOKEN"]}\' {target_option}'
+            f'access_token=\'{env["GOOGLE_OAUTH_ACCESS_TOKEN"]}\' '
+            f"{get_target_options(target)}"
         ),
-        warn=True,
-        hide=True,
-        asynchronous=True,
-        env=env,
+        env,
     )
-    result = promise.join()
 
     if debug:
-        logging.debug(result.exited)
-        logging.debug(result.stdout)
-        logging.debug(result.stderr)
-    else:
-        errors = []
-        hooks = {
-            "refresh_start": [],
-            "refresh_complete": [],
-            "apply_complete": [],
-            "apply_start": [],
+        return None
+    if run.errors:
+        return {
+            "response": Response(
+                status=500,
+                response=json.dumps(
+                    {
+                        "status": "ERROR",
+                        "errors": run.errors,
+                    }
+                ),
+            )
         }
-        lines = result.stdout.split("\n")
-        for line in lines:
-            if line.strip():
-                try:
-                    message = json.loads(line.strip())
-                    if message["@level"] == "error":
-                        errors.append(message)
-                    if "hook" in message:
-                        hooks[message["type"]].append(message["hook"])
-                except KeyError:
-                    logging.debug("COULD NOT LOAD: %s", line)
-        if errors:
-            return {
-                "response": Response(
-                    status=500,
-                    response=json.dumps(
-                        {
-                            "status": "ERROR",
-                            "errors": errors,
-                        }
-                    ),
-                )
-            }
-        return {"hooks": hooks}
+    return {"hooks": run.hooks}
 
 
 @task
-def tf_apply(  # pylint: disable=too-many-arguments,too-many-locals
+def tf_apply(  # pylint: disable=unused-argument,too-many-arguments
     context,
     module,
     workdir,
@@ -244,93 +264,57 @@ def tf_apply(  # pylint: disable=too-many-arguments,too-many-locals
     destroy,
     target=None,
     verbose=False,
+    channel=None,
 ):
-    """Apply terraform plan."""
-    debug = "TF_LOG" in env
-    target_option = f"-target={target}" if target else ""
-    json_option = "-json" if not debug else ""
-    destroy_option = "--destroy" if destroy else ""
-    verbose_option = 'export TF_LOG="DEBUG" &&' if verbose else ""
+    """Apply terraform plan, of a target or of a list of them.
 
-    promise = context.run(
-        f"cp {module} {workdir} &&"
-        f"{verbose_option}"
-        f'terraform -chdir="{workdir}" apply -lock-timeout=10s {json_option}'
-        f' --auto-approve -var access_token=\'{env["GOOGLE_OAUTH_ACCESS_TOKEN"]}\' '
-        f"{destroy_option} {target_option}",
-        warn=True,
-        hide=None,
-        asynchronous=True,
-        env=env,
+    Events of the apply are published to channel, if given, as they come.
+    """
+    run = tf_stream.TerraformRun(channel).run(
+        get_apply_command(module, workdir, env, destroy, target, verbose), env
     )
-    result = promise.join()
-    if debug:
-        logging.debug(result.exited)
-        logging.debug(result.stdout)
-        logging.debug(result.stderr)
-    else:
-        errors = []
-        lines = result.stdout.split("\n")
-        for line in lines:
-            if line.strip():
-                try:
-                    message = json.loads(line)
-                    if message["@level"] == "error":
-                        errors.append(message)
-                except json.decoder.JSONDecodeError:
-                    logging.debug("COULD NOT LOAD: %s", line)
-        if errors:
-            # Should return dict to match the other function...
-            return Response(
-                status=500,
-                response=json.dumps(
-                    {
-                        "status": "ERROR",
-                        "errors": errors,
-                    }
-                ),
-            )
+    if "TF_LOG" not in env and run.errors:
+        # Should return dict to match the other function...
+        return Response(
+            status=500,
+            response=json.dumps(
+                {
+                    "status": "ERROR",
+                    "errors": run.errors,
+                }
+            ),
+        )
+    return None
 
 
 @task
-def tf_state_list(context, module, workdir, env):
-    """Get list of all states."""
+def tf_apply_targets(  # pylint: disable=unused-argument,too-many-arguments
+    context, module, workdir, env, destroy, targets, channel=None
+):
+    """Apply the targets of a list together, with the outcome of each.
+
+    Terraform applies the resources of all the targets in a single run,
+    concurrently where they do not depend on each other.
+    """
     debug = "TF_LOG" in env
-    promise = context.run(
-        f'\
-    cp {module} {workdir} &&\
-    terraform -chdir="{workdir}" state list',
-        warn=True,
-        hide=True,
-        asynchronous=True,
-        env=env,
+    run = tf_stream.TerraformRun(channel).run(
+        get_apply_command(module, workdir, env, destroy, targets), env
     )
-    result = promise.join()
-
-    if debug:
-        logging.debug(result.exited)
-        logging.debug(result.stdout)
-        logging.debug(result.stderr)
-
-    if result.exited:
+    outcomes = {} if debug else run.get_target_outcomes(targets)
+    if not debug and run.errors:
         return {
             "response": Response(
                 status=500,
                 response=json.dumps(
                     {
                         "status": "ERROR",
-                        "stdout": result.stdout,
-                        "stderr": result.stderr,
+                        "errors": run.errors,
+                        "targets": outcomes,
                     }
                 ),
             )
         }
-    status_dict = {"resources": result.stdout.split()}
-    for group_name, group_resources in RESOURCE_GROUP.items():
-        if group_resources.issubset(set(status_dict["resources"])):
-            status_dict["resources"].append(group_name)
-    logging.debug(status_dict["resources"])
-    return status_dict
+    return {"targets": outcomes}
 
 
 def get_debug(request):
@@ -344,7 +328,7 @@ def validate_project_id(project_id, access_token):
     """Confirm if the current project_id is valid for current user."""
     headers = {}
     headers["Authorization"] = f"Bearer {access_token}"
-    response = requests.get(
+    response = http_session.get(
         f"https://cloudresourcemanager.googleapis.com/v1/projects/{project_id}",
         headers=headers,
         timeout=10,
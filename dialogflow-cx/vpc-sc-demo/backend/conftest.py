@@ -20,8 +20,12 @@ import zipfile
 from urllib.parse import urlparse
 
 import flask
+import jobs
 import pytest
 import requests
+import status_utilities
+import tf_state
+import workspace_pool
 from werkzeug.test import EnvironBuilder
 
 MOCK_DOMAIN = "MOCK_DOMAIN."
@@ -71,6 +75,39 @@ def assert_response_ep(
             assert curr_response.decode() == response
 
 
+@pytest.fixture(autouse=True)
+def clear_resolution_cache():
+    """Keep values resolved by a test from being reused by the next ones."""
+    status_utilities.RESOLUTION_CACHE.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def isolated_workspace_pool(tmp_path):
+    """Give each test new terraform workspaces, under a temporary directory."""
+    workspace_pool.set_workspace_pool(workspace_pool.WorkspacePool(str(tmp_path)))
+    yield
+    workspace_pool.set_workspace_pool(None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_job_queue():
+    """Give each test a new job queue, stopped at the end of the test."""
+    queue = jobs.InProcessJobQueue(max_workers=2)
+    jobs.set_job_queue(queue)
+    yield queue
+    queue.shutdown()
+    jobs.set_job_queue(None)
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path):
+    """Read terraform states from a temporary directory instead of the bucket."""
+    root = tmp_path / "state"
+    tf_state.set_state_reader(tf_state.StateReader(tf_state.LocalStateSource(root)))
+    yield root
+    tf_state.set_state_reader(None)
+
+
 @pytest.fixture
 def lru_fixture():
     """Fixture function for testing LruCache."""
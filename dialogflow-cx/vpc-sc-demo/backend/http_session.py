@@ -0,0 +1,87 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Shared, connection-pooled HTTP session for calls to Google APIs.
+
+Connections to googleapis.com are kept alive and reused across requests and
+users, instead of opening a new TCP and TLS connection for every call. The
+session is shared by all users, so it never stores cookies and credentials
+are only ever passed in the headers of each call.
+"""
+
+import http.cookiejar
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Number of hosts with a pool of kept-alive connections.
+POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "16"))
+# Maximum number of connections to a single host.
+POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "32"))
+
+
+class RejectAllCookies(http.cookiejar.DefaultCookiePolicy):
+    """Cookie policy keeping the cookies of one user from reaching another."""
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+def create_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    """Builds a session keeping up to pool_maxsize connections per host.
+
+    Calls wait for a free connection of a full pool rather than opening
+    connections that would not be reused.
+    """
+    session = requests.Session()
+    session.cookies.set_policy(RejectAllCookies())
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session():
+    """Returns the shared session, creating it on first use."""
+    global _SESSION  # pylint: disable=global-statement
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = create_session()
+        return _SESSION
+
+
+def get(url, **kwargs):
+    """Sends a GET request through the shared session."""
+    return get_session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    """Sends a POST request through the shared session."""
+    return get_session().post(url, **kwargs)
+
+
+def patch(url, **kwargs):
+    """Sends a PATCH request through the shared session."""
+    return get_session().patch(url, **kwargs)
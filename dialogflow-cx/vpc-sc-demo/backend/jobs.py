@@ -0,0 +1,208 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Background jobs for long-running terraform operations.
+
+Requests submit a job and return its id at once, instead of holding a
+gunicorn thread for the minutes an apply takes. Jobs run on a bounded pool
+of threads, one at a time per project: the next job of a project is only
+started once the previous one is finished, so they never wait on each other
+in the pool. At most MAX_QUEUED_JOBS jobs of a project wait for their turn,
+since each holds the access token of its request; submit raises QueueFullError
+beyond that. InProcessJobQueue keeps the jobs in memory, so they are lost if
+the server restarts.
+"""
+
+import abc
+import collections
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+import uuid
+
+MAX_WORKERS = int(os.environ.get("TF_JOB_WORKERS", "4"))
+# Number of finished jobs kept for their results to be read.
+MAX_FINISHED_JOBS = int(os.environ.get("TF_MAX_FINISHED_JOBS", "256"))
+# Number of jobs of a project waiting for its running job.
+MAX_QUEUED_JOBS = int(os.environ.get("TF_MAX_QUEUED_JOBS", "4"))
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+
+
+class QueueFullError(Exception):
+    """The project already has the maximum number of queued jobs."""
+
+
+class Job:  # pylint: disable=too-many-instance-attributes
+    """Call of a function for a project, run in the background."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self, project_id, function, args=(), kwargs=None, clock=time.time
+    ):
+        self.job_id = uuid.uuid4().hex
+        self.project_id = project_id
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.clock = clock
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = clock()
+        self.started_at = None
+        self.finished_at = None
+        self._finished_event = threading.Event()
+
+    @property
+    def finished(self):
+        """Whether the job is done or failed."""
+        return self.state in (DONE, FAILED)
+
+    def run(self):
+        """Call the function, keeping its result or the error it raised."""
+        self.state = RUNNING
+        self.started_at = self.clock()
+        try:
+            self.result = self.function(*self.args, **self.kwargs)
+            self.state = DONE
+        except Exception as exc:  # pylint: disable=broad-except
+            logging.exception("Job %s failed", self.job_id)
+            self.error = str(exc)
+            self.state = FAILED
+        # The arguments may hold access tokens, do not keep them around.
+        self.function, self.args, self.kwargs = None, (), {}
+        self.finished_at = self.clock()
+        self._finished_event.set()
+
+    def wait(self, timeout=None):
+        """Wait for the job to finish, returns whether it did."""
+        return self._finished_event.wait(timeout)
+
+    def to_dict(self):
+        """Get the status of the job."""
+        return {
+            "job_id": self.job_id,
+            "project_id": self.project_id,
+            "state": self.state,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue(abc.ABC):
+    """Base class of the queues of jobs."""
+
+    @abc.abstractmethod
+    def submit(self, project_id, function, *args, **kwargs):
+        """Queue a call of function for a project, returns the Job.
+
+        Raises QueueFullError if the project has too many queued jobs.
+        """
+
+    @abc.abstractmethod
+    def get(self, job_id):
+        """Get a job by id, None if it is unknown."""
+
+
+class InProcessJobQueue(JobQueue):
+    """Jobs run by a pool of threads of the server process."""
+
+    def __init__(
+        self,
+        max_workers=MAX_WORKERS,
+        max_finished_jobs=MAX_FINISHED_JOBS,
+        max_queued_jobs=MAX_QUEUED_JOBS,
+    ):
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="terraform-job"
+        )
+        self.max_finished_jobs = max_finished_jobs
+        self.max_queued_jobs = max_queued_jobs
+        self.jobs = collections.OrderedDict()
+        # Jobs waiting for the running job of their project, by project.
+        self.waiting = {}
+        self.lock = threading.Lock()
+
+    def submit(self, project_id, function, *args, **kwargs):
+        with self.lock:
+            waiting = self.waiting.get(project_id)
+            if waiting is not None and len(waiting) >= self.max_queued_jobs:
+                raise QueueFullError(
+                    f"{project_id} already has {len(waiting)} queued jobs"
+                )
+            job = Job(project_id, function, args, kwargs)
+            self.jobs[job.job_id] = job
+            if waiting is not None:
+                waiting.append(job)
+            else:
+                self.waiting[project_id] = collections.deque()
+                self.executor.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        job.run()
+        with self.lock:
+            waiting = self.waiting[job.project_id]
+            if waiting:
+                self.executor.submit(self._run, waiting.popleft())
+            else:
+                del self.waiting[job.project_id]
+            self._prune()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_finished_jobs."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[: max(len(finished) - self.max_finished_jobs, 0)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def shutdown(self, wait=True):
+        """Stop the threads, once the queued jobs are run if wait is set."""
+        if wait:
+            # Waiting jobs are only handed to the executor as others finish.
+            with self.lock:
+                unfinished = [job for job in self.jobs.values() if not job.finished]
+            for job in unfinished:
+                job.wait()
+        self.executor.shutdown(wait=wait)
+
+
+_QUEUE = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_job_queue():
+    """Get the job queue shared by all requests."""
+    global _QUEUE  # pylint: disable=global-statement
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = InProcessJobQueue()
+        return _QUEUE
+
+
+def set_job_queue(queue):
+    """Replace the shared queue; None to create a default one on next use."""
+    global _QUEUE  # pylint: disable=global-statement
+    with _QUEUE_LOCK:
+        _QUEUE = queue
@@ -20,7 +20,7 @@ import logging
 
 import flask
 import get_token
-import requests
+import http_session
 
 launchpad = flask.Blueprint("launchpad", __name__)
 logger = logging.getLogger(__name__)
@@ -55,7 +55,7 @@ def validate_project_id():
 
     headers = {}
     headers["Authorization"] = f"Bearer {access_token}"
-    req = requests.get(
+    req = http_session.get(
         f"https://cloudresourcemanager.googleapis.com/v1/projects/{project_id}",
         headers=headers,
         timeout=10,
@@ -14,12 +14,16 @@
 
 """Blueprint for checking project status."""
 
+import concurrent.futures
 import json
 import logging
 
 import flask
-import requests
+import http_session
 import status_utilities as su
+import werkzeug.exceptions
+
+STATUS_ALL_MAX_WORKERS = 4
 
 status = flask.Blueprint("status", __name__)
 logger = logging.getLogger(__name__)
@@ -50,11 +54,17 @@ def webhook_ingress_internal_only_status():
     response = su.check_function_exists(token, project_id, region, webhook_name)
     if "response" in response:
         return response["response"]
+    return get_webhook_ingress_internal_only_status(
+        token, project_id, region, webhook_name
+    )
+
 
+def get_webhook_ingress_internal_only_status(token, project_id, region, webhook_name):
+    """Check the ingress settings of an existing webhook."""
     headers = {}
     headers["x-goog-user-project"] = project_id
     headers["Authorization"] = f"Bearer {token}"
-    result = requests.get(
+    result = http_session.get(
         (
             "https://cloudfunctions.googleapis.com/v1/projects/"
             f"{project_id}/locations/{region}/functions/{webhook_name}"
@@ -75,7 +85,7 @@ def webhook_ingress_internal_only_status():
 
 
 @status.route("/webhook_access_allow_unauthenticated_status", methods=["GET"])
-def webhook_access_allow_unauthenticated_status():  # pylint: disable=too-many-branches,too-many-return-statements
+def webhook_access_allow_unauthenticated_status():
     """Get boolean status of allow unauthenticated webhook access."""
     data = su.get_token_and_project(flask.request)
     if "response" in data:
@@ -87,11 +97,19 @@ def webhook_access_allow_unauthenticated_status():  # pylint: disable=too-many-b
     response = su.check_function_exists(token, project_id, region, webhook_name)
     if "response" in response:
         return response["response"]
+    return get_webhook_access_allow_unauthenticated_status(
+        token, project_id, region, webhook_name
+    )
+
 
+def get_webhook_access_allow_unauthenticated_status(  # pylint: disable=too-many-return-statements
+    token, project_id, region, webhook_name
+):
+    """Check if an existing webhook can only be invoked by authenticated users."""
     headers = {}
     headers["x-goog-user-project"] = project_id
     headers["Authorization"] = f"Bearer {token}"
-    result = requests.get(
+    result = http_session.get(
         (
             "https://cloudfunctions.googleapis.com/v2/"
             f"projects/{project_id}/locations/{region}/"
@@ -159,7 +177,15 @@ def service_directory_webhook_fulfillment_status():
     if "response" in data:
         return data["response"]
     project_id, token = data["project_id"], data["token"]
-    untrusted_region = flask.request.args["region"]
+    return get_service_directory_webhook_fulfillment_status(
+        token, project_id, flask.request.args["region"]
+    )
+
+
+def get_service_directory_webhook_fulfillment_status(
+    token, project_id, untrusted_region
+):
+    """Check if the webhook of the Telecommunications agent uses the proxy."""
     if untrusted_region in ["us-central1"]:
         region = untrusted_region
     else:
@@ -189,3 +215,118 @@ def service_directory_webhook_fulfillment_status():
                 status=200, response=json.dumps({"status": False})
             )
     return response
+
+
+def get_response_status(response):
+    """Decode the status document of a response, or describe its error."""
+    if response.status_code == 200:
+        try:
+            return json.loads(response.get_data(as_text=True))
+        except ValueError:
+            pass
+    return {
+        "status": "ERROR",
+        "status_code": response.status_code,
+        "error": response.get_data(as_text=True),
+    }
+
+
+def get_status(check, *args):
+    """Run a check returning a response, converting aborts into responses."""
+    try:
+        return check(*args)
+    except werkzeug.exceptions.HTTPException as exception:
+        return exception.get_response()
+
+
+def get_restricted_services_responses(token, project_id, access_policy_title):
+    """Get the responses of both restricted service checks from one lookup."""
+    status_dict = su.get_access_policy_restricted_services_status(
+        token, project_id, access_policy_title
+    )
+    if "response" in status_dict:
+        return {
+            "restricted_services_status_cloudfunctions": status_dict["response"],
+            "restricted_services_status_dialogflow": status_dict["response"],
+        }
+    return {
+        "restricted_services_status_cloudfunctions": flask.Response(
+            status=200,
+            response=json.dumps({"status": status_dict["cloudfunctions_restricted"]}),
+        ),
+        "restricted_services_status_dialogflow": flask.Response(
+            status=200,
+            response=json.dumps({"status": status_dict["dialogflow_restricted"]}),
+        ),
+    }
+
+
+def get_webhook_responses(executor, token, project_id, region, webhook_name):
+    """Run the checks of the webhook function concurrently on executor.
+
+    The function is looked up once; if it cannot be found, both checks share
+    the response of the lookup.
+    """
+    function_exists = su.check_function_exists(token, project_id, region, webhook_name)
+    if "response" in function_exists:
+        response = function_exists["response"]
+        return {
+            "webhook_ingress_internal_only_status": response,
+            "webhook_access_allow_unauthenticated_status": response,
+        }
+    webhook_checks = {
+        "webhook_ingress_internal_only_status": (
+            get_webhook_ingress_internal_only_status
+        ),
+        "webhook_access_allow_unauthenticated_status": (
+            get_webhook_access_allow_unauthenticated_status
+        ),
+    }
+    futures = {
+        key: executor.submit(get_status, check, token, project_id, region, webhook_name)
+        for key, check in webhook_checks.items()
+    }
+    return {key: future.result() for key, future in futures.items()}
+
+
+@status.route("/status_all", methods=["GET"])
+def status_all():
+    """Get the status of every webhook and perimeter setting in one call.
+
+    The token, project and access policy are resolved once and the
+    independent checks run concurrently, so the latency is about the one of
+    the slowest check. Each key of the combined document holds the status
+    returned by the endpoint of the same name.
+    """
+    data = su.get_token_and_project(flask.request)
+    if "response" in data:
+        return data["response"]
+    project_id, token = data["project_id"], data["token"]
+    region = flask.request.args["region"]
+    webhook_name = flask.request.args["webhook_name"]
+    access_policy_title = flask.request.args.get("access_policy_title", None)
+
+    with concurrent.futures.ThreadPoolExecutor(STATUS_ALL_MAX_WORKERS) as executor:
+        restricted_services = executor.submit(
+            get_restricted_services_responses, token, project_id, access_policy_title
+        )
+        service_directory = executor.submit(
+            get_status,
+            get_service_directory_webhook_fulfillment_status,
+            token,
+            project_id,
+            region,
+        )
+        responses = get_webhook_responses(
+            executor, token, project_id, region, webhook_name
+        )
+        responses.update(restricted_services.result())
+        key = "service_directory_webhook_fulfillment_status"
+        responses[key] = service_directory.result()
+
+    return flask.Response(
+        status=200,
+        response=json.dumps(
+            {key: get_response_status(value) for key, value in responses.items()}
+        ),
+    )
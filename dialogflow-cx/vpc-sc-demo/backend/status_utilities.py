@@ -14,27 +14,96 @@
 
 """Utility Module to get status of project assets."""
 
+import hashlib
 import json
 import logging
+import os
+import threading
+import time
 
 import flask
 import get_token
-import requests
+import http_session
 
 logger = logging.getLogger(__name__)
 
+# Seconds during which resolved project numbers, organizations, access
+# policies and perimeters are reused.
+RESOLUTION_CACHE_TTL = float(os.environ.get("RESOLUTION_CACHE_TTL", "300"))
+
+
+class TtlCache:
+    """Thread-safe cache whose entries expire ttl seconds after being set."""
+
+    def __init__(self, ttl, max_size=1024, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Get the value of a key, or default if missing or expired."""
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= self.clock():
+                del self.cache[key]
+                return default
+            return entry[1]
+
+    def set(self, key, value):
+        """Set the value of a key, evicting the oldest entry if full."""
+        with self.lock:
+            self.cache.pop(key, None)
+            self.cache[key] = (self.clock() + self.ttl, value)
+            if len(self.cache) > self.max_size:
+                del self.cache[next(iter(self.cache))]
+
+    def invalidate(self, match=None):
+        """Remove the entries whose key matches, or all entries."""
+        with self.lock:
+            if match is None:
+                self.cache.clear()
+                return
+            for key in [key for key in self.cache if match(key)]:
+                del self.cache[key]
+
+
+RESOLUTION_CACHE = TtlCache(RESOLUTION_CACHE_TTL)
+
+
+def get_resolution_cache_key(token, project_id, *args):
+    """Key of a value resolved for a user and project.
+
+    Users are told apart by a digest of their token, so that a value is only
+    served to users allowed to read it, and tokens are not kept in memory.
+    """
+    return (hashlib.sha256(token.encode()).hexdigest(), project_id) + args
+
+
+def invalidate_resolution_cache(project_id):
+    """Forget the values resolved for a project, for every user."""
+    RESOLUTION_CACHE.invalidate(lambda key: key[1] == project_id)
+
 
 def get_project_number(token, project_id):
     """Get project number using cloudresourcemanager API."""
+    cache_key = get_resolution_cache_key(token, project_id, "project_number")
+    project_number = RESOLUTION_CACHE.get(cache_key)
+    if project_number is not None:
+        return {"project_number": project_number}
     headers = {}
     headers["Content-type"] = "application/json"
     headers["Authorization"] = f"Bearer {token}"
-    result = requests.get(
+    result = http_session.get(
         f"https://cloudresourcemanager.googleapis.com/v1/projects/{project_id}",
         headers=headers,
         timeout=10,
     )
     if "projectNumber" in result.json():
+        RESOLUTION_CACHE.set(cache_key, result.json()["projectNumber"])
         return {"project_number": result.json()["projectNumber"]}
     return {
         "response": flask.Response(
@@ -56,34 +125,17 @@ def get_access_policy_name(token, access_policy_title, project_id, error_code=20
             )
         }
 
-    headers = {}
-    headers["Content-type"] = "application/json"
-    headers["Authorization"] = f"Bearer {token}"
-    response = requests.post(
-        f"https://cloudresourcemanager.googleapis.com/v1/projects/{project_id}:getAncestry",
-        headers=headers,
-        timeout=10,
+    cache_key = get_resolution_cache_key(
+        token, project_id, "access_policy_name", access_policy_title
     )
+    access_policy_name = RESOLUTION_CACHE.get(cache_key)
+    if access_policy_name is not None:
+        return {"access_policy_name": access_policy_name}
 
-    if response.status_code != 200:
-        return {
-            "response": flask.Response(
-                status=error_code,
-                response=json.dumps({"status": "BLOCKED", "reason": "UNKNOWN_STATUS"}),
-            )
-        }
-
-    organization_id = None
-    for ancestor_dict in response.json().get("ancestor", []):
-        if ancestor_dict["resourceId"]["type"] == "organization":
-            organization_id = ancestor_dict["resourceId"]["id"]
-    if not organization_id:
-        return {
-            "response": flask.Response(
-                status=error_code,
-                response=json.dumps({"status": "BLOCKED", "reason": "NO_ORGANIZATION"}),
-            )
-        }
+    response = get_organization_id(token, project_id, error_code=error_code)
+    if "response" in response:
+        return response
+    organization_id = response["organization_id"]
 
     response = get_project_number(token, project_id)
     if "response" in response:
@@ -93,7 +145,7 @@ def get_access_policy_name(token, access_policy_title, project_id, error_code=20
     headers = {}
     headers["Content-type"] = "application/json"
     headers["Authorization"] = f"Bearer {token}"
-    response = requests.get(
+    response = http_session.get(
         (
             "https://accesscontextmanager.googleapis.com/v1/"
             f"accessPolicies?parent=organizations/{organization_id}"
@@ -105,6 +157,7 @@ def get_access_policy_name(token, access_policy_title, project_id, error_code=20
     for policy in response.json().get("accessPolicies", []):
         if policy["title"] == access_policy_title:
             if f"projects/{project_number}" in policy["scopes"]:
+                RESOLUTION_CACHE.set(cache_key, policy["name"])
                 return {"access_policy_name": policy["name"]}
 
     return {
@@ -115,6 +168,45 @@ def get_access_policy_name(token, access_policy_title, project_id, error_code=20
     }
 
 
+def get_organization_id(token, project_id, error_code=200):
+    """Get the organization of a project using cloudresourcemanager API."""
+    cache_key = get_resolution_cache_key(token, project_id, "organization_id")
+    organization_id = RESOLUTION_CACHE.get(cache_key)
+    if organization_id is not None:
+        return {"organization_id": organization_id}
+
+    headers = {}
+    headers["Content-type"] = "application/json"
+    headers["Authorization"] = f"Bearer {token}"
+    response = http_session.post(
+        f"https://cloudresourcemanager.googleapis.com/v1/projects/{project_id}:getAncestry",
+        headers=headers,
+        timeout=10,
+    )
+
+    if response.status_code != 200:
+        return {
+            "response": flask.Response(
+                status=error_code,
+                response=json.dumps({"status": "BLOCKED", "reason": "UNKNOWN_STATUS"}),
+            )
+        }
+
+    organization_id = None
+    for ancestor_dict in response.json().get("ancestor", []):
+        if ancestor_dict["resourceId"]["type"] == "organization":
+            organization_id = ancestor_dict["resourceId"]["id"]
+    if not organization_id:
+        return {
+            "response": flask.Response(
+                status=error_code,
+                response=json.dumps({"status": "BLOCKED", "reason": "NO_ORGANIZATION"}),
+            )
+        }
+    RESOLUTION_CACHE.set(cache_key, organization_id)
+    return {"organization_id": organization_id}
+
+
 def get_service_perimeter_data_uri(
     token,
     project_id,
@@ -122,11 +214,17 @@ def get_service_perimeter_data_uri(
     perimeter_title="df_webhook",
 ):
     """Get uri for for service perimeter."""
+    cache_key = get_resolution_cache_key(
+        token, project_id, "perimeter_uri", access_policy_name, perimeter_title
+    )
+    uri = RESOLUTION_CACHE.get(cache_key)
+    if uri is not None:
+        return {"uri": uri}
     access_policy_id = access_policy_name.split("/")[1]
     headers = {}
     headers["x-goog-user-project"] = project_id
     headers["Authorization"] = f"Bearer {token}"
-    response = requests.get(
+    response = http_session.get(
         (
             f"https://accesscontextmanager.googleapis.com/v1/"
             f"accessPolicies/{access_policy_id}/servicePerimeters"
@@ -163,12 +261,12 @@ def get_service_perimeter_data_uri(
 
     for service_perimeter_dict in response.json().get("servicePerimeters", []):
         if service_perimeter_dict["title"] == perimeter_title:
-            return {
-                "uri": (
-                    "https://accesscontextmanager.googleapis.com/v1/"
-                    f'{service_perimeter_dict["name"]}'
-                )
-            }
+            uri = (
+                "https://accesscontextmanager.googleapis.com/v1/"
+                f'{service_perimeter_dict["name"]}'
+            )
+            RESOLUTION_CACHE.set(cache_key, uri)
+            return {"uri": uri}
 
     return {
         "response": flask.Response(
@@ -187,7 +285,7 @@ def get_service_perimeter_status(token, project_id, access_policy_name):
     if "response" in response:
         return response
     service_perimeter_data_uri = response["uri"]
-    result = requests.get(service_perimeter_data_uri, headers=headers, timeout=10)
+    result = http_session.get(service_perimeter_data_uri, headers=headers, timeout=10)
     if result.status_code != 200:
         logger.info("  accesscontextmanager API rejected request: %s", result.text)
         if (result.json()["error"]["status"] == "PERMISSION_DENIED") and (
@@ -241,12 +339,24 @@ def get_restricted_services_status(token, project_id, access_policy_name):
     return status_dict
 
 
+def get_access_policy_restricted_services_status(
+    token, project_id, access_policy_title
+):
+    """Resolve the access policy by title and check its restricted services."""
+    response = get_access_policy_name(token, access_policy_title, project_id)
+    if "response" in response:
+        return response
+    return get_restricted_services_status(
+        token, project_id, response["access_policy_name"]
+    )
+
+
 def check_function_exists(token, project_id, region, function_name):
     """Check if function exists using cloudfunctions api."""
     headers = {}
     headers["x-goog-user-project"] = project_id
     headers["Authorization"] = f"Bearer {token}"
-    result = requests.get(
+    result = http_session.get(
         (
             f"https://cloudfunctions.googleapis.com/v1/"
             f"projects/{project_id}/locations/{region}/functions/{function_name}"
@@ -329,7 +439,7 @@ def get_agents(token, project_id, region):  # pylint: disable=too-many-branches
                 response=json.dumps({"status": "BLOCKED", "reason": "UNKNOWN_REGION"}),
             )
         }
-    result = requests.get(
+    result = http_session.get(
         (
             f"https://{region}-dialogflow.googleapis.com/v3/"
             f"projects/{project_id}/locations/{region}/agents"
@@ -423,7 +533,7 @@ def get_webhooks(token, agent_name, project_id, region):
     headers = {}
     headers["x-goog-user-project"] = project_id
     headers["Authorization"] = f"Bearer {token}"
-    result = requests.get(
+    result = http_session.get(
         f"https://{region}-dialogflow.googleapis.com/v3/{agent_name}/webhooks",
         headers=headers,
         timeout=10,
@@ -485,11 +595,9 @@ def get_restricted_service_status(request, service_key):
     project_id, token = data["project_id"], data["token"]
     access_policy_title = request.args.get("access_policy_title", None)
 
-    response = get_access_policy_name(token, access_policy_title, project_id)
-    if "response" in response:
-        return response["response"]
-    access_policy_name = response["access_policy_name"]
-    status_dict = get_restricted_services_status(token, project_id, access_policy_name)
+    status_dict = get_access_policy_restricted_services_status(
+        token, project_id, access_policy_title
+    )
     if "response" in status_dict:
         return status_dict["response"]
 
@@ -15,11 +15,15 @@
 """Module for testing asset_blueprint.py."""
 
 import json
+import threading
 
 import analytics_utilities as au
 import asset_utilities as asu
 import get_token
+import jobs
 import pytest
+import tf_state
+import tf_stream
 from asset_blueprint import ACCESS_POLICY_RESOURCE
 from asset_blueprint import asset as blueprint
 from conftest import MOCK_DOMAIN
@@ -246,7 +250,7 @@ def test_asset_status_access_policy_err(mock_validate_project_id, app):
 
 
 @pytest.mark.parametrize(
-    "app, mock_policy,tf_state_list_err,expected",
+    "app, mock_policy,state_err,expected",
     [
         (
             blueprint,
@@ -288,7 +292,7 @@ def test_asset_status(  # pylint: disable=too-many-arguments
     mock_tf_init,
     app,
     mock_policy,
-    tf_state_list_err,
+    state_err,
     expected,
 ):
     """Test /asset_status"""
@@ -298,10 +302,10 @@ def test_asset_status(  # pylint: disable=too-many-arguments
     else:
         addr = "MOCK_ADDR"
         policy_return_value = None
-    if tf_state_list_err:
-        state_list_return_value = {"response": "MOCK_RESPONSE"}
+    if state_err:
+        state_return_value = {"response": "MOCK_RESPONSE"}
     else:
-        state_list_return_value = {"resources": "MOCK_RESOURCES"}
+        state_return_value = {"resources": "MOCK_RESOURCES", "resource_id_dict": {}}
 
     endpoint = "/asset_status"
     with patch.object(
@@ -325,53 +329,124 @@ def test_asset_status(  # pylint: disable=too-many-arguments
                 asu, "get_access_policy_title", return_value=policy_return_value
             ):
                 with patch.object(
-                    asu, "tf_state_list", return_value=state_list_return_value
+                    tf_state, "get_state", return_value=state_return_value
                 ):
                     return_value = get_result(app, endpoint)
     assert_response(return_value, 200, endpoint, expected)
     mock_tf_init.assert_called_once()
     mock_validate_project_id.assert_called_once()
-    if not tf_state_list_err:
+    if not state_err:
         mock_register_action.assert_called_once()
 
 
+@pytest.mark.parametrize("app", [blueprint], indirect=["app"])
+@patch.object(asu, "tf_plan")
+@patch.object(asu, "tf_init")
+@patch.object(au, "register_action", new_callable=generate_mock_register_action)
+@patch.object(asu, "validate_project_id", return_value=None)
+def test_asset_status_without_update(
+    mock_validate_project_id,
+    mock_register_action,
+    mock_tf_init,
+    mock_tf_plan,
+    app,
+    state_dir,
+):
+    """Test /asset_status, status read from the state without terraform."""
+    state_path = state_dir / "terraform" / "MOCK_PROJECT_ID" / "default.tfstate"
+    state_path.parent.mkdir(parents=True)
+    state_path.write_text(
+        json.dumps(
+            {
+                "resources": [
+                    {
+                        "module": "module.service_perimeter",
+                        "mode": "managed",
+                        "type": "google_access_context_manager_access_policy",
+                        "name": "access_policy",
+                        "instances": [
+                            {"index_key": 0, "attributes": {"id": "MOCK_ID_VALUE"}}
+                        ],
+                    }
+                ]
+            }
+        )
+    )
+    endpoint = "/asset_status"
+    with patch.object(
+        get_token, "get_token", return_value={"access_token": "MOCK_ACCESS_TOKEN"}
+    ):
+        with patch.object(
+            asu,
+            "get_access_policy_title",
+            return_value={"access_policy_title": "MOCK_ACCESS_POLICY_TITLE"},
+        ):
+            return_value = get_result(
+                app,
+                endpoint,
+                query_dict={"project_id": "MOCK_PROJECT_ID", "update": "false"},
+            )
+    assert_response(
+        return_value,
+        200,
+        endpoint,
+        json.dumps(
+            {
+                "status": "OK",
+                "resources": [ACCESS_POLICY_RESOURCE],
+                "resource_id_dict": {ACCESS_POLICY_RESOURCE: "MOCK_ID_VALUE"},
+                "accessPolicyTitle": "MOCK_ACCESS_POLICY_TITLE",
+            }
+        ),
+    )
+    mock_tf_init.assert_not_called()
+    mock_tf_plan.assert_not_called()
+    mock_validate_project_id.assert_called_once()
+    mock_register_action.assert_called_once()
+
+
+MOCK_OUTCOMES = {"MOCK_TARGET_1": "applied", "MOCK_TARGET_2": "unchanged"}
+
+
 @pytest.mark.parametrize(
-    "app,json_data,call_count,apply_return_value,state",
+    "app,json_data,apply_return_value,state",
     [
-        (blueprint, {"destroy": False}, 1, None, {"response": "MOCK_RESPONSE"}),
+        (blueprint, {"destroy": False}, None, {"response": "MOCK_RESPONSE"}),
+        (
+            blueprint,
+            {"destroy": False},
+            "MOCK_APPLY_RETURN_VALUE",
+            {"response": "MOCK_RESPONSE"},
+        ),
+        (blueprint, {"destroy": False}, None, {"resources": ["MOCK_RESOURCE"]}),
         (
             blueprint,
             {"destroy": False, "targets": ["all"]},
-            1,
             None,
             {"response": "MOCK_RESPONSE"},
         ),
         (
             blueprint,
-            {"destroy": False, "targets": ["MOCK_TARGET"]},
-            1,
-            None,
+            {"destroy": False, "targets": ["MOCK_TARGET_1"]},
+            {"targets": {"MOCK_TARGET_1": "applied"}},
             {"response": "MOCK_RESPONSE"},
         ),
         (
             blueprint,
             {"destroy": False, "targets": ["MOCK_TARGET_1", "MOCK_TARGET_2"]},
-            2,
-            "MOCK_APPLY_RETURN_VALUE",
+            {"response": "MOCK_APPLY_RETURN_VALUE"},
             {"response": "MOCK_RESPONSE"},
         ),
         (
             blueprint,
             {"destroy": False, "targets": ["MOCK_TARGET_1", "MOCK_TARGET_2"]},
-            2,
-            None,
+            {"targets": MOCK_OUTCOMES},
             {"response": "MOCK_RESPONSE"},
         ),
         (
             blueprint,
             {"destroy": False, "targets": ["MOCK_TARGET_1", "MOCK_TARGET_2"]},
-            2,
-            None,
+            {"targets": MOCK_OUTCOMES},
             {"resources": ["MOCK_RESOURCE"]},
         ),
     ],
@@ -384,7 +459,7 @@ def test_asset_status(  # pylint: disable=too-many-arguments
 )
 @patch.object(au, "register_action", new_callable=generate_mock_register_action)
 @patch.object(asu, "validate_project_id", return_value=None)
-def test_update_target(  # pylint: disable=too-many-arguments
+def test_update_target(  # pylint: disable=too-many-arguments,too-many-locals
     mock_validate_project_id,
     mock_register_action,
     mock_get_token,
@@ -392,38 +467,49 @@ def test_update_target(  # pylint: disable=too-many-arguments
     mock_tf_init,
     app,
     json_data,
-    call_count,
     apply_return_value,
     state,
 ):
-    """test /update_target,"""
+    """test /update_target, targets of a list applied together."""
     endpoint = "/update_target"
+    targeted = json_data.get("targets", ["all"]) != ["all"]
     with patch.object(
-        asu, "tf_apply", return_value=apply_return_value
+        asu, "tf_apply", return_value=None if targeted else apply_return_value
     ) as mock_tf_apply:
-        with patch.object(asu, "tf_state_list", return_value=state):
-            return_value = get_result(
-                app,
-                endpoint,
-                method="post",
-                json_data=json_data,
-            )
+        with patch.object(
+            asu,
+            "tf_apply_targets",
+            return_value=apply_return_value if targeted else None,
+        ) as mock_tf_apply_targets:
+            with patch.object(tf_state, "get_state", return_value=state):
+                return_value = get_result(
+                    app,
+                    endpoint,
+                    method="post",
+                    json_data=json_data,
+                )
     mock_get_token.assert_called_once()
     mock_tf_init.assert_called_once()
     mock_validate_project_id.assert_called_once()
-    assert mock_tf_plan.call_count == call_count
-    assert mock_tf_apply.call_count == call_count
-    if apply_return_value:
+    mock_tf_plan.assert_called_once()
+    if targeted:
+        assert mock_tf_plan.call_args.kwargs["target"] == json_data["targets"]
+        mock_tf_apply_targets.assert_called_once()
+        mock_tf_apply.assert_not_called()
+        apply_failed = "response" in apply_return_value
+    else:
+        mock_tf_apply.assert_called_once()
+        mock_tf_apply_targets.assert_not_called()
+        apply_failed = apply_return_value is not None
+    if apply_failed:
         assert_response(return_value, 200, endpoint, "MOCK_APPLY_RETURN_VALUE")
     elif "response" in state:
         assert_response(return_value, 200, endpoint, "MOCK_RESPONSE")
     else:
-        assert_response(
-            return_value,
-            200,
-            endpoint,
-            json.dumps({"status": "OK", "resources": ["MOCK_RESOURCE"]}),
-        )
+        expected = {"status": "OK", "resources": ["MOCK_RESOURCE"]}
+        if targeted:
+            expected["targets"] = MOCK_OUTCOMES
+        assert_response(return_value, 200, endpoint, json.dumps(expected))
         mock_register_action.assert_called_once()
 
 
@@ -480,3 +566,153 @@ def test_update_target_bad_plan(
     mock_tf_init.assert_called_once()
     mock_validate_project_id.assert_called_once()
     assert_response(return_value, 200, endpoint, "MOCK_RESPONSE")
+
+
+@pytest.mark.parametrize("app", [blueprint], indirect=["app"])
+@patch.object(
+    get_token, "get_token", return_value={"access_token": "MOCK_ACCESS_TOKEN"}
+)
+@patch.object(asu, "validate_project_id", return_value=None)
+def test_asset_events(mock_validate_project_id, mock_get_token, app):
+    """Test /asset_events, events of the latest run of the project."""
+    with tf_stream.CHANNELS.open_run("MOCK_PROJECT_ID") as channel:
+        channel.publish({"type": "apply_complete"})
+    endpoint = "/asset_events"
+    return_value = get_result(app, endpoint)
+    assert return_value.status_code == 200
+    assert return_value.mimetype == "text/event-stream"
+    assert return_value.get_data(as_text=True) == (
+        "retry: 5000\n\n"
+        f"id: {channel.run_id}:0\nevent: apply_complete\n"
+        'data: {"type": "apply_complete"}\n\n'
+        f"id: {channel.run_id}:end\nevent: run_complete\ndata: {{}}\n\n"
+    )
+    mock_get_token.assert_called_once()
+    mock_validate_project_id.assert_called_once()
+
+
+@pytest.mark.parametrize("app", [blueprint], indirect=["app"])
+@patch.object(asu, "tf_init", return_value=None)
+@patch.object(asu, "tf_plan", return_value=None)
+@patch.object(
+    get_token, "get_token", return_value={"access_token": "MOCK_ACCESS_TOKEN"}
+)
+@patch.object(au, "register_action", new_callable=generate_mock_register_action)
+@patch.object(asu, "validate_project_id", return_value=None)
+def test_update_target_async(  # pylint: disable=too-many-arguments
+    mock_validate_project_id,
+    mock_register_action,
+    mock_get_token,
+    mock_tf_plan,
+    mock_tf_init,
+    app,
+):
+    """test /update_target, run as a job read from /job_status and /job_result."""
+    query_dict = {
+        "project_id": "MOCK_PROJECT_ID",
+        "region": "MOCK_REGION",
+        "bucket": "MOCK_BUCKET_NAME",
+        "async": "true",
+    }
+    with patch.object(asu, "tf_apply_targets", return_value={"targets": MOCK_OUTCOMES}):
+        with patch.object(
+            tf_state, "get_state", return_value={"resources": ["MOCK_RESOURCE"]}
+        ):
+            return_value = get_result(
+                app,
+                "/update_target",
+                method="post",
+                json_data={"destroy": False, "targets": list(MOCK_OUTCOMES)},
+                query_dict=query_dict,
+            )
+            assert return_value.status_code == 202
+            job_dict = json.loads(return_value.get_data())["job"]
+            job = jobs.get_job_queue().get(job_dict["job_id"])
+            assert job.wait(5)
+    assert mock_register_action.called_counter == 0
+    mock_tf_init.assert_called_once()
+    mock_tf_plan.assert_called_once()
+
+    query_dict = {"project_id": "MOCK_PROJECT_ID", "job_id": job_dict["job_id"]}
+    return_value = get_result(app, "/job_status", query_dict=query_dict)
+    assert json.loads(return_value.get_data())["job"]["state"] == jobs.DONE
+    return_value = get_result(app, "/job_result", query_dict=query_dict)
+    assert_response(
+        return_value,
+        200,
+        "/job_result",
+        json.dumps(
+            {
+                "status": "OK",
+                "resources": ["MOCK_RESOURCE"],
+                "targets": MOCK_OUTCOMES,
+            }
+        ),
+    )
+    mock_register_action.assert_called_once()
+    assert mock_get_token.call_count == 3
+    assert mock_validate_project_id.call_count == 3
+
+
+@pytest.mark.parametrize("app", [blueprint], indirect=["app"])
+@patch.object(
+    get_token, "get_token", return_value={"access_token": "MOCK_ACCESS_TOKEN"}
+)
+@patch.object(asu, "validate_project_id", return_value=None)
+def test_job_result_not_ready(mock_validate_project_id, mock_get_token, app):
+    """test /job_result, before the job is finished and for another project."""
+    release = threading.Event()
+    job = jobs.get_job_queue().submit("MOCK_PROJECT_ID", release.wait, 5)
+    query_dict = {"project_id": "MOCK_PROJECT_ID", "job_id": job.job_id}
+    return_value = get_result(app, "/job_result", query_dict=query_dict)
+    assert return_value.status_code == 202
+    assert json.loads(return_value.get_data())["status"] == "PENDING"
+
+    query_dict["project_id"] = "MOCK_OTHER_PROJECT_ID"
+    for endpoint in ["/job_status", "/job_result"]:
+        return_value = get_result(app, endpoint, query_dict=query_dict)
+        assert return_value.status_code == 404
+    release.set()
+    assert job.wait(5)
+    assert mock_get_token.call_count == 3
+    assert mock_validate_project_id.call_count == 3
+
+
+@pytest.mark.parametrize("app", [blueprint], indirect=["app"])
+@patch.object(
+    get_token, "get_token", return_value={"access_token": "MOCK_ACCESS_TOKEN"}
+)
+@patch.object(asu, "validate_project_id", return_value=None)
+def test_job_result_failed(mock_validate_project_id, mock_get_token, app):
+    """test /job_result, for a job that raised an error."""
+    job = jobs.get_job_queue().submit("MOCK_PROJECT_ID", int, "MOCK_NOT_A_NUMBER")
+    assert job.wait(5)
+    query_dict = {"project_id": "MOCK_PROJECT_ID", "job_id": job.job_id}
+    return_value = get_result(app, "/job_result", query_dict=query_dict)
+    assert return_value.status_code == 500
+    assert json.loads(return_value.get_data())["job"]["state"] == jobs.FAILED
+    mock_get_token.assert_called_once()
+    mock_validate_project_id.assert_called_once()
+
+
+@pytest.mark.parametrize("app", [blueprint], indirect=["app"])
+@patch.object(
+    get_token, "get_token", return_value={"access_token": "MOCK_ACCESS_TOKEN"}
+)
+@patch.object(asu, "validate_project_id", return_value=None)
+def test_asset_status_async_queue_full(mock_validate_project_id, mock_get_token, app):
+    """test /asset_status, too many queued jobs for the project."""
+    query_dict = {"project_id": "MOCK_PROJECT_ID", "async": "true"}
+    with patch.object(
+        jobs.InProcessJobQueue, "submit", side_effect=jobs.QueueFullError("MOCK")
+    ) as mock_submit:
+        return_value = get_result(app, "/asset_status", query_dict=query_dict)
+    assert_response(
+        return_value,
+        429,
+        "/asset_status",
+        json.dumps({"status": "BLOCKED", "reason": "TOO_MANY_JOBS"}),
+    )
+    mock_submit.assert_called_once()
+    mock_get_token.assert_called_once()
+    mock_validate_project_id.assert_called_once()
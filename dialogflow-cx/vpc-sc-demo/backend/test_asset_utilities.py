@@ -14,14 +14,16 @@
 
 """Module for testing asset_utilities.py."""
 
+import io
 import json
 import logging
 import os
 
 import asset_utilities as asu
+import http_session
 import pytest
-import requests
 import status_utilities as su
+import tf_stream
 from conftest import MockReturnObject, assert_response
 from google.oauth2 import service_account
 from invoke import MockContext as MockContextBase
@@ -50,6 +52,26 @@ class MockPromise:  # pylint: disable=too-few-public-methods
         return self.result
 
 
+class MockProcess:
+    """Class for mocking the interface of subprocess.Popen used by tf_stream."""
+
+    def __init__(self, stdout, returncode=0):
+        """Initialize with the output the process writes."""
+        self.stdout = io.StringIO(stdout)
+        self.stderr = io.StringIO("MOCK_STDERR")
+        self.returncode = returncode
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def wait(self):
+        """Implement wait interface."""
+        return self.returncode
+
+
 class MockContext(MockContextBase):
     """Enhance invoke.MockContext to work with Promise."""
 
@@ -66,7 +88,7 @@ class MockContext(MockContextBase):
 def test_get_access_policy_title_success():
     """Test get_access_policy_title, success"""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             200,
@@ -81,7 +103,7 @@ def test_get_access_policy_title_success():
 def test_get_access_policy_title_server_error():
     """Test get_access_policy_title, server error"""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             500,
@@ -239,11 +261,11 @@ def test_tf_init(debug, exited, request_args):  # pylint: disable=redefined-oute
 def test_tf_plan(debug, message, request_args):  # pylint: disable=redefined-outer-name
     """Test tf_plan."""
     mock_stdout = "\n".join([message])
-    context = MockContext()
-    context.set_result(MockPromise(MockResult(False, mock_stdout, "MOCK_STDERR")))
-    with patch.object(service_account, "Credentials", return_value="MOCK_CREDENTIALS"):
+    with patch.object(
+        tf_stream.subprocess, "Popen", return_value=MockProcess(mock_stdout)
+    ):
         result = asu.tf_plan(
-            context,
+            MockContext(),
             "MOCK_MODULE",
             "MOCK_WORKDIR",
             asu.get_terraform_env(
@@ -293,11 +315,11 @@ def test_tf_apply(debug, message, request_args):  # pylint: disable=redefined-ou
     message_list = [message, "BAD_LINE"]
     mock_stdout = "\n".join(message_list)
     assert len(mock_stdout.split("\n")) == len(message_list)
-    context = MockContext()
-    context.set_result(MockPromise(MockResult(False, mock_stdout, "MOCK_STDERR")))
-    with patch.object(service_account, "Credentials", return_value="MOCK_CREDENTIALS"):
+    with patch.object(
+        tf_stream.subprocess, "Popen", return_value=MockProcess(mock_stdout)
+    ):
         result = asu.tf_apply(
-            context,
+            MockContext(),
             "MOCK_MODULE",
             "MOCK_WORKDIR",
             asu.get_terraform_env(
@@ -321,53 +343,62 @@ def test_tf_apply(debug, message, request_args):  # pylint: disable=redefined-ou
 
 @pytest.mark.hermetic
 @pytest.mark.parametrize(
-    "debug,exited,stdout",
+    "message,expected",
     [
-        (False, True, "MOCK_STDOUT"),
-        (True, False, "MOCK_STDOUT"),
-        (True, True, "MOCK_STDOUT"),
-        (False, False, "MOCK_STDOUT"),
-    ]
-    + [
-        (False, False, "\n".join(resource_list))
-        for resource_list in asu.RESOURCE_GROUP.values()
+        (
+            {
+                "@level": "info",
+                "type": "apply_complete",
+                "hook": {"resource": {"addr": "module.services.MOCK_RESOURCE"}},
+            },
+            {"targets": {"module.services": "applied", "MOCK_TARGET": "unchanged"}},
+        ),
+        (
+            {
+                "@level": "error",
+                "type": "diagnostic",
+                "diagnostic": {"severity": "error", "address": "MOCK_TARGET[0]"},
+            },
+            {
+                "status": "ERROR",
+                "errors": [
+                    {
+                        "@level": "error",
+                        "type": "diagnostic",
+                        "diagnostic": {
+                            "severity": "error",
+                            "address": "MOCK_TARGET[0]",
+                        },
+                    }
+                ],
+                "targets": {"module.services": "unchanged", "MOCK_TARGET": "failed"},
+            },
+        ),
     ],
 )
-def test_tf_state_list(
-    debug,
-    exited,
-    stdout,
-    request_args,  # pylint: disable=redefined-outer-name
-):
-    """Test tf_state_list."""
-    context = MockContext()
-    context.set_result(MockPromise(MockResult(exited, stdout, "MOCK_STDERR")))
-    with patch.object(service_account, "Credentials", return_value="MOCK_CREDENTIALS"):
-        result = asu.tf_state_list(
-            context,
+def test_tf_apply_targets(
+    message, expected, request_args
+):  # pylint: disable=redefined-outer-name
+    """Test tf_apply_targets, all targets in one apply."""
+    with patch.object(
+        tf_stream.subprocess, "Popen", return_value=MockProcess(json.dumps(message))
+    ) as mock_popen:
+        result = asu.tf_apply_targets(
+            MockContext(),
             "MOCK_MODULE",
             "MOCK_WORKDIR",
-            asu.get_terraform_env(
-                "MOCK_ACCESS_TOKEN",
-                request_args,
-                debug=debug,
-            ),
-        )
-    if exited:
-        assert_response(
-            result,
-            500,
-            {
-                "status": "ERROR",
-                "stdout": "MOCK_STDOUT",
-                "stderr": "MOCK_STDERR",
-            },
+            asu.get_terraform_env("MOCK_ACCESS_TOKEN", request_args),
+            False,
+            ["module.services", "MOCK_TARGET"],
         )
+    mock_popen.assert_called_once()
+    command = mock_popen.call_args.args[0]
+    assert command.endswith("-target=module.services -target=MOCK_TARGET")
+    assert f"-parallelism={asu.PARALLELISM}" in command
+    if "response" in result:
+        assert_response(result, 500, expected)
     else:
-        if stdout != "MOCK_STDOUT":
-            assert len(result["resources"]) == 1 + len(stdout.split())
-        else:
-            assert result == {"resources": ["MOCK_STDOUT"]}
+        assert result == expected
 
 
 @pytest.mark.parametrize("request_debug", ["true", "false"])
@@ -387,7 +418,7 @@ def test_get_debug(request_debug, logging_level, mock_request):
     assert asu.get_debug(mock_request) == expected
 
 
-@patch.object(requests, "get", return_value=MockReturnObject(0))
+@patch.object(http_session, "get", return_value=MockReturnObject(0))
 def test_validate_project_id_failure(mock_requests_get):
     """Test validate_project_id failure."""
     result = asu.validate_project_id("MOCK_PROJECT_ID", "MOCK_ACCESS_TOKEN")
@@ -402,7 +433,7 @@ def test_validate_project_id_failure(mock_requests_get):
     )
 
 
-@patch.object(requests, "get", return_value=MockReturnObject(200))
+@patch.object(http_session, "get", return_value=MockReturnObject(200))
 def test_validate_project_id_success(mock_requests_get):
     """Test validate_project_id success."""
     response = asu.validate_project_id("MOCK_PROJECT_ID", "MOCK_ACCESS_TOKEN")
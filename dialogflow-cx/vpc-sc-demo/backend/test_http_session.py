@@ -0,0 +1,54 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for testing http_session.py."""
+
+import http_session
+import pytest
+from conftest import MockReturnObject
+from mock import patch
+
+
+@pytest.mark.hermetic
+def test_create_session():
+    """Sessions pool connections per host and never keep cookies."""
+    session = http_session.create_session(pool_connections=2, pool_maxsize=3)
+    adapter = session.get_adapter("https://cloudresourcemanager.googleapis.com")
+    assert adapter._pool_connections == 2  # pylint: disable=protected-access
+    assert adapter._pool_maxsize == 3  # pylint: disable=protected-access
+    assert adapter._pool_block is True  # pylint: disable=protected-access
+
+    policy = session.cookies.get_policy()
+    assert isinstance(policy, http_session.RejectAllCookies)
+    assert not policy.set_ok(None, None)
+    assert not policy.return_ok(None, None)
+
+
+@pytest.mark.hermetic
+def test_get_session_is_shared():
+    """Every call reuses the same session."""
+    assert http_session.get_session() is http_session.get_session()
+
+
+@pytest.mark.hermetic
+@pytest.mark.parametrize("method", ["get", "post", "patch"])
+def test_methods_use_shared_session(method):
+    """Module functions send requests through the shared session."""
+    session = http_session.get_session()
+    with patch.object(
+        session, method, return_value=MockReturnObject(200)
+    ) as mock_method:
+        result = getattr(http_session, method)("MOCK_URL", timeout=10)
+    assert result.status_code == 200
+    mock_method.assert_called_once_with("MOCK_URL", timeout=10)
@@ -0,0 +1,114 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for testing jobs.py."""
+
+import threading
+
+import jobs
+import pytest
+
+TIMEOUT = 5
+
+
+@pytest.fixture(name="queue")
+def fixture_queue():
+    """Job queue with two workers."""
+    queue = jobs.InProcessJobQueue(max_workers=2, max_finished_jobs=2)
+    yield queue
+    queue.shutdown()
+
+
+@pytest.mark.hermetic
+def test_submit(queue):
+    """Test InProcessJobQueue.submit, result of the function."""
+    job = queue.submit("MOCK_PROJECT_ID", lambda x, y=0: x + y, 1, y=2)
+    assert queue.get(job.job_id) is job
+    assert job.wait(TIMEOUT)
+    assert job.state == jobs.DONE
+    assert job.result == 3
+    assert job.args == ()
+    assert job.to_dict()["finished_at"] >= job.to_dict()["started_at"]
+
+
+@pytest.mark.hermetic
+def test_submit_error(queue):
+    """Test InProcessJobQueue.submit, error raised by the function."""
+
+    def fail():
+        raise ValueError("MOCK_ERROR")
+
+    job = queue.submit("MOCK_PROJECT_ID", fail)
+    assert job.wait(TIMEOUT)
+    assert job.state == jobs.FAILED
+    assert job.error == "MOCK_ERROR"
+
+
+@pytest.mark.hermetic
+def test_one_job_per_project(queue):
+    """Test InProcessJobQueue, jobs of a project run one after the other."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(TIMEOUT)
+
+    first = queue.submit("MOCK_PROJECT_ID", block)
+    second = queue.submit("MOCK_PROJECT_ID", lambda: "MOCK_SECOND")
+    other = queue.submit("MOCK_OTHER_PROJECT_ID", lambda: "MOCK_OTHER")
+    assert started.wait(TIMEOUT)
+    assert other.wait(TIMEOUT)
+    assert first.state == jobs.RUNNING
+    assert second.state == jobs.QUEUED
+    release.set()
+    assert second.wait(TIMEOUT)
+    queue.shutdown()
+    assert first.finished_at <= second.started_at
+    assert queue.waiting == {}
+
+
+@pytest.mark.hermetic
+def test_finished_jobs_pruned(queue):
+    """Test InProcessJobQueue, only the latest finished jobs are kept."""
+    submitted = [queue.submit("MOCK_PROJECT_ID", lambda: None) for _ in range(4)]
+    assert submitted[-1].wait(TIMEOUT)
+    queue.shutdown()
+    assert [queue.get(job.job_id) for job in submitted] == [None, None] + submitted[2:]
+
+
+@pytest.mark.hermetic
+def test_queued_jobs_capped():
+    """Test InProcessJobQueue.submit, queued jobs of a project are capped."""
+    queue = jobs.InProcessJobQueue(max_workers=2, max_queued_jobs=1)
+    release = threading.Event()
+    try:
+        queue.submit("MOCK_PROJECT_ID", release.wait, TIMEOUT)
+        queued = queue.submit("MOCK_PROJECT_ID", lambda: "MOCK_QUEUED")
+        with pytest.raises(jobs.QueueFullError):
+            queue.submit("MOCK_PROJECT_ID", lambda: None)
+        assert queue.submit("MOCK_OTHER_PROJECT_ID", lambda: None).wait(TIMEOUT)
+        assert len(queue.jobs) == 3
+    finally:
+        release.set()
+        queue.shutdown()
+    assert queued.state == jobs.DONE
+    assert queued.result == "MOCK_QUEUED"
+
+
+@pytest.mark.hermetic
+def test_job_queue_abstract():
+    """Test JobQueue, queues implement submit and get."""
+    with pytest.raises(TypeError):
+        jobs.JobQueue()  # pylint: disable=abstract-class-instantiated
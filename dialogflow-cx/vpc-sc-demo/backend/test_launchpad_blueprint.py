@@ -18,6 +18,7 @@ import json
 
 import flask
 import get_token
+import http_session
 import pytest
 import requests
 from launchpad_blueprint import launchpad as blueprint
@@ -78,7 +79,7 @@ def test_validate_project_id(  # pylint: disable=too-many-arguments
         requests_return_value.status_code = -1
 
     with patch.object(get_token, "get_token", return_value=token_dict):
-        with patch.object(requests, "get", return_value=requests_return_value):
+        with patch.object(http_session, "get", return_value=requests_return_value):
             with app.test_client() as curr_client:
                 mock_domain = "MOCK_DOMAIN."
                 return_value = curr_client.get(
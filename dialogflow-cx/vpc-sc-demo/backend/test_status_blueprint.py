@@ -17,9 +17,10 @@
 import json
 from urllib.parse import urlparse
 
+import flask
 import get_token
+import http_session
 import pytest
-import requests
 import status_utilities as su
 from conftest import MOCK_DOMAIN, MockReturnObject
 from mock import patch
@@ -228,7 +229,9 @@ def test_webhook_ingress_internal_only_status_api_error(
         get_token, "get_token", return_value={"access_token": "MOCK_ACCESS_TOKEN"}
     ):
         with patch.object(su, "check_function_exists", return_value={"status": "OK"}):
-            with patch.object(requests, "get", return_value=MockReturnObject(500, {})):
+            with patch.object(
+                http_session, "get", return_value=MockReturnObject(500, {})
+            ):
                 return_value = get_result(
                     app, endpoint, mock_region=True, mock_webhook_name=True
                 )
@@ -253,7 +256,7 @@ def test_webhook_ingress_internal_only_status_success(app, ingress_settings, sta
     ):
         with patch.object(su, "check_function_exists", return_value={"status": "OK"}):
             with patch.object(
-                requests,
+                http_session,
                 "get",
                 return_value=MockReturnObject(
                     200, {"ingressSettings": ingress_settings}
@@ -343,7 +346,7 @@ def test_webhook_access_allow_unauthenticated_status_api_error(
     ):
         with patch.object(su, "check_function_exists", return_value={"status": "OK"}):
             with patch.object(
-                requests, "get", return_value=MockReturnObject(status, return_value)
+                http_session, "get", return_value=MockReturnObject(status, return_value)
             ):
                 return_value = get_result(
                     app, endpoint, mock_region=True, mock_webhook_name=True
@@ -392,7 +395,7 @@ def test_webhook_access_allow_unauthenticated_status_success(
     ):
         with patch.object(su, "check_function_exists", return_value={"status": "OK"}):
             with patch.object(
-                requests, "get", return_value=MockReturnObject(200, policy_dict)
+                http_session, "get", return_value=MockReturnObject(200, policy_dict)
             ):
                 return_value = get_result(
                     app, endpoint, mock_region=True, mock_webhook_name=True
@@ -527,3 +530,95 @@ def test_service_directory_webhook_fulfillment_status_success(
         endpoint,
         json.dumps(expected),
     )
+
+
+def mock_cloudfunctions_get(url, **kwargs):
+    """Mock the cloudfunctions API calls of the webhook status checks."""
+    del kwargs
+    if url.endswith(":getIamPolicy"):
+        return MockReturnObject(200, {"bindings": []})
+    return MockReturnObject(200, {"ingressSettings": "ALLOW_INTERNAL_ONLY"})
+
+
+@pytest.mark.hermetic
+@pytest.mark.parametrize("app", [blueprint], indirect=["app"])
+def test_status_all(app):
+    """Test status_all, prerequisites are resolved once."""
+    with patch.object(
+        get_token, "get_token", return_value={"access_token": "MOCK_ACCESS_TOKEN"}
+    ) as mock_get_token, patch.object(
+        su,
+        "get_access_policy_restricted_services_status",
+        return_value={
+            "cloudfunctions_restricted": True,
+            "dialogflow_restricted": False,
+        },
+    ) as mock_restricted, patch.object(
+        su, "check_function_exists", return_value={"status": "OK"}
+    ) as mock_function_exists, patch.object(
+        su,
+        "get_agents",
+        return_value={"data": {"Telecommunications": {"name": "MOCK_AGENT"}}},
+    ), patch.object(
+        su,
+        "get_webhooks",
+        return_value={"data": {"cxPrebuiltAgentsTelecom": {"serviceDirectory": {}}}},
+    ), patch.object(
+        http_session, "get", side_effect=mock_cloudfunctions_get
+    ):
+        return_value = get_result(
+            app,
+            "/status_all",
+            mock_region="us-central1",
+            mock_webhook_name="MOCK_WEBHOOK_NAME",
+        )
+    assert return_value.status_code == 200
+    assert json.loads(return_value.get_data(as_text=True)) == {
+        "restricted_services_status_cloudfunctions": {"status": True},
+        "restricted_services_status_dialogflow": {"status": False},
+        "webhook_ingress_internal_only_status": {"status": True},
+        "webhook_access_allow_unauthenticated_status": {"status": True},
+        "service_directory_webhook_fulfillment_status": {"status": True},
+    }
+    mock_get_token.assert_called_once()
+    mock_restricted.assert_called_once()
+    mock_function_exists.assert_called_once()
+
+
+@pytest.mark.hermetic
+@pytest.mark.parametrize("app", [blueprint], indirect=["app"])
+def test_status_all_blocked(app):
+    """Test status_all, blocked and failed checks are reported per key."""
+    blocked = {"status": "BLOCKED", "reason": "WEBHOOK_NOT_FOUND"}
+    with patch.object(
+        get_token, "get_token", return_value={"access_token": "MOCK_ACCESS_TOKEN"}
+    ), patch.object(
+        su,
+        "get_access_policy_restricted_services_status",
+        return_value={
+            "response": flask.Response(status=500, response="MOCK_ERROR"),
+        },
+    ), patch.object(
+        su,
+        "check_function_exists",
+        return_value={
+            "response": flask.Response(status=200, response=json.dumps(blocked))
+        },
+    ):
+        return_value = get_result(
+            app,
+            "/status_all",
+            mock_region="MOCK_REGION",
+            mock_webhook_name="MOCK_WEBHOOK_NAME",
+        )
+    error = {"status": "ERROR", "status_code": 500, "error": "MOCK_ERROR"}
+    assert json.loads(return_value.get_data(as_text=True)) == {
+        "webhook_ingress_internal_only_status": blocked,
+        "webhook_access_allow_unauthenticated_status": blocked,
+        "restricted_services_status_cloudfunctions": error,
+        "restricted_services_status_dialogflow": error,
+        "service_directory_webhook_fulfillment_status": {
+            "status": "BLOCKED",
+            "reason": "UNKNOWN_REGION",
+        },
+    }
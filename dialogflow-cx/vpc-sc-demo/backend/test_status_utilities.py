@@ -15,8 +15,8 @@
 """Module for testing status_utilities.py."""
 
 import get_token
+import http_session
 import pytest
-import requests
 import status_utilities as su
 from conftest import MockReturnObject, assert_response
 from mock import patch
@@ -26,7 +26,7 @@ from mock import patch
 def test_get_project_number():
     """Test get_project_number function."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(200, {"projectNumber": "MOCK_PROJECT_NUMBER"}),
     ):
@@ -37,7 +37,7 @@ def test_get_project_number():
 @pytest.mark.hermetic
 def test_get_project_number_no_project():
     """Test get_project_number function."""
-    with patch.object(requests, "get", return_value=MockReturnObject(200, {})):
+    with patch.object(http_session, "get", return_value=MockReturnObject(200, {})):
         result = su.get_project_number("MOCK_TOKEN", "MOCK_PROJECT_ID")
     assert_response(result, 200, {"status": "BLOCKED", "reason": "NO_PROJECT"})
 
@@ -54,7 +54,7 @@ def test_get_access_policy_name_no_policy(title):
 def test_get_access_policy_name_bad_token():
     """Test get_access_policy_name, bad token."""
     with patch.object(
-        requests,
+        http_session,
         "post",
         return_value=MockReturnObject(401, {"error": {"status": "UNAUTHENTICATED"}}),
     ):
@@ -67,7 +67,7 @@ def test_get_access_policy_name_bad_token():
 @pytest.mark.hermetic
 def test_get_access_policy_name_no_organization():
     """Test get_access_policy_name, bad organization."""
-    with patch.object(requests, "post", return_value=MockReturnObject(200, {})):
+    with patch.object(http_session, "post", return_value=MockReturnObject(200, {})):
         result = su.get_access_policy_name(
             "MOCK_TOKEN", "MOCK_PROJECT_TITLE", "MOCK_PROJECT_ID"
         )
@@ -78,7 +78,7 @@ def test_get_access_policy_name_no_organization():
 def test_get_access_policy_name_bad_project():
     """Test get_access_policy_name, bad project."""
     with patch.object(
-        requests,
+        http_session,
         "post",
         return_value=MockReturnObject(
             200,
@@ -99,7 +99,7 @@ def test_get_access_policy_name_bad_project():
 def test_get_access_policy_name_no_policy_found():
     """Test get_access_policy_name, bad policy configured."""
     with patch.object(
-        requests,
+        http_session,
         "post",
         return_value=MockReturnObject(
             200,
@@ -127,7 +127,7 @@ def test_get_access_policy_name_no_policy_found():
 def test_get_access_policy_name():
     """Test get_access_policy_name, found the policy."""
     with patch.object(
-        requests,
+        http_session,
         "post",
         return_value=MockReturnObject(
             200,
@@ -144,7 +144,7 @@ def test_get_access_policy_name():
             return_value={"project_number": "MOCK_PROJECT_NUMBER"},
         ):
             with patch.object(
-                requests,
+                http_session,
                 "get",
                 return_value=MockReturnObject(
                     200,
@@ -169,7 +169,7 @@ def test_get_access_policy_name():
 def test_get_service_perimeter_data_uri_api():
     """Test get service perimieter, ACCESS_CONTEXT_MANAGER_API_DISABLED"""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             401,
@@ -195,7 +195,7 @@ def test_get_service_perimeter_data_uri_api():
 def test_get_service_perimeter_data_uri_permission():
     """Test get service perimieter, permission denied"""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             401,
@@ -219,7 +219,7 @@ def test_get_service_perimeter_data_uri_permission():
 def test_get_service_perimeter_data_uri_unknown():
     """Test get service perimieter, unknown error."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             500,
@@ -239,7 +239,7 @@ def test_get_service_perimeter_data_uri_unknown():
 @pytest.mark.hermetic
 def test_get_service_perimeter_data_uri_no_perimeter():
     """Test get service perimieter, no perimeter."""
-    with patch.object(requests, "get", return_value=MockReturnObject(200, {})):
+    with patch.object(http_session, "get", return_value=MockReturnObject(200, {})):
         result = su.get_service_perimeter_data_uri(
             "MOCK_TOKEN", "MOCK_PROJECT_ID", "MOCK/MOCK_ACCESS_POLICY"
         )
@@ -252,7 +252,7 @@ def test_get_service_perimeter_data_uri_no_perimeter():
 def test_get_service_perimeter_data_uri_yes_perimeter():
     """Test get service perimieter, success"""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             200,
@@ -300,7 +300,7 @@ def test_get_service_perimeter_status_api_disabled():
         return_value={"uri": "http://MOCK_URI"},
     ):
         with patch.object(
-            requests,
+            http_session,
             "get",
             return_value=MockReturnObject(
                 401,
@@ -331,7 +331,7 @@ def test_get_service_perimeter_status_permission_denied():
         return_value={"uri": "http://MOCK_URI"},
     ):
         with patch.object(
-            requests,
+            http_session,
             "get",
             return_value=MockReturnObject(
                 401,
@@ -360,7 +360,7 @@ def test_get_service_perimeter_status_unknown_error():
         return_value={"uri": "http://MOCK_URI"},
     ):
         with patch.object(
-            requests,
+            http_session,
             "get",
             return_value=MockReturnObject(
                 500,
@@ -386,7 +386,7 @@ def test_get_service_perimeter_status_success():
         return_value={"uri": "http://MOCK_URI"},
     ):
         with patch.object(
-            requests, "get", return_value=MockReturnObject(200, ["MOCK_SUCCESS"])
+            http_session, "get", return_value=MockReturnObject(200, ["MOCK_SUCCESS"])
         ):
             result = su.get_service_perimeter_status(
                 "MOCK_TOKEN", "MOCK_PROJECT_ID", "MOCK/MOCK_ACCESS_POLICY"
@@ -472,7 +472,7 @@ def test_get_restricted_services_status_parameterize(status, expected):
 def test_check_function_exists_cloudfunctions_404():
     """Test check_function_exists, 404 error webhook not found"""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(404, {"error": {"status": "NOT_FOUND"}}),
     ):
@@ -488,7 +488,7 @@ def test_check_function_exists_cloudfunctions_404():
 def test_check_function_exists_cloudfunctions_api_not_used():
     """Test check_function_exists, api not set up."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             403,
@@ -511,7 +511,7 @@ def test_check_function_exists_cloudfunctions_api_not_used():
 def test_check_function_exists_permission_denied_iam():
     """Test check_function_exists, iam issue."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             403,
@@ -535,7 +535,7 @@ def test_check_function_exists_permission_denied_iam():
 def test_check_function_exists_permission_denied_vpc():
     """Test check_function_exists, vpc in place."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             403,
@@ -560,7 +560,7 @@ def test_check_function_exists_permission_denied_vpc():
 def test_check_function_exists_permission_denied_unknown_type():
     """Test check_function_exists, unknown error."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             403,
@@ -593,7 +593,7 @@ def test_check_function_exists_permission_denied_unknown_type():
 def test_check_function_exists_server_error():
     """Test check_function_exists, server error."""
     with patch.object(
-        requests, "get", return_value=MockReturnObject(500, ["SERVER_ERROR"])
+        http_session, "get", return_value=MockReturnObject(500, ["SERVER_ERROR"])
     ):
         result = su.check_function_exists(
             "MOCK_TOKEN", "MOCK_PROJECT_ID", "MOCK_REGION", "MOCK_FUNCTION_NAME"
@@ -604,7 +604,7 @@ def test_check_function_exists_server_error():
 @pytest.mark.hermetic
 def test_check_function_exists_success():
     """Test check_function_exists, success."""
-    with patch.object(requests, "get", return_value=MockReturnObject(200, {})):
+    with patch.object(http_session, "get", return_value=MockReturnObject(200, {})):
         result = su.check_function_exists(
             "MOCK_TOKEN", "MOCK_PROJECT_ID", "MOCK_REGION", "MOCK_FUNCTION_NAME"
         )
@@ -622,7 +622,7 @@ def test_get_agents_bad_region():
 def test_get_agents_api():
     """Test get_agents permission denied api not set up"""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             403,
@@ -644,7 +644,7 @@ def test_get_agents_api():
 def test_get_agents_iam():
     """Test get_agents permission denied iam permissions."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             403,
@@ -666,7 +666,7 @@ def test_get_agents_iam():
 def test_get_agents_vpc():
     """Test get_agents permission denied vpc."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             403,
@@ -689,7 +689,7 @@ def test_get_agents_vpc():
 def test_get_agents_permissions_unknown():
     """Test get_agents permission denied permissions unknown."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             403,
@@ -712,7 +712,7 @@ def test_get_agents_permissions_unknown():
 def test_get_agents_server_error():
     """Test get_agents server error."""
     with patch.object(
-        requests, "get", return_value=MockReturnObject(500, text="SERVER_ERROR")
+        http_session, "get", return_value=MockReturnObject(500, text="SERVER_ERROR")
     ):
         result = su.get_agents("MOCK_TOKEN", "MOCK_PROJECT_ID", "us-central1")
         assert_response(result, 500, {"error": "SERVER_ERROR"})
@@ -722,7 +722,7 @@ def test_get_agents_server_error():
 def test_get_agents_not_found():
     """Test get_agents agent not found."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             200,
@@ -737,7 +737,7 @@ def test_get_agents_not_found():
 def test_get_agents_potential_buggy_codepath():
     """I think this might be a buggy codepath, adding test for now to investigate later (TDD)."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             200,
@@ -752,7 +752,7 @@ def test_get_agents_potential_buggy_codepath():
 def test_get_agents_success():
     """Test get_agents success."""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             200,
@@ -767,7 +767,7 @@ def test_get_agents_success():
 def test_get_webhooks_vpc():
     """Test get_webhooks, access error vpc"""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             403,
@@ -792,7 +792,7 @@ def test_get_webhooks_vpc():
 def test_get_webhooks_server_error():
     """Test get_webhooks, access error vpc"""
     with patch.object(
-        requests, "get", return_value=MockReturnObject(500, text="SERVER_ERROR")
+        http_session, "get", return_value=MockReturnObject(500, text="SERVER_ERROR")
     ):
         result = su.get_webhooks(
             "MOCK_TOKEN", "MOCK_PROJECT_ID", "MOCK_PROJECT_ID", "MOCK_REGION"
@@ -801,7 +801,7 @@ def test_get_webhooks_server_error():
 
 
 @pytest.mark.hermetic
-@patch.object(requests, "get", return_value=MockReturnObject(200, {}))
+@patch.object(http_session, "get", return_value=MockReturnObject(200, {}))
 def test_get_webhooks_not_found(mock_requests_get):
     """Test get_webhooks, webhook not found"""
     result = su.get_webhooks(
@@ -815,7 +815,7 @@ def test_get_webhooks_not_found(mock_requests_get):
 def test_get_webhooks_success():
     """Test get_webhooks, success"""
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(
             200,
@@ -946,3 +946,101 @@ def test_get_restricted_service_status_success(
     mock_get_restricted_services_status.assert_called_once()
     mock_get_access_policy.assert_called_once()
     mock_get_token_project.assert_called_once()
+
+
+class MockClock:  # pylint: disable=too-few-public-methods
+    """Mock monotonic clock, set by the test."""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.hermetic
+def test_ttl_cache():
+    """Test TtlCache, entries expire and the oldest is evicted."""
+    clock = MockClock()
+    cache = su.TtlCache(10, max_size=2, clock=clock)
+    cache.set("MOCK_KEY_1", "MOCK_VALUE_1")
+    clock.now = 5
+    cache.set("MOCK_KEY_2", "MOCK_VALUE_2")
+    assert cache.get("MOCK_KEY_1") == "MOCK_VALUE_1"
+    clock.now = 10
+    assert cache.get("MOCK_KEY_1") is None
+    assert cache.get("MOCK_KEY_2") == "MOCK_VALUE_2"
+
+    cache.set("MOCK_KEY_3", "MOCK_VALUE_3")
+    cache.set("MOCK_KEY_4", "MOCK_VALUE_4")
+    assert cache.get("MOCK_KEY_2", "MOCK_DEFAULT") == "MOCK_DEFAULT"
+    cache.invalidate(lambda key: key == "MOCK_KEY_3")
+    assert cache.get("MOCK_KEY_3") is None
+    assert cache.get("MOCK_KEY_4") == "MOCK_VALUE_4"
+
+
+@pytest.mark.hermetic
+def test_get_access_policy_name_cached():
+    """Test get_access_policy_name, resolved once per user and project."""
+    ancestry = MockReturnObject(
+        200,
+        {"ancestor": [{"resourceId": {"type": "organization", "id": "MOCK_ID"}}]},
+    )
+    policies = MockReturnObject(
+        200,
+        {
+            "accessPolicies": [
+                {
+                    "title": "MOCK_PROJECT_TITLE",
+                    "scopes": ["projects/MOCK_PROJECT_NUMBER"],
+                    "name": "MOCK_ACCESS_POLICY",
+                }
+            ]
+        },
+    )
+    project = MockReturnObject(200, {"projectNumber": "MOCK_PROJECT_NUMBER"})
+    with patch.object(
+        http_session, "post", return_value=ancestry
+    ) as mock_post, patch.object(
+        http_session, "get", side_effect=[project, policies] * 3
+    ) as mock_get:
+        for token in ["MOCK_TOKEN", "MOCK_TOKEN", "MOCK_OTHER_TOKEN"]:
+            result = su.get_access_policy_name(
+                token, "MOCK_PROJECT_TITLE", "MOCK_PROJECT_ID"
+            )
+            assert result == {"access_policy_name": "MOCK_ACCESS_POLICY"}
+        assert mock_post.call_count == 2
+        assert mock_get.call_count == 4
+
+        su.invalidate_resolution_cache("MOCK_PROJECT_ID")
+        su.get_access_policy_name("MOCK_TOKEN", "MOCK_PROJECT_TITLE", "MOCK_PROJECT_ID")
+        assert mock_post.call_count == 3
+        assert mock_get.call_count == 6
+
+
+@pytest.mark.hermetic
+def test_get_service_perimeter_data_uri_cached():
+    """Test get_service_perimeter_data_uri, the uri is reused."""
+    with patch.object(
+        http_session,
+        "get",
+        return_value=MockReturnObject(
+            200,
+            {
+                "servicePerimeters": [
+                    {"title": "df_webhook", "name": "MOCK_PERIMETER_NAME"}
+                ]
+            },
+        ),
+    ) as mock_get:
+        for _ in range(2):
+            result = su.get_service_perimeter_data_uri(
+                "MOCK_TOKEN", "MOCK_PROJECT_ID", "accessPolicies/MOCK_POLICY_ID"
+            )
+            assert result == {
+                "uri": (
+                    "https://accesscontextmanager.googleapis.com/v1/"
+                    "MOCK_PERIMETER_NAME"
+                )
+            }
+    mock_get.assert_called_once()
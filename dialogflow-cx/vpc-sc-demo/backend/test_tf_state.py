@@ -0,0 +1,159 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for testing tf_state.py."""
+
+import json
+
+import asset_utilities as asu
+import pytest
+import tf_state
+from mock import MagicMock, patch
+
+MOCK_PREFIX = "terraform/MOCK_PROJECT_ID"
+
+MOCK_STATE = {
+    "version": 4,
+    "resources": [
+        {
+            "mode": "managed",
+            "type": "google_storage_bucket",
+            "name": "bucket",
+            "instances": [{"attributes": {"id": "MOCK_BUCKET_ID"}}],
+        },
+        {
+            "module": "module.services",
+            "mode": "managed",
+            "type": "google_project_service",
+            "name": "service",
+            "instances": [
+                {"index_key": "run", "attributes": {"id": "MOCK_RUN_ID"}},
+                {"index_key": "dns", "attributes": {"id": "MOCK_DNS_ID"}},
+            ],
+        },
+        {
+            "module": "module.service_perimeter",
+            "mode": "data",
+            "type": "google_project",
+            "name": "project",
+            "instances": [{"index_key": 0, "attributes": {}}],
+        },
+        {
+            "mode": "managed",
+            "type": "google_compute_network",
+            "name": "unused",
+            "instances": [],
+        },
+    ],
+}
+
+
+def write_state(state_dir, state):
+    """Write the state of MOCK_PREFIX in a local stand-in of the bucket."""
+    state_path = state_dir / MOCK_PREFIX / tf_state.STATE_OBJECT_NAME
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps(state))
+
+
+@pytest.mark.hermetic
+def test_parse_state():
+    """Test parse_state, with the addresses of terraform state list."""
+    with patch.object(
+        asu,
+        "RESOURCE_GROUP",
+        {
+            "services": {
+                'module.services.google_project_service.service["run"]',
+                'module.services.google_project_service.service["dns"]',
+            },
+            "network": {"google_compute_network.unused"},
+        },
+    ):
+        state = tf_state.parse_state(MOCK_STATE)
+    assert state == {
+        "resources": [
+            "google_storage_bucket.bucket",
+            'module.services.google_project_service.service["run"]',
+            'module.services.google_project_service.service["dns"]',
+            "module.service_perimeter.data.google_project.project[0]",
+            "services",
+        ],
+        "resource_id_dict": {
+            "google_storage_bucket.bucket": "MOCK_BUCKET_ID",
+            'module.services.google_project_service.service["run"]': "MOCK_RUN_ID",
+            'module.services.google_project_service.service["dns"]': "MOCK_DNS_ID",
+        },
+    }
+
+
+@pytest.mark.hermetic
+def test_read_cached_by_generation(state_dir):
+    """Test StateReader.read, parses a state once per generation."""
+    reader = tf_state.StateReader(tf_state.LocalStateSource(str(state_dir)))
+    assert reader.read(MOCK_PREFIX) == {"resources": [], "resource_id_dict": {}}
+
+    write_state(state_dir, MOCK_STATE)
+    with patch.object(
+        tf_state, "parse_state", wraps=tf_state.parse_state
+    ) as mock_parse_state:
+        state = reader.read(MOCK_PREFIX)
+        assert reader.read(MOCK_PREFIX) is state
+        assert mock_parse_state.call_count == 1
+
+        write_state(state_dir, {"resources": []})
+        assert reader.read(MOCK_PREFIX)["resources"] == []
+        assert mock_parse_state.call_count == 2
+
+
+@pytest.mark.hermetic
+def test_gcs_state_source():
+    """Test GcsStateSource, downloads the generation that was checked."""
+    mock_bucket = MagicMock()
+    mock_bucket.get_blob.return_value.generation = 7
+    mock_bucket.blob.return_value.download_as_bytes.return_value = b"{}"
+    source = tf_state.GcsStateSource("MOCK_BUCKET", credentials="MOCK_CREDENTIALS")
+    with patch.object(tf_state.storage, "Client") as mock_client:
+        mock_client.return_value.bucket.return_value = mock_bucket
+        reader = tf_state.StateReader(source)
+        for _ in range(2):
+            assert reader.read(MOCK_PREFIX) == {"resources": [], "resource_id_dict": {}}
+    mock_client.assert_called_once()
+    mock_bucket.get_blob.assert_called_with(f"{MOCK_PREFIX}/default.tfstate")
+    assert mock_bucket.get_blob.call_count == 2
+    mock_bucket.blob.assert_called_once_with(
+        f"{MOCK_PREFIX}/default.tfstate", generation=7
+    )
+
+
+@pytest.mark.hermetic
+def test_gcs_state_source_missing():
+    """Test GcsStateSource, a prefix without state has no resources."""
+    mock_bucket = MagicMock()
+    mock_bucket.get_blob.return_value = None
+    source = tf_state.GcsStateSource("MOCK_BUCKET", credentials="MOCK_CREDENTIALS")
+    source._bucket = mock_bucket  # pylint: disable=protected-access
+    reader = tf_state.StateReader(source)
+    assert reader.read(MOCK_PREFIX) == {"resources": [], "resource_id_dict": {}}
+    mock_bucket.blob.assert_not_called()
+
+
+@pytest.mark.hermetic
+def test_get_state_error(state_dir):
+    """Test get_state, error response for a state that is not JSON."""
+    state_path = state_dir / MOCK_PREFIX / tf_state.STATE_OBJECT_NAME
+    state_path.parent.mkdir(parents=True)
+    state_path.write_text("MOCK_NOT_JSON")
+    result = tf_state.get_state(MOCK_PREFIX)
+    assert result["response"].status_code == 500
+    assert json.loads(result["response"].get_data())["status"] == "ERROR"
@@ -0,0 +1,153 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for testing tf_stream.py."""
+
+import json
+import shlex
+import sys
+
+import pytest
+import tf_stream
+
+MOCK_HOOK = {"resource": {"addr": "MOCK_ADDR"}, "id_value": "MOCK_ID_VALUE"}
+MOCK_EVENTS = [
+    {"@level": "info", "type": "version", "terraform": "MOCK_VERSION"},
+    {"@level": "info", "type": "refresh_complete", "hook": MOCK_HOOK},
+    {"@level": "info", "type": "apply_progress", "hook": MOCK_HOOK},
+    {
+        "@level": "error",
+        "type": "diagnostic",
+        "diagnostic": {
+            "severity": "error",
+            "summary": "MOCK_SUMMARY",
+            "snippet": {"code": "MOCK_ACCESS_TOKEN"},
+        },
+    },
+]
+
+
+def get_command(lines, returncode=0):
+    """Build a command writing lines to stdout, then MOCK_STDERR to stderr."""
+    script = (
+        "import sys\n"
+        f"for line in {lines!r}:\n"
+        "    print(line, flush=True)\n"
+        "print('MOCK_STDERR', file=sys.stderr)\n"
+        f"sys.exit({returncode})\n"
+    )
+    return f"{shlex.quote(sys.executable)} -c {shlex.quote(script)}"
+
+
+@pytest.mark.hermetic
+def test_run():
+    """Test TerraformRun.run, events dispatched from the output of a command."""
+    channel = tf_stream.EventChannel()
+    lines = [json.dumps(event) for event in MOCK_EVENTS] + ["BAD_LINE", "[]", ""]
+    run = tf_stream.TerraformRun(channel).run(get_command(lines, 1), {})
+    assert run.exited == 1
+    assert list(run.stderr) == ["MOCK_STDERR\n"]
+    assert run.hooks == {
+        "refresh_start": [],
+        "refresh_complete": [MOCK_HOOK],
+        "apply_start": [],
+        "apply_complete": [],
+    }
+    assert run.errors == [MOCK_EVENTS[-1]]
+    assert [event for _, event in channel.events] == [
+        {"@level": "info", "type": "version"},
+        {"@level": "info", "type": "refresh_complete", "hook": MOCK_HOOK},
+        {"@level": "info", "type": "apply_progress", "hook": MOCK_HOOK},
+        {
+            "@level": "error",
+            "type": "diagnostic",
+            "diagnostic": {"severity": "error", "summary": "MOCK_SUMMARY"},
+        },
+    ]
+
+
+@pytest.mark.hermetic
+def test_channel_bounded():
+    """Test EventChannel, readers skip the events dropped from a full channel."""
+    channel = tf_stream.EventChannel(maxlen=2)
+    for index in range(5):
+        channel.publish({"index": index})
+    channel.close()
+    assert channel.read() == ([(3, {"index": 3}), (4, {"index": 4})], True)
+    assert channel.read(after=4) == ([], True)
+
+
+@pytest.mark.hermetic
+def test_stream_events_open_channel():
+    """Test stream_events, the events of a running run are sent without waiting."""
+    channel = tf_stream.EventChannel()
+    assert list(tf_stream.stream_events(channel)) == ["retry: 5000\n\n"]
+    channel.publish({"type": "apply_start"})
+    run_id = channel.run_id
+    assert "".join(tf_stream.stream_events(channel)) == (
+        "retry: 5000\n\n"
+        f"id: {run_id}:0\nevent: apply_start\n"
+        'data: {"type": "apply_start"}\n\n'
+    )
+    assert list(tf_stream.stream_events(channel, f"{run_id}:0")) == ["retry: 5000\n\n"]
+
+
+@pytest.mark.hermetic
+def test_stream_events():
+    """Test stream_events, resumed from the id of the last event read."""
+    channel = tf_stream.EventChannel()
+    channel.publish({"type": "refresh_start"})
+    channel.publish({"type": "apply_complete"})
+    channel.close()
+    run_id = channel.run_id
+    assert "".join(tf_stream.stream_events(channel, f"{run_id}:0")) == (
+        "retry: 5000\n\n"
+        f"id: {run_id}:1\nevent: apply_complete\n"
+        'data: {"type": "apply_complete"}\n\n'
+        f"id: {run_id}:end\nevent: run_complete\ndata: {{}}\n\n"
+    )
+    assert len(list(tf_stream.stream_events(channel, "MOCK_RUN_ID:7"))) == 4
+    assert list(tf_stream.stream_events(channel, f"{run_id}:end")) == [
+        "retry: 5000\n\n"
+    ]
+    assert list(tf_stream.stream_events(None)) == ["retry: 5000\n\n"]
+
+
+@pytest.mark.parametrize(
+    "events,expected",
+    [
+        (
+            [
+                {"type": "apply_complete", "hook": {"resource": {"addr": "a.b[0]"}}},
+                {"type": "apply_errored", "hook": {"resource": {"addr": "c.d"}}},
+                {"type": "apply_complete", "hook": {"resource": {"addr": "a.bc"}}},
+            ],
+            {"a.b": "applied", "c.d": "failed", "module.e": "unchanged"},
+        ),
+        (
+            [
+                {"type": "apply_complete", "hook": {"resource": {"addr": "a.b"}}},
+                {"@level": "error", "type": "diagnostic", "diagnostic": {}},
+            ],
+            {"a.b": "applied", "c.d": "failed", "module.e": "failed"},
+        ),
+    ],
+)
+@pytest.mark.hermetic
+def test_get_target_outcomes(events, expected):
+    """Test TerraformRun.get_target_outcomes, resources matched to targets."""
+    run = tf_stream.TerraformRun()
+    for event in events:
+        run.dispatch(json.dumps(event))
+    assert run.get_target_outcomes(["a.b", "c.d", "module.e"]) == expected
@@ -17,8 +17,8 @@
 import json
 
 import analytics_utilities as au
+import http_session
 import pytest
-import requests
 import status_utilities as su
 import update_utilities as uu
 from conftest import MOCK_DOMAIN, MockReturnObject
@@ -84,7 +84,7 @@ def test_endpoints_bad_token(get_token_mock, app, endpoint):
     return_value={"token": "MOCK_ACCESS_TOKEN", "project_id": "MOCK_PROJECT_ID"},
 )
 @patch.object(
-    requests,
+    http_session,
     "get",
     return_value=MockReturnObject(500, text="MOCK_RESPONSE"),
 )
@@ -151,7 +151,9 @@ def test_update_webhook_access_no_change_needed(
 ):
     "Test update_webhook_access, no change needed."
     endpoint = "/update_webhook_access"
-    with patch.object(requests, "get", return_value=MockReturnObject(200, policy_dict)):
+    with patch.object(
+        http_session, "get", return_value=MockReturnObject(200, policy_dict)
+    ):
         return_value = get_result(
             app,
             endpoint,
@@ -245,10 +247,10 @@ def test_update_webhook_access_change_needed(  # pylint: disable=too-many-argume
     "Test update_webhook_access, change needed."
     endpoint = "/update_webhook_access"
     with patch.object(
-        requests, "get", return_value=MockReturnObject(200, policy_dict)
+        http_session, "get", return_value=MockReturnObject(200, policy_dict)
     ) as mock_request_get:
         with patch.object(
-            requests,
+            http_session,
             "post",
             return_value=MockReturnObject(post_return_code, text="MOCK_RESPONSE"),
         ) as mock_request_post:
@@ -294,7 +296,7 @@ def test_update_webhook_ingress_no_change_needed(
     """Test /update_webhook_ingress, no change needed."""
     endpoint = "/update_webhook_ingress"
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(200, {"ingressSettings": ingress_settings}),
     ) as mock_requests_get:
@@ -340,12 +342,12 @@ def test_update_webhook_ingress_change_needed(  # pylint: disable=too-many-argum
     """Test /update_webhook_ingress, change needed."""
     endpoint = "/update_webhook_ingress"
     with patch.object(
-        requests,
+        http_session,
         "get",
         return_value=MockReturnObject(200, {"ingressSettings": ingress_settings}),
     ) as mock_requests_get:
         with patch.object(
-            requests,
+            http_session,
             "patch",
             return_value=MockReturnObject(
                 patch_return_code, {"ingressSettings": ingress_settings}
@@ -540,7 +542,7 @@ def test_update_service_directory_webhook_fulfillment(  # pylint: disable=too-ma
     """Test update_service_directory_webhook_fulfillment."""
     endpoint = "/update_service_directory_webhook_fulfillment"
     with patch.object(
-        requests,
+        http_session,
         "patch",
         return_value=MockReturnObject(patch_code, text="MOCK_RESPONSE"),
     ) as mock_patch:
@@ -15,8 +15,8 @@
 """Tests for update_utilities.py."""
 
 import google.cloud.storage as storage  # pylint: disable=consider-using-from-import
+import http_session
 import pytest
-import requests
 import status_utilities as su
 import update_utilities as uu
 from conftest import MockReturnObject
@@ -123,7 +123,7 @@ def test_update_security_perimeter_uri_err(
 @patch.object(su, "get_service_perimeter_status", return_value={"status": {}})
 @patch.object(uu, "update_service_perimeter_status_inplace", return_value=None)
 @patch.object(su, "get_service_perimeter_data_uri", return_value={"uri": "MOCK_URI"})
-@patch.object(requests, "patch", return_value=MockReturnObject(0, "MOCK_RESPONSE"))
+@patch.object(http_session, "patch", return_value=MockReturnObject(0, "MOCK_RESPONSE"))
 def test_update_security_perimeter_bad_patch(  # pylint: disable=too-many-arguments
     mock_data,
     mock_patch,
@@ -148,7 +148,9 @@ def test_update_security_perimeter_bad_patch(  # pylint: disable=too-many-argume
 @patch.object(su, "get_service_perimeter_status", return_value={"status": {}})
 @patch.object(uu, "update_service_perimeter_status_inplace", return_value=None)
 @patch.object(su, "get_service_perimeter_data_uri", return_value={"uri": "MOCK_URI"})
-@patch.object(requests, "patch", return_value=MockReturnObject(200, "MOCK_RESPONSE"))
+@patch.object(
+    http_session, "patch", return_value=MockReturnObject(200, "MOCK_RESPONSE")
+)
 def test_update_security_perimeter_success(  # pylint: disable=too-many-arguments
     mock_data,
     mock_patch,
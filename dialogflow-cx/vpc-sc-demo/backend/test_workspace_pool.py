@@ -0,0 +1,110 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for testing workspace_pool.py."""
+
+import asset_utilities as asu
+import pytest
+import workspace_pool
+from mock import patch
+
+
+class MockClock:  # pylint: disable=too-few-public-methods
+    """Mock monotonic clock, set by the test."""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(name="module")
+def fixture_module(tmp_path):
+    """Terraform module with a submodule."""
+    module_dir = tmp_path / "terraform"
+    (module_dir / "services").mkdir(parents=True)
+    (module_dir / "main.tf").write_text("MOCK_MAIN")
+    (module_dir / "services" / "main.tf").write_text("MOCK_SERVICES")
+    return module_dir / "main.tf"
+
+
+@pytest.mark.hermetic
+def test_get_module_hash(module):
+    """Test get_module_hash, changes with any terraform file."""
+    module_hash = workspace_pool.get_module_hash(str(module))
+    (module.parent / "README.md").write_text("MOCK_README")
+    assert workspace_pool.get_module_hash(str(module)) == module_hash
+    (module.parent / "services" / "main.tf").write_text("MOCK_SERVICES_V2")
+    assert workspace_pool.get_module_hash(str(module)) != module_hash
+
+
+@pytest.mark.hermetic
+def test_initialize(module, tmp_path):
+    """Test Workspace.initialize, only when needed."""
+    pool = workspace_pool.WorkspacePool(str(tmp_path / "workspaces"))
+    workspace = pool.get_workspace("MOCK_PROJECT_ID")
+    clock = workspace.clock = MockClock()
+    with patch.object(asu, "tf_init", return_value=None) as mock_tf_init:
+        for _ in range(2):
+            assert workspace.initialize(None, str(module), {}, "MOCK_PREFIX") is None
+        mock_tf_init.assert_called_once()
+        assert mock_tf_init.call_args.kwargs["upgrade"] is True
+        assert mock_tf_init.call_args.kwargs["plugin_cache_dir"] == (
+            pool.plugin_cache_dir
+        )
+
+        clock.now = workspace_pool.BACKEND_CREDENTIALS_TTL
+        workspace.initialize(None, str(module), {}, "MOCK_PREFIX")
+        assert mock_tf_init.call_count == 2
+        assert mock_tf_init.call_args.kwargs["upgrade"] is False
+
+        module.write_text("MOCK_MAIN_V2")
+        workspace.initialize(None, str(module), {}, "MOCK_PREFIX")
+        assert mock_tf_init.call_count == 3
+        assert mock_tf_init.call_args.kwargs["upgrade"] is True
+
+
+@pytest.mark.hermetic
+def test_initialize_failure(module, tmp_path):
+    """Test Workspace.initialize, retried after a failure."""
+    pool = workspace_pool.WorkspacePool(str(tmp_path / "workspaces"))
+    workspace = pool.get_workspace("MOCK_PROJECT_ID")
+    with patch.object(asu, "tf_init", return_value="MOCK_RESPONSE"):
+        result = workspace.initialize(None, str(module), {}, "MOCK_PREFIX")
+    assert result == "MOCK_RESPONSE"
+    with patch.object(asu, "tf_init", return_value=None) as mock_tf_init:
+        workspace.initialize(None, str(module), {}, "MOCK_PREFIX")
+    mock_tf_init.assert_called_once()
+
+
+@pytest.mark.hermetic
+def test_checkout(tmp_path):
+    """Test WorkspacePool.checkout, one workspace per project."""
+    pool = workspace_pool.WorkspacePool(str(tmp_path))
+    with pool.checkout("MOCK_PROJECT_ID") as workspace:
+        assert workspace.lock.locked()
+        assert workspace.workdir == str(tmp_path / "projects" / "MOCK_PROJECT_ID")
+    assert not workspace.lock.locked()
+    assert pool.get_workspace("MOCK_PROJECT_ID") is workspace
+    assert pool.get_workspace("MOCK_OTHER_PROJECT_ID") is not workspace
+
+
+@pytest.mark.hermetic
+@pytest.mark.parametrize("project_id", ["", "..", "../MOCK_PROJECT_ID", "MOCK/ID"])
+def test_get_workspace_invalid_project_id(project_id, tmp_path):
+    """Test WorkspacePool.get_workspace, project ids stay under the root."""
+    pool = workspace_pool.WorkspacePool(str(tmp_path))
+    with pytest.raises(ValueError):
+        pool.get_workspace(project_id)
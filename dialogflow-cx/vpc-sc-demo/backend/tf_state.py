@@ -0,0 +1,202 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Read terraform state directly from the backend, without running terraform.
+
+The state of a prefix is the default.tfstate object under it in the
+TF_PLAN_STORAGE_BUCKET bucket, or the file under it in the TF_STATE_DIR
+directory when that is set (a local stand-in for the bucket). Parsed states
+are cached by the generation of the object, so reading an unchanged state
+only costs a metadata request.
+"""
+
+import json
+import logging
+import os
+import threading
+
+import asset_utilities as asu
+import google.api_core.exceptions
+import google.auth.exceptions
+import google.cloud.storage as storage  # pylint: disable=consider-using-from-import
+from flask import Response
+
+STATE_OBJECT_NAME = "default.tfstate"
+
+
+def get_resource_address(resource, instance):
+    """Build the address of an instance, as listed by terraform state list."""
+    parts = [resource["module"]] if resource.get("module") else []
+    if resource.get("mode") == "data":
+        parts.append("data")
+    parts.extend([resource["type"], resource["name"]])
+    address = ".".join(parts)
+    if "index_key" in instance:
+        address += f'[{json.dumps(instance["index_key"])}]'
+    return address
+
+
+def parse_state(state):
+    """Get the resources of a terraform state and the ids of their instances."""
+    resources = []
+    resource_id_dict = {}
+    for resource in state.get("resources", []):
+        for instance in resource.get("instances", []):
+            address = get_resource_address(resource, instance)
+            resources.append(address)
+            resource_id = instance.get("attributes", {}).get("id")
+            if resource_id is not None:
+                resource_id_dict[address] = resource_id
+    for group_name, group_resources in asu.RESOURCE_GROUP.items():
+        if group_resources.issubset(resources):
+            resources.append(group_name)
+    return {"resources": resources, "resource_id_dict": resource_id_dict}
+
+
+class GcsStateSource:
+    """State objects of the terraform GCS backend."""
+
+    def __init__(self, bucket_name, credentials=None):
+        self.bucket_name = bucket_name
+        self.credentials = credentials
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    def get_bucket(self):
+        """Get the bucket, with a client reused across reads."""
+        with self._lock:
+            if self._bucket is None:
+                credentials = self.credentials or asu.get_credentials()
+                client = storage.Client(
+                    project=getattr(credentials, "project_id", None),
+                    credentials=credentials,
+                )
+                self._bucket = client.bucket(self.bucket_name)
+            return self._bucket
+
+    def get_generation(self, prefix):
+        """Get the generation of the state of a prefix, None if it has none."""
+        blob = self.get_bucket().get_blob(f"{prefix}/{STATE_OBJECT_NAME}")
+        return None if blob is None else blob.generation
+
+    def read(self, prefix, generation):
+        """Read a generation of the state of a prefix."""
+        blob = self.get_bucket().blob(
+            f"{prefix}/{STATE_OBJECT_NAME}", generation=generation
+        )
+        return blob.download_as_bytes()
+
+
+class LocalStateSource:
+    """State files in a directory, laid out like the objects of the bucket."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def get_path(self, prefix):
+        """Get the path of the state file of a prefix."""
+        return os.path.join(self.root, prefix, STATE_OBJECT_NAME)
+
+    def get_generation(self, prefix):
+        """Get the modification time and size of a state file, None if missing."""
+        try:
+            stat = os.stat(self.get_path(prefix))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def read(self, prefix, generation):  # pylint: disable=unused-argument
+        """Read the state file of a prefix."""
+        with open(self.get_path(prefix), "rb") as state_file:
+            return state_file.read()
+
+
+class StateReader:
+    """Cache of the parsed states of a source, keyed by prefix and generation."""
+
+    def __init__(self, source):
+        self.source = source
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def read(self, prefix):
+        """Get the resources and resource ids of the state of a prefix."""
+        generation = self.source.get_generation(prefix)
+        if generation is None:
+            return {"resources": [], "resource_id_dict": {}}
+        with self._lock:
+            entry = self._cache.get(prefix)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+        state = parse_state(json.loads(self.source.read(prefix, generation)))
+        with self._lock:
+            self._cache[prefix] = (generation, state)
+        return state
+
+    def invalidate(self, prefix=None):
+        """Drop the cached states, of one prefix or of all."""
+        with self._lock:
+            if prefix is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(prefix, None)
+
+
+def create_state_reader():
+    """Build a reader of TF_STATE_DIR, or of the TF_PLAN_STORAGE_BUCKET bucket."""
+    if os.environ.get("TF_STATE_DIR"):
+        return StateReader(LocalStateSource(os.environ["TF_STATE_DIR"]))
+    return StateReader(GcsStateSource(os.environ["TF_PLAN_STORAGE_BUCKET"]))
+
+
+_READER = None
+_READER_LOCK = threading.Lock()
+
+
+def get_state_reader():
+    """Get the state reader shared by all requests."""
+    global _READER  # pylint: disable=global-statement
+    with _READER_LOCK:
+        if _READER is None:
+            _READER = create_state_reader()
+        return _READER
+
+
+def set_state_reader(reader):
+    """Replace the shared reader; None to create a default one on next use."""
+    global _READER  # pylint: disable=global-statement
+    with _READER_LOCK:
+        _READER = reader
+
+
+def get_state(prefix):
+    """Get the resources and resource ids of the state of a prefix.
+
+    Returns a dictionary with a response if the state could not be read.
+    """
+    try:
+        return get_state_reader().read(prefix)
+    except (
+        google.api_core.exceptions.GoogleAPIError,
+        google.auth.exceptions.GoogleAuthError,
+        OSError,
+        ValueError,
+    ) as exc:
+        logging.exception("Could not read terraform state of %s", prefix)
+        return {
+            "response": Response(
+                status=500,
+                response=json.dumps({"status": "ERROR", "reason": str(exc)}),
+            )
+        }
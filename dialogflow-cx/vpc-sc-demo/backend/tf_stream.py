@@ -0,0 +1,241 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Run terraform and dispatch the events of its -json output as they come.
+
+Output is read line by line while terraform runs instead of being captured
+whole. The hooks and errors callers need are collected from the events, and
+the events are published to a channel of the project, from which the
+/asset_events endpoint returns them as server-sent events. Responses only hold
+the events published so far, and the browser reconnects for the next ones, so
+no request thread waits on a run. Channels only keep the latest events, and
+only the tail of stderr is kept, so memory is bounded however long the run.
+"""
+
+import collections
+import contextlib
+import json
+import logging
+import os
+import subprocess
+import threading
+import uuid
+
+HOOK_EVENT_TYPES = (
+    "refresh_start",
+    "refresh_complete",
+    "apply_start",
+    "apply_complete",
+)
+# Fields of the events that are published; snippets of diagnostics may hold
+# the values of variables, like the access token.
+PUBLISHED_FIELDS = ("type", "@level", "@message", "@timestamp", "hook", "changes")
+PUBLISHED_DIAGNOSTIC_FIELDS = ("severity", "summary", "detail", "address")
+CHANNEL_SIZE = int(os.environ.get("TF_EVENT_BUFFER_SIZE", "1000"))
+STDERR_TAIL_LINES = 100
+# Delay before the browser opens the stream again once it ends, which is how
+# often it gets the new events of a run.
+RETRY_MILLISECONDS = 5000
+
+
+def get_published_event(event):
+    """Get the fields of an event that can be shown to the user."""
+    published = {key: event[key] for key in PUBLISHED_FIELDS if key in event}
+    if "diagnostic" in event:
+        published["diagnostic"] = {
+            key: event["diagnostic"][key]
+            for key in PUBLISHED_DIAGNOSTIC_FIELDS
+            if key in event["diagnostic"]
+        }
+    return published
+
+
+def is_in_target(address, target):
+    """Check if the address of a resource is, or is inside, a target address."""
+    return address == target or address.startswith((f"{target}.", f"{target}["))
+
+
+class TerraformRun:
+    """Hooks and errors of a terraform command, collected as it runs."""
+
+    def __init__(self, channel=None):
+        self.channel = channel
+        self.hooks = {event_type: [] for event_type in HOOK_EVENT_TYPES}
+        self.errors = []
+        # Addresses of the resources that failed to apply.
+        self.errored = []
+        self.stderr = collections.deque(maxlen=STDERR_TAIL_LINES)
+        self.exited = None
+
+    def dispatch(self, line):
+        """Handle one line of output."""
+        line = line.strip()
+        if not line:
+            return
+        try:
+            event = json.loads(line)
+        except json.decoder.JSONDecodeError:
+            logging.debug("COULD NOT LOAD: %s", line)
+            return
+        if not isinstance(event, dict):
+            logging.debug("COULD NOT LOAD: %s", line)
+            return
+        if event.get("@level") == "error":
+            self.errors.append(event)
+        if "hook" in event and event.get("type") in self.hooks:
+            self.hooks[event["type"]].append(event["hook"])
+        if event.get("type") == "apply_errored" and "hook" in event:
+            self.errored.append(event["hook"]["resource"]["addr"])
+        diagnostic = event.get("diagnostic", {})
+        if diagnostic.get("severity") == "error" and diagnostic.get("address"):
+            self.errored.append(diagnostic["address"])
+        if self.channel is not None:
+            self.channel.publish(get_published_event(event))
+
+    def run(self, command, env):
+        """Run a shell command, dispatching its output until it exits."""
+        with subprocess.Popen(
+            command,
+            shell=True,
+            env={**os.environ, **env},
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        ) as process:
+            stderr_reader = threading.Thread(
+                target=self.stderr.extend, args=(process.stderr,), daemon=True
+            )
+            stderr_reader.start()
+            for line in process.stdout:
+                self.dispatch(line)
+            self.exited = process.wait()
+            stderr_reader.join()
+        if "TF_LOG" in env:
+            logging.debug(self.exited)
+            logging.debug("".join(self.stderr))
+        return self
+
+    def get_target_outcomes(self, targets):
+        """Get the outcome of an apply for each of its targets.
+
+        A target "failed" if one of its resources did, or if the apply failed
+        without applying it; it was "applied" if any of its resources changed,
+        and is "unchanged" otherwise.
+        """
+        applied = [hook["resource"]["addr"] for hook in self.hooks["apply_complete"]]
+        unattributed_errors = [
+            error
+            for error in self.errors
+            if not error.get("diagnostic", {}).get("address")
+        ]
+        outcomes = {}
+        for target in targets:
+            if any(is_in_target(address, target) for address in self.errored):
+                outcomes[target] = "failed"
+            elif any(is_in_target(address, target) for address in applied):
+                outcomes[target] = "applied"
+            elif unattributed_errors:
+                outcomes[target] = "failed"
+            else:
+                outcomes[target] = "unchanged"
+        return outcomes
+
+
+class EventChannel:
+    """Latest events of a run of terraform commands, for any number of readers."""
+
+    def __init__(self, maxlen=CHANNEL_SIZE):
+        self.run_id = uuid.uuid4().hex
+        self.events = collections.deque(maxlen=maxlen)
+        self.next_seq = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def publish(self, event):
+        """Add an event, dropping the oldest one if full."""
+        with self.lock:
+            self.events.append((self.next_seq, event))
+            self.next_seq += 1
+
+    def close(self):
+        """Mark the end of the events."""
+        with self.lock:
+            self.closed = True
+
+    def read(self, after=-1):
+        """Get the (seq, event) pairs after seq, and whether the channel is closed.
+
+        Does not wait for new events. Readers that fall behind skip the dropped
+        events.
+        """
+        with self.lock:
+            return [item for item in self.events if item[0] > after], self.closed
+
+
+class EventChannels:
+    """Channel of the latest terraform run of each project."""
+
+    def __init__(self):
+        self.channels = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Get the channel of the latest run, None if there was none."""
+        with self.lock:
+            return self.channels.get(key)
+
+    @contextlib.contextmanager
+    def open_run(self, key):
+        """Publish the events of a new run for the duration of the block."""
+        channel = EventChannel()
+        with self.lock:
+            self.channels[key] = channel
+        try:
+            yield channel
+        finally:
+            channel.close()
+
+
+CHANNELS = EventChannels()
+
+
+def format_sse(event_id, event_type, data):
+    """Format a server-sent event."""
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_events(channel, last_event_id=None):
+    """Yield the server-sent events of a channel, from after last_event_id.
+
+    The stream ends once the events published so far are sent, and the browser
+    reconnects after RETRY_MILLISECONDS for the next ones. Once the run is
+    over, the stream ends with a run_complete event; the browser then gets
+    the events of the next run.
+    """
+    yield f"retry: {RETRY_MILLISECONDS}\n\n"
+    if channel is None:
+        return
+    after = -1
+    run_id, _, seq = (last_event_id or "").partition(":")
+    if run_id == channel.run_id:
+        if seq == "end":
+            return
+        if seq.isdigit():
+            after = int(seq)
+    pending, closed = channel.read(after)
+    for seq, event in pending:
+        yield format_sse(f"{channel.run_id}:{seq}", event.get("type", "message"), event)
+    if closed:
+        yield format_sse(f"{channel.run_id}:end", "run_complete", {})
@@ -20,7 +20,7 @@ import logging
 
 import analytics_utilities as au
 import flask
-import requests
+import http_session
 import status_utilities as su
 import update_utilities as uu
 
@@ -44,7 +44,7 @@ def update_webhook_access():  # pylint: disable=too-many-branches
     headers = {}
     headers["x-goog-user-project"] = project_id
     headers["Authorization"] = f"Bearer {token}"
-    response = requests.get(
+    response = http_session.get(
         (
             f"https://cloudfunctions.googleapis.com/v2/projects/{project_id}"
             f"/locations/{region}/functions/{webhook_name}:getIamPolicy"
@@ -96,7 +96,7 @@ def update_webhook_access():  # pylint: disable=too-many-branches
             policy_dict["bindings"].append(
                 {"role": "roles/cloudfunctions.invoker", "members": ["allUsers"]}
             )
-    response = requests.post(
+    response = http_session.post(
         (
             f"https://cloudfunctions.googleapis.com/v1/projects/{project_id}"
             f"/locations/{region}/functions/{webhook_name}:setIamPolicy"
@@ -133,7 +133,7 @@ def update_webhook_ingress():
     headers["Content-type"] = "application/json"
     headers["x-goog-user-project"] = project_id
     headers["Authorization"] = f"Bearer {token}"
-    response = requests.get(
+    response = http_session.get(
         (
             f"https://cloudfunctions.googleapis.com/v1/projects/{project_id}"
             f"/locations/{region}/functions/{webhook_name}"
@@ -153,7 +153,7 @@ def update_webhook_ingress():
         return flask.Response(status=200)
 
     webhook_data["ingressSettings"] = ingress_settings
-    response = requests.patch(
+    response = http_session.patch(
         (
             f"https://cloudfunctions.googleapis.com/v1/projects/{project_id}"
             f"/locations/{region}/functions/{webhook_name}"
@@ -261,7 +261,7 @@ def update_service_directory_webhook_fulfillment():  # pylint: disable=too-many-
     headers = {}
     headers["x-goog-user-project"] = project_id
     headers["Authorization"] = f"Bearer {token}"
-    response = requests.patch(
+    response = http_session.patch(
         f"https://{region}-dialogflow.googleapis.com/v3/{webhook_name}",
         headers=headers,
         json=data,
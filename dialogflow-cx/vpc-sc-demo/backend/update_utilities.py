@@ -18,7 +18,7 @@ import logging
 
 import flask
 import google.cloud.storage as storage  # pylint: disable=consider-using-from-import
-import requests
+import http_session
 import status_utilities as su
 from google.oauth2 import credentials
 
@@ -93,7 +93,7 @@ def update_security_perimeter(request, api):
     if "response" in response:
         return response
     service_perimeter_data_uri = response["uri"]
-    result = requests.patch(
+    result = http_session.patch(
         service_perimeter_data_uri,
         headers=headers,
         json=service_perimeter_status,
@@ -105,6 +105,7 @@ def update_security_perimeter(request, api):
             "  accesscontextmanager API rejected PATCH request: %s", result.text
         )
         return flask.Response(status=result.status_code, response=result.text)
+    su.invalidate_resolution_cache(project_id)
     return flask.Response(status=200)
 
 
@@ -0,0 +1,164 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pool of initialized terraform workspaces, reused across requests.
+
+Each project gets a persistent working directory, initialized once and
+guarded by a lock so that only one terraform command runs in it at a time.
+Providers are installed from a plugin cache shared by all workspaces, which
+terraform does not support for concurrent inits, so inits are serialized. A
+workspace is initialized again, with -upgrade, when the terraform module
+changes, and without -upgrade when the service account token given to the
+GCS backend is about to expire.
+"""
+
+import contextlib
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+import asset_utilities as asu
+
+WORKSPACE_ROOT = os.environ.get(
+    "TF_WORKSPACE_ROOT", os.path.join(tempfile.gettempdir(), "terraform-workspaces")
+)
+# Plugin cache directory created by the Dockerfile.
+DEPLOY_PLUGIN_CACHE_DIR = "/deploy/.terraform.d/plugin-cache"
+# Project ids become directory names, keep them from escaping the root.
+PROJECT_ID_PATTERN = re.compile(r"[A-Za-z0-9][\w.:-]*")
+# Service account tokens expire after an hour; refresh the backend's earlier.
+BACKEND_CREDENTIALS_TTL = 45 * 60
+
+
+def get_plugin_cache_dir(root):
+    """Get TF_PLUGIN_CACHE_DIR, the cache of the image, or one under root."""
+    if os.environ.get("TF_PLUGIN_CACHE_DIR"):
+        return os.environ["TF_PLUGIN_CACHE_DIR"]
+    if os.path.isdir(DEPLOY_PLUGIN_CACHE_DIR):
+        return DEPLOY_PLUGIN_CACHE_DIR
+    return os.path.join(root, "plugin-cache")
+
+
+def get_module_hash(module):
+    """Hash the terraform files of the directory of a module."""
+    digest = hashlib.sha256()
+    module_dir = os.path.dirname(os.path.abspath(module))
+    for dirpath, dirnames, filenames in os.walk(module_dir):
+        dirnames[:] = sorted(name for name in dirnames if name != ".terraform")
+        for filename in sorted(filenames):
+            if filename.endswith(".tf"):
+                path = os.path.join(dirpath, filename)
+                digest.update(os.path.relpath(path, module_dir).encode())
+                with open(path, "rb") as module_file:
+                    digest.update(module_file.read())
+    return digest.hexdigest()
+
+
+class Workspace:
+    """Working directory of the terraform commands of one project."""
+
+    def __init__(self, workdir, plugin_cache_dir, init_lock, clock=time.monotonic):
+        self.workdir = workdir
+        self.plugin_cache_dir = plugin_cache_dir
+        self.init_lock = init_lock
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.module_hash = None
+        self.prefix = None
+        self.initialized_at = None
+
+    def initialize(self, context, module, env, prefix):
+        """Initialize terraform unless already done for this module and prefix.
+
+        Returns the error response of terraform init, like asu.tf_init.
+        """
+        module_hash = get_module_hash(module)
+        changed = (module_hash, prefix) != (self.module_hash, self.prefix)
+        expired = (
+            self.initialized_at is None
+            or self.clock() - self.initialized_at >= BACKEND_CREDENTIALS_TTL
+        )
+        if not changed and not expired:
+            return None
+        self.module_hash = None
+        with self.init_lock:
+            result = asu.tf_init(
+                context,
+                module,
+                self.workdir,
+                env,
+                prefix,
+                upgrade=changed,
+                plugin_cache_dir=self.plugin_cache_dir,
+            )
+        if result:
+            return result
+        self.module_hash, self.prefix = module_hash, prefix
+        self.initialized_at = self.clock()
+        return None
+
+
+class WorkspacePool:
+    """Persistent workspaces, one per project."""
+
+    def __init__(self, root=WORKSPACE_ROOT, plugin_cache_dir=None):
+        self.root = root
+        self.plugin_cache_dir = plugin_cache_dir or get_plugin_cache_dir(root)
+        self.workspaces = {}
+        self.lock = threading.Lock()
+        self.init_lock = threading.Lock()
+
+    def get_workspace(self, project_id):
+        """Get the workspace of a project, creating its directory if needed."""
+        if not PROJECT_ID_PATTERN.fullmatch(project_id):
+            raise ValueError(f"Invalid project id: {project_id!r}")
+        with self.lock:
+            if project_id not in self.workspaces:
+                workdir = os.path.join(self.root, "projects", project_id)
+                os.makedirs(workdir, exist_ok=True)
+                os.makedirs(self.plugin_cache_dir, exist_ok=True)
+                self.workspaces[project_id] = Workspace(
+                    workdir, self.plugin_cache_dir, self.init_lock
+                )
+            return self.workspaces[project_id]
+
+    @contextlib.contextmanager
+    def checkout(self, project_id):
+        """Hold the workspace of a project for the duration of the block."""
+        workspace = self.get_workspace(project_id)
+        with workspace.lock:
+            yield workspace
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_workspace_pool():
+    """Get the pool of workspaces shared by all requests."""
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = WorkspacePool()
+        return _POOL
+
+
+def set_workspace_pool(pool):
+    """Replace the shared pool; None to create a default one on next use."""
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        _POOL = pool
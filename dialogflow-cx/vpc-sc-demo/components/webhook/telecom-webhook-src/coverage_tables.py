@@ -0,0 +1,115 @@
+# Copyright 2022, Google LLC
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Coverage catalogue of the Telecommunications Agent Webhook.
+
+The catalogue is read from a JSON data file once, at import, and indexed into
+frozen sets and dicts so that every lookup is a single hash probe. reload()
+swaps in a new catalogue atomically, without restarting the function.
+"""
+
+import json
+import os
+import types
+
+DATA_FILE = os.environ.get(
+    "COVERAGE_DATA_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "coverage_data.json"),
+)
+
+# Phone lines missing from the catalogue are verified, without domestic coverage.
+UNLISTED_PHONE_LINE = types.MappingProxyType(
+    {"verified": True, "domestic_coverage": False}
+)
+
+
+class CoverageTables:
+    """Immutable indexes of the phone lines and destinations that are covered."""
+
+    def __init__(
+        self,
+        phone_lines=None,
+        cruise_ports=(),
+        monthly_destinations=(),
+        daily_destinations=(),
+    ):
+        self.phone_lines = types.MappingProxyType(
+            {
+                number: types.MappingProxyType({**UNLISTED_PHONE_LINE, **line})
+                for number, line in (phone_lines or {}).items()
+            }
+        )
+        self.cruise_ports = frozenset(port.lower() for port in cruise_ports)
+        self.monthly_destinations = frozenset(
+            destination.lower() for destination in monthly_destinations
+        )
+        self.daily_destinations = frozenset(
+            destination.lower() for destination in daily_destinations
+        )
+        self.international_coverage = types.MappingProxyType(
+            {
+                destination: get_plan_coverage(
+                    destination in self.monthly_destinations,
+                    destination in self.daily_destinations,
+                )
+                for destination in self.monthly_destinations | self.daily_destinations
+            }
+        )
+
+    @classmethod
+    def from_file(cls, path):
+        """Reads the catalogue from a JSON data file."""
+        with open(path, encoding="utf-8") as data_file:
+            return cls(**json.load(data_file))
+
+    def get_phone_line(self, number):
+        """Returns the verification and domestic coverage of a phone line."""
+        return self.phone_lines.get(number, UNLISTED_PHONE_LINE)
+
+    def is_port_covered(self, port):
+        """Checks if a cruise port is covered, ignoring case."""
+        return port.lower() in self.cruise_ports
+
+    def get_international_coverage(self, destination):
+        """Returns which plans cover a destination, ignoring case."""
+        return self.international_coverage.get(destination.lower(), "neither")
+
+
+def get_plan_coverage(monthly, daily):
+    """Names the coverage of a destination by the monthly and daily plans."""
+    if monthly and daily:
+        return "both"
+    if monthly:
+        return "monthly_only"
+    if daily:
+        return "daily_only"
+    return "neither"
+
+
+_TABLES = CoverageTables.from_file(DATA_FILE)
+
+
+def get_tables():
+    """Returns the coverage catalogue currently in use."""
+    return _TABLES
+
+
+def reload(path=None):
+    """Re-reads the catalogue, from DATA_FILE by default, and swaps it in.
+
+    Requests being served keep the catalogue they started with; the new one
+    is only used once it is fully indexed.
+    """
+    global _TABLES  # pylint: disable=global-statement
+    _TABLES = CoverageTables.from_file(path or DATA_FILE)
+    return _TABLES
@@ -0,0 +1,275 @@
+# Copyright 2022, Google LLC
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Data access layer of the Telecommunications Agent Webhook.
+
+Handlers read records by kind ("bills", "phone_lines", "destinations",
+"plans") and string key. Backends only implement a batched fetch, so a
+handler needing several records makes a single round trip:
+
+- InMemoryDataStore serves any dict of records.
+- SampleDataStore serves the sample data of the coverage catalogue in use.
+- SQLiteDataStore is a reference database backend.
+- CachingDataStore adds a read-through cache with a TTL to another store.
+
+The store used by the handlers is a SQLite database if the DATA_STORE_PATH
+environment variable is set (cached for DATA_STORE_TTL seconds), and the
+sample data otherwise.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import coverage_tables
+
+# SQLite limits the number of host parameters of a statement.
+SQLITE_BATCH_SIZE = 500
+
+DEFAULT_TTL = 60.0
+
+DEFAULT_BILL = {
+    "anomaly": False,
+    "product_line": None,
+    "purchase": "The Godfather",
+    "purchase_amount": 9.99,
+    "bill_without_purchase": 54.34,
+    "total_bill": 64.33,
+}
+
+# Only 999999 has an anomaly on its bill.
+SAMPLE_BILLS = {
+    "999999": {
+        **DEFAULT_BILL,
+        "anomaly": True,
+        "product_line": "phone",
+        "purchase": "device protection",
+    },
+}
+
+SAMPLE_PLANS = {
+    "monthly": {"cost": 70, "days": 30},
+    "daily": {"cost": 10, "days": 1},
+}
+
+DEFAULT_PHONE_LINE = dict(coverage_tables.UNLISTED_PHONE_LINE)
+
+DEFAULT_DESTINATION = {"cruise_port": False, "international_coverage": "neither"}
+
+
+class DataStore:
+    """Base class of the stores of records, keyed by kind and string key."""
+
+    def get_many(self, kind, keys):
+        """Maps the keys that have a record of the given kind to the record."""
+        keys = list(dict.fromkeys(str(key) for key in keys))
+        if not keys:
+            return {}
+        return self._fetch(kind, keys)
+
+    def get(self, kind, key, default=None):
+        """Returns the record of a key, or default if it has none."""
+        return self.get_many(kind, [key]).get(str(key), default)
+
+    def _fetch(self, kind, keys):
+        """Returns the records of a list of unique string keys."""
+        raise NotImplementedError
+
+
+class InMemoryDataStore(DataStore):
+    """Store of records held in dicts."""
+
+    def __init__(self, records=None):
+        self.records = {
+            kind: {str(key): value for key, value in values.items()}
+            for kind, values in (records or {}).items()
+        }
+
+    @classmethod
+    def from_sample_data(cls, tables=None):
+        """Builds a store of the sample bills, plans and coverage catalogue."""
+        tables = tables or coverage_tables.get_tables()
+        destinations = {
+            destination: {
+                "cruise_port": tables.is_port_covered(destination),
+                "international_coverage": tables.get_international_coverage(
+                    destination
+                ),
+            }
+            for destination in tables.cruise_ports | set(tables.international_coverage)
+        }
+        return cls(
+            {
+                "bills": SAMPLE_BILLS,
+                "phone_lines": {
+                    number: dict(line) for number, line in tables.phone_lines.items()
+                },
+                "destinations": destinations,
+                "plans": SAMPLE_PLANS,
+            }
+        )
+
+    def _fetch(self, kind, keys):
+        values = self.records.get(kind, {})
+        return {key: values[key] for key in keys if key in values}
+
+
+class SampleDataStore(DataStore):
+    """Sample data, rebuilt when coverage_tables.reload() swaps the catalogue."""
+
+    def __init__(self):
+        self._tables = None
+        self._store = None
+        self._lock = threading.Lock()
+
+    def _fetch(self, kind, keys):
+        tables = coverage_tables.get_tables()
+        with self._lock:
+            if tables is not self._tables:
+                self._store = InMemoryDataStore.from_sample_data(tables)
+                self._tables = tables
+            store = self._store
+        return store.get_many(kind, keys)
+
+
+class SQLiteDataStore(DataStore):
+    """Store of JSON records in a SQLite database, one connection per thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (kind, key))"
+            )
+
+    def _connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path)
+        return connection
+
+    def put_many(self, kind, records):
+        """Inserts or replaces the records of a dict keyed by string key."""
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO records (kind, key, value) VALUES (?, ?, ?)",
+                [(kind, str(key), json.dumps(value)) for key, value in records.items()],
+            )
+
+    def load(self, store):
+        """Copies all the records of an InMemoryDataStore."""
+        for kind, records in store.records.items():
+            self.put_many(kind, records)
+
+    def _fetch(self, kind, keys):
+        connection = self._connect()
+        found = {}
+        for start in range(0, len(keys), SQLITE_BATCH_SIZE):
+            end = start + SQLITE_BATCH_SIZE
+            batch = keys[start:end]
+            placeholders = ", ".join("?" * len(batch))
+            rows = connection.execute(
+                "SELECT key, value FROM records "
+                f"WHERE kind = ? AND key IN ({placeholders})",
+                [kind, *batch],
+            )
+            found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def close(self):
+        """Closes the connection of the calling thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class CachingDataStore(DataStore):
+    """Read-through cache of another store, records expire after ttl seconds.
+
+    Missing records are cached too, so unknown keys do not reach the backend
+    on every request.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, backend, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.backend = backend
+        self.ttl = ttl
+        self.clock = clock
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, kind, keys):
+        now = self.clock()
+        found = {}
+        misses = []
+        with self._lock:
+            for key in keys:
+                entry = self._cache.get((kind, key))
+                if entry is None or entry[0] <= now:
+                    misses.append(key)
+                elif entry[1] is not self._MISSING:
+                    found[key] = entry[1]
+        if misses:
+            fetched = self.backend.get_many(kind, misses)
+            expiry = self.clock() + self.ttl
+            with self._lock:
+                for key in misses:
+                    value = fetched.get(key, self._MISSING)
+                    self._cache[(kind, key)] = (expiry, value)
+            found.update(fetched)
+        return found
+
+    def invalidate(self, kind=None):
+        """Drops the cached records, of one kind or of all."""
+        with self._lock:
+            if kind is None:
+                self._cache.clear()
+            else:
+                for cache_key in [k for k in self._cache if k[0] == kind]:
+                    del self._cache[cache_key]
+
+
+def create_default_store():
+    """Builds the store configured by the environment."""
+    path = os.environ.get("DATA_STORE_PATH")
+    if not path:
+        return SampleDataStore()
+    ttl = float(os.environ.get("DATA_STORE_TTL", DEFAULT_TTL))
+    return CachingDataStore(SQLiteDataStore(path), ttl=ttl)
+
+
+_DEFAULT_STORE = None
+_DEFAULT_STORE_LOCK = threading.Lock()
+
+
+def get_default_store():
+    """Returns the store used by the handlers, creating it on first use."""
+    global _DEFAULT_STORE  # pylint: disable=global-statement
+    with _DEFAULT_STORE_LOCK:
+        if _DEFAULT_STORE is None:
+            _DEFAULT_STORE = create_default_store()
+        return _DEFAULT_STORE
+
+
+def set_default_store(store):
+    """Replaces the store used by the handlers, None to recreate it on next use."""
+    global _DEFAULT_STORE  # pylint: disable=global-statement
+    with _DEFAULT_STORE_LOCK:
+        _DEFAULT_STORE = store
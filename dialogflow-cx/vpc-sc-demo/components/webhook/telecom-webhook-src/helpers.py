@@ -15,35 +15,77 @@
 """Helper module for Telecommunications webhook function."""
 
 
-from datetime import date
+import threading
+from datetime import date, timedelta
+
+MONTH_NAMES = (
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+)
+
+
+def first_of_previous_month(day):
+    """Returns the first day of the month before the month of day."""
+    return (day.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+
+class BillCalendar:
+    """Date details of the bill states, computed once per day.
+
+    clock returns the current date, which makes the details deterministic
+    when a fixed clock is injected.
+    """
+
+    def __init__(self, clock=date.today):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._day = None
+        self._details = None
+
+    def _compute(self, today):
+        first_day = today.replace(day=1)
+        last_month_first_day = first_of_previous_month(today)
+        second_last_month_first_day = first_of_previous_month(last_month_first_day)
+        current = (
+            MONTH_NAMES[first_day.month - 1],
+            str(first_day),
+            MONTH_NAMES[last_month_first_day.month - 1],
+        )
+        previous = (
+            MONTH_NAMES[last_month_first_day.month - 1],
+            str(last_month_first_day),
+            MONTH_NAMES[second_last_month_first_day.month - 1],
+        )
+        return current, previous
+
+    def get_date_details(self, bill_state):
+        """Returns the month name, first day and previous month name of a bill.
+
+        The "current" bill is the one of this month; any other state refers to
+        the bill of the previous month.
+        """
+        today = self.clock()
+        with self._lock:
+            if today != self._day:
+                self._details = self._compute(today)
+                self._day = today
+            current, previous = self._details
+        return current if bill_state == "current" else previous
+
+
+CALENDAR = BillCalendar()
 
 
 def get_date_details(bill_state):
     """Get date details helper function."""
-
-    month_names = [
-        "January",
-        "February",
-        "March",
-        "April",
-        "May",
-        "June",
-        "July",
-        "August",
-        "September",
-        "October",
-        "November",
-        "December",
-    ]
-    today = date.today()
-    # index starts with 0
-    first_month_name = month_names[today.month - 1]
-    first_day = today.replace(day=1)
-    first_day_str = str(first_day)
-
-    last_month_name = month_names[today.month - 2]
-    last_month_first_day_str = str(today.replace(day=1, month=today.month - 1))
-    second_last_month_name = month_names[today.month - 3]
-    if bill_state == "current":
-        return [first_month_name, first_day_str, last_month_name]
-    return [last_month_name, last_month_first_day_str, second_last_month_name]
+    return CALENDAR.get_date_details(bill_state)
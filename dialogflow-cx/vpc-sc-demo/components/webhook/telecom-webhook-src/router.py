@@ -0,0 +1,177 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tag-based dispatch of Dialogflow CX webhook requests."""
+
+import asyncio
+import bisect
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets; the last is open.
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Stats key of the requests served by the default handler, whatever their tag.
+DEFAULT_TAG = "__default__"
+
+
+def get_tag(request_dict):
+    """Extracts the fulfillment tag of a webhook request."""
+    return request_dict["fulfillmentInfo"]["tag"]
+
+
+class LatencyHistogram:
+    """Counts latencies in fixed buckets."""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+
+    def record(self, latency):
+        """Adds a latency (seconds) to its bucket."""
+        self.counts[bisect.bisect_left(self.buckets, latency)] += 1
+        self.total += latency
+
+    def as_dict(self):
+        """Maps the upper bound of every bucket ("+Inf" for the last) to its count."""
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return dict(zip(bounds, self.counts))
+
+
+class TagStats:
+    """Invocations, errors and latencies of the handler of one tag."""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.count = 0
+        self.errors = 0
+        self.latency = LatencyHistogram(buckets)
+
+    def as_dict(self):
+        """Summarizes the stats as plain values."""
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "latency_sum": self.latency.total,
+            "latency_histogram": self.latency.as_dict(),
+        }
+
+
+class WebhookRouter:
+    """Dispatches webhook requests to the handler registered for their tag.
+
+    The request body is parsed once and handlers receive the parsed dict, so
+    dispatch costs a single dict lookup no matter how many tags there are.
+    """
+
+    def __init__(self, default=None, latency_buckets=DEFAULT_LATENCY_BUCKETS):
+        self._handlers = {}
+        self._default = default
+        self._latency_buckets = latency_buckets
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def route(self, tag):
+        """Decorator registering a handler for a tag."""
+
+        def decorator(handler):
+            self.add_route(tag, handler)
+            return handler
+
+        return decorator
+
+    def add_route(self, tag, handler):
+        """Registers a function or coroutine function taking the request dict."""
+        if tag in self._handlers:
+            raise ValueError(f"Tag already registered: {tag}")
+        self._handlers[tag] = handler
+
+    @property
+    def tags(self):
+        """The registered tags."""
+        return list(self._handlers)
+
+    def get_handler(self, tag):
+        """Returns the handler of a tag, or the default handler."""
+        handler = self._handlers.get(tag, self._default)
+        if handler is None:
+            raise RuntimeError(f"Unrecognized tag: {tag}")
+        return handler
+
+    def _resolve(self, request_dict):
+        """Returns the stats key and the handler of a request."""
+        tag = get_tag(request_dict)
+        handler = self.get_handler(tag)
+        return (tag if tag in self._handlers else DEFAULT_TAG), handler
+
+    def dispatch(self, request_dict):
+        """Calls the handler of the tag of an already parsed request.
+
+        Coroutine handlers are run to completion in a new event loop.
+        """
+        tag, handler = self._resolve(request_dict)
+        start = time.perf_counter()
+        error = True
+        try:
+            if asyncio.iscoroutinefunction(handler):
+                result = asyncio.run(handler(request_dict))
+            else:
+                result = handler(request_dict)
+            error = False
+            return result
+        finally:
+            self._record(tag, time.perf_counter() - start, error)
+
+    async def async_dispatch(self, request_dict, executor=None):
+        """Awaits the handler of the tag of an already parsed request.
+
+        Coroutine handlers are awaited on the running loop; regular handlers
+        run in executor (the loop's default one if None) to keep it free.
+        """
+        tag, handler = self._resolve(request_dict)
+        start = time.perf_counter()
+        error = True
+        try:
+            if asyncio.iscoroutinefunction(handler):
+                result = await handler(request_dict)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(executor, handler, request_dict)
+            error = False
+            return result
+        finally:
+            self._record(tag, time.perf_counter() - start, error)
+
+    def handle(self, request):
+        """Parses a flask.Request-like request once and dispatches it."""
+        return self.dispatch(request.get_json())
+
+    def _record(self, tag, latency, error):
+        with self._lock:
+            stats = self._stats.get(tag)
+            if stats is None:
+                stats = self._stats[tag] = TagStats(self._latency_buckets)
+            stats.count += 1
+            stats.errors += error
+            stats.latency.record(latency)
+
+    def stats(self):
+        """Invocation counts, errors and latency histograms per tag."""
+        with self._lock:
+            return {tag: stats.as_dict() for tag, stats in self._stats.items()}
+
+    def reset_stats(self):
+        """Clears the collected stats."""
+        with self._lock:
+            self._stats.clear()
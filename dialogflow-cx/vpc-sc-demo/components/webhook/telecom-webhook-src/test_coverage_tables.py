@@ -0,0 +1,64 @@
+# Copyright 2022, Google LLC
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test the coverage catalogue of the telecom webhook."""
+
+import json
+
+import coverage_tables
+import pytest
+
+
+def test_phone_lines():
+    """Unlisted lines are verified without domestic coverage."""
+    tables = coverage_tables.get_tables()
+    assert tables.get_phone_line("9999999999")["verified"] is False
+    assert tables.get_phone_line("1231231234")["domestic_coverage"] is True
+    assert dict(tables.get_phone_line("0000000000")) == {
+        "verified": True,
+        "domestic_coverage": False,
+    }
+
+
+@pytest.mark.parametrize(
+    "destination,coverage",
+    [
+        ("Singapore", "both"),
+        ("russia", "monthly_only"),
+        ("china", "neither"),
+    ],
+)
+def test_international_coverage(destination, coverage):
+    """Destinations are looked up ignoring case."""
+    tables = coverage_tables.get_tables()
+    assert tables.get_international_coverage(destination) == coverage
+
+
+def test_daily_only_coverage():
+    """Destinations covered by the daily plan alone are reported as such."""
+    tables = coverage_tables.CoverageTables(daily_destinations=["Atlantis"])
+    assert tables.get_international_coverage("atlantis") == "daily_only"
+
+
+def test_reload(tmp_path):
+    """Reloading swaps in the catalogue of another data file."""
+    path = tmp_path / "coverage_data.json"
+    path.write_text(json.dumps({"cruise_ports": ["China"]}), encoding="utf-8")
+    original = coverage_tables.get_tables()
+    try:
+        assert coverage_tables.reload(str(path)) is coverage_tables.get_tables()
+        assert coverage_tables.get_tables().is_port_covered("china")
+        assert not coverage_tables.get_tables().is_port_covered("mexico")
+    finally:
+        coverage_tables.reload()
+    assert coverage_tables.get_tables().cruise_ports == original.cruise_ports
@@ -0,0 +1,119 @@
+# Copyright 2022, Google LLC
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test the data access layer of the telecom webhook."""
+
+import json
+
+import coverage_tables
+import data_store
+import pytest
+
+
+class MockStore(data_store.InMemoryDataStore):
+    """Records the batches of keys that are fetched."""
+
+    def __init__(self, records=None):
+        super().__init__(records)
+        self.batches = []
+
+    def _fetch(self, kind, keys):
+        self.batches.append((kind, keys))
+        return super()._fetch(kind, keys)
+
+
+class MockClock:
+    """Returns a settable time."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(name="sqlite_store")
+def fixture_sqlite_store(tmp_path):
+    """SQLite store loaded with the sample data."""
+    store = data_store.SQLiteDataStore(str(tmp_path / "telecom.db"))
+    store.load(data_store.InMemoryDataStore.from_sample_data())
+    yield store
+    store.close()
+
+
+def test_sample_data():
+    """The sample store serves bills, lines, destinations and plans."""
+    store = data_store.InMemoryDataStore.from_sample_data()
+    assert store.get("bills", 999999)["anomaly"] is True
+    assert store.get("bills", "123") is None
+    assert store.get("phone_lines", "9999999999")["verified"] is False
+    assert store.get("destinations", "russia") == {
+        "cruise_port": False,
+        "international_coverage": "monthly_only",
+    }
+    assert store.get("plans", "monthly") == {"cost": 70, "days": 30}
+
+
+def test_sqlite_get_many(sqlite_store, monkeypatch):
+    """Lookups are batched within the SQLite host parameter limit."""
+    monkeypatch.setattr(data_store, "SQLITE_BATCH_SIZE", 2)
+    found = sqlite_store.get_many(
+        "destinations", ["mexico", "china", "canada", "japan", "mexico"]
+    )
+    assert sorted(found) == ["canada", "japan", "mexico"]
+    assert found["mexico"]["cruise_port"] is True
+
+
+def test_caching_store_ttl():
+    """Records, found or not, are cached until their TTL expires."""
+    backend = MockStore({"bills": {"1": {"anomaly": False}}})
+    clock = MockClock()
+    store = data_store.CachingDataStore(backend, ttl=10, clock=clock)
+
+    assert store.get_many("bills", ["1", "2"]) == {"1": {"anomaly": False}}
+    assert store.get_many("bills", ["1", "2", "3"]) == {"1": {"anomaly": False}}
+    assert backend.batches == [("bills", ["1", "2"]), ("bills", ["3"])]
+
+    clock.now = 10
+    store.get("bills", "1")
+    assert backend.batches[-1] == ("bills", ["1"])
+
+    store.invalidate("bills")
+    store.get("bills", "2")
+    assert backend.batches[-1] == ("bills", ["2"])
+
+
+def test_sample_store_follows_reload(tmp_path):
+    """The sample store serves the catalogue swapped in by a reload."""
+    store = data_store.SampleDataStore()
+    assert store.get("destinations", "peru") is None
+    path = tmp_path / "coverage_data.json"
+    path.write_text(json.dumps({"cruise_ports": ["Peru"]}), encoding="utf-8")
+    try:
+        coverage_tables.reload(str(path))
+        assert store.get("destinations", "peru")["cruise_port"] is True
+    finally:
+        coverage_tables.reload()
+    assert store.get("destinations", "peru") is None
+
+
+def test_default_store_from_environment(sqlite_store, monkeypatch):
+    """DATA_STORE_PATH selects a cached SQLite store."""
+    monkeypatch.setenv("DATA_STORE_PATH", sqlite_store.path)
+    try:
+        data_store.set_default_store(None)
+        store = data_store.get_default_store()
+        assert isinstance(store, data_store.CachingDataStore)
+        assert store.get("bills", "999999")["product_line"] == "phone"
+    finally:
+        data_store.set_default_store(None)
@@ -0,0 +1,72 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test the date helpers of the telecom webhook."""
+
+from datetime import date
+
+import pytest
+from helpers import BillCalendar
+
+
+class MockClock:
+    """Returns a settable date and counts the calls."""
+
+    def __init__(self, today):
+        self.today = today
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.today
+
+
+@pytest.mark.parametrize(
+    "today,current,previous",
+    [
+        (
+            date(2022, 6, 15),
+            ("June", "2022-06-01", "May"),
+            ("May", "2022-05-01", "April"),
+        ),
+        (
+            date(2023, 1, 31),
+            ("January", "2023-01-01", "December"),
+            ("December", "2022-12-01", "November"),
+        ),
+        (
+            date(2023, 2, 28),
+            ("February", "2023-02-01", "January"),
+            ("January", "2023-01-01", "December"),
+        ),
+    ],
+)
+def test_get_date_details(today, current, previous):
+    """Bill months wrap around the start of the year."""
+    calendar = BillCalendar(clock=MockClock(today))
+    assert calendar.get_date_details("current") == current
+    assert calendar.get_date_details("previous") == previous
+    assert calendar.get_date_details("other situation") == previous
+
+
+def test_get_date_details_memoized():
+    """Details are computed once per day and follow the clock."""
+    clock = MockClock(date(2022, 12, 31))
+    calendar = BillCalendar(clock=clock)
+    first = calendar.get_date_details("current")
+    assert calendar.get_date_details("current") is first
+
+    clock.today = date(2023, 1, 1)
+    assert calendar.get_date_details("current") == ("January", "2023-01-01", "December")
+    assert clock.calls == 3
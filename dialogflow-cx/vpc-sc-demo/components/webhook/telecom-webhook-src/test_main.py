@@ -13,11 +13,14 @@
 
 """Test validate form parameter webhook snippet."""
 
-from datetime import date
+import json
+from datetime import date, timedelta
 
+import coverage_tables
 import flask
 import pytest
-from main import cx_prebuilt_agents_telecom
+from main import ROUTER, cx_prebuilt_agents_telecom
+from router import DEFAULT_TAG
 
 
 @pytest.fixture(name="app", scope="module")
@@ -69,11 +72,11 @@ def test_detect_customeranomaly_other(app):
     with app.test_request_context(json=request):
         res = cx_prebuilt_agents_telecom(flask.request)
         print(res)
-        today = date.today()
+        last_month = date.today().replace(day=1) - timedelta(days=1)
         assert res["sessionInfo"]["parameters"]["anomaly_detect"] == "false"
         assert res["sessionInfo"]["parameters"]["total_bill"] == 1054.34
         assert res["sessionInfo"]["parameters"]["first_month"] == str(
-            today.replace(day=1, month=today.month - 1)
+            last_month.replace(day=1)
         )
 
 
@@ -155,6 +158,32 @@ def test_cruiseplan_coverage(app):
         assert res["sessionInfo"]["parameters"]["port_is_covered"] == "true"
 
 
+def test_cruiseplan_coverage_reload(app, tmp_path):
+    """Cruise plan coverage follows a reload of the coverage catalogue."""
+
+    request = {
+        "fulfillmentInfo": {"tag": "cruisePlanCoverage"},
+        "pageInfo": {
+            "formInfo": {
+                "parameterInfo": [{"displayName": "destination", "value": "peru"}]
+            }
+        },
+    }
+    path = tmp_path / "coverage_data.json"
+    path.write_text(json.dumps({"cruise_ports": ["Peru"]}), encoding="utf-8")
+
+    try:
+        coverage_tables.reload(str(path))
+        with app.test_request_context(json=request):
+            res = cx_prebuilt_agents_telecom(flask.request)
+            assert res["sessionInfo"]["parameters"]["port_is_covered"] == "true"
+    finally:
+        coverage_tables.reload()
+    with app.test_request_context(json=request):
+        res = cx_prebuilt_agents_telecom(flask.request)
+        assert res["sessionInfo"]["parameters"]["port_is_covered"] == "false"
+
+
 def test_cruiseplan_notcovered(app):
     """Parameterized test for cruise plan coverage webhook snippet."""
 
@@ -318,3 +347,32 @@ def test_default_tag(app):
     with app.test_request_context(json=request):
         res = cx_prebuilt_agents_telecom(flask.request)
         assert res is None
+
+
+def test_router_stats(app):
+    """Every tag has a handler, and invocations are counted per tag."""
+    assert set(ROUTER.tags) == {
+        "detectCustomerAnomaly",
+        "validatePhoneLine",
+        "cruisePlanCoverage",
+        "internationalCoverage",
+        "cheapestPlan",
+    }
+    ROUTER.reset_stats()
+    request = {
+        "fulfillmentInfo": {"tag": "cheapestPlan"},
+        "pageInfo": {
+            "formInfo": {
+                "parameterInfo": [{"displayName": "trip_duration", "value": 3}]
+            }
+        },
+    }
+    with app.test_request_context(json=request):
+        cx_prebuilt_agents_telecom(flask.request)
+    request["fulfillmentInfo"]["tag"] = "unknownTag"
+    with app.test_request_context(json=request):
+        cx_prebuilt_agents_telecom(flask.request)
+
+    stats = ROUTER.stats()
+    assert stats["cheapestPlan"]["count"] == 1
+    assert stats[DEFAULT_TAG]["count"] == 1
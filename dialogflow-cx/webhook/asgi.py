@@ -0,0 +1,183 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""ASGI adapter serving a WebhookRouter under an async server.
+
+The handlers written for Cloud Functions run unchanged: regular handlers run
+in a thread pool and coroutine handlers are awaited on the event loop, so many
+requests are served concurrently by one process. For example, from the
+dialogflow-cx directory:
+
+    uvicorn --factory webhook.asgi:create_sample_app --workers 4
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+
+try:
+    from . import responses
+except ImportError:  # Run from inside the webhook directory.
+    import responses
+
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+
+def encode_result(result):
+    """Encodes the value returned by a handler as a JSON response body."""
+    if isinstance(result, bytes):
+        return result
+    if isinstance(result, str):
+        return result.encode()
+    return responses.dumps({} if result is None else result)
+
+
+class WebhookApp:  # pylint: disable=too-many-instance-attributes
+    """ASGI application dispatching POSTed webhook requests through a router.
+
+    At most max_concurrency requests are dispatched at once (unlimited if
+    None), and regular handlers share a pool of max_workers threads. On
+    shutdown, new requests are refused with a 503 and in-flight requests get
+    up to shutdown_timeout seconds to finish.
+    """
+
+    def __init__(
+        self, router, max_concurrency=None, max_workers=None, shutdown_timeout=30.0
+    ):
+        self.router = router
+        self.max_concurrency = max_concurrency
+        self.shutdown_timeout = shutdown_timeout
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._semaphore = None
+        self._idle = None
+        self._in_flight = 0
+        self._shutting_down = False
+
+    @property
+    def in_flight(self):
+        """Number of requests being served."""
+        return self._in_flight
+
+    def _init_loop_state(self):
+        """Creates the asyncio primitives on the server's event loop."""
+        if self._idle is None:
+            self._idle = asyncio.Event()
+            self._idle.set()
+            if self.max_concurrency:
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def __call__(self, scope, receive, send):
+        self._init_loop_state()
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def shutdown(self):
+        """Refuses new requests and waits for the in-flight ones to finish."""
+        self._init_loop_state()
+        self._shutting_down = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            logging.warning(
+                "Shutting down with %s webhook requests in flight", self._in_flight
+            )
+        self._executor.shutdown(wait=False)
+
+    async def _http(self, scope, receive, send):
+        if self._shutting_down:
+            await self._respond(send, 503, encode_result({"error": "Shutting down"}))
+            return
+        if scope["method"] != "POST":
+            await self._respond(
+                send, 405, encode_result({"error": "Method not allowed"})
+            )
+            return
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            status, body = await self._handle(await self._read_body(receive))
+            await self._respond(send, status, body)
+        finally:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.set()
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
+
+    async def _handle(self, body):
+        """Returns the HTTP status and the response body of a request body.
+
+        Handler errors, including results that cannot be encoded as JSON, are
+        answered with a 500.
+        """
+        try:
+            request_dict = responses.loads(body)
+        except ValueError:
+            return 400, encode_result({"error": "Request body is not valid JSON"})
+        try:
+            if self._semaphore is None:
+                result = await self._dispatch(request_dict)
+            else:
+                async with self._semaphore:
+                    result = await self._dispatch(request_dict)
+            return 200, encode_result(result)
+        except Exception:  # pylint: disable=broad-except
+            logging.exception("Webhook handler failed")
+            return 500, encode_result({"error": "Webhook handler failed"})
+
+    async def _dispatch(self, request_dict):
+        return await self.router.async_dispatch(request_dict, executor=self._executor)
+
+    @staticmethod
+    async def _respond(send, status, body):
+        headers = JSON_HEADERS + [(b"content-length", str(len(body)).encode())]
+        await send(
+            {"type": "http.response.start", "status": status, "headers": headers}
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def create_app(router, **kwargs):
+    """Builds the ASGI application of a router; see WebhookApp for kwargs."""
+    return WebhookApp(router, **kwargs)
+
+
+def create_sample_app():
+    """Builds the ASGI application of the sample webhook_fcn handlers."""
+    try:
+        from . import main  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        import main  # pylint: disable=import-outside-toplevel
+
+    return create_app(main.ROUTER)
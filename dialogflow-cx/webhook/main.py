@@ -16,50 +16,36 @@
 
 import json
 
+try:
+    from . import responses, router
+except ImportError:  # Deployed with --source=webhook, where main.py is top-level.
+    import responses
+    import router
 
-def basic_webhook(request):
+ROUTER = router.WebhookRouter()
+
+
+@ROUTER.route("basic_webhook")
+def basic_webhook(request_dict):
     """Handles a Dialogflow CX webhook request."""
-    request_dict = request.get_json()
     tag = request_dict["fulfillmentInfo"]["tag"]
     user_query = request_dict["text"]
-    return json.dumps(
-        {
-            "fulfillment_response": {
-                "messages": [
-                    {
-                        "text": {
-                            "text": [f"Webhook received: {user_query} (Tag: {tag})"],
-                            "allow_playback_interruption": False,
-                        }
-                    }
-                ]
-            }
-        }
+    return responses.text_response(
+        f"Webhook received: {user_query} (Tag: {tag})",
+        allow_playback_interruption=False,
     )
 
 
-def echo_webhook(request):
+@ROUTER.route("echo_webhook")
+def echo_webhook(request_dict):
     """Echos the request that was received."""
-    request_dict = request.get_json()
     request_json = json.dumps(request_dict)
-    return json.dumps(
-        {
-            "fulfillment_response": {
-                "messages": [
-                    {
-                        "text": {
-                            "text": [request_json],
-                        }
-                    }
-                ]
-            }
-        }
-    )
+    return responses.text_response(request_json)
 
 
-def validate_form(request):
+@ROUTER.route("validate_form")
+def validate_form(request_dict):
     """Validates that an age parameter from a form is sensible."""
-    request_dict = request.get_json()
     parameter_info_list = request_dict["pageInfo"]["formInfo"]["parameterInfo"]
 
     parameter_dict = {}
@@ -68,80 +54,31 @@ def validate_form(request):
         parameter_dict[key] = parameter_info["value"]
 
     if parameter_dict["age"] < 0:
-        return json.dumps(
-            {
-                "fulfillment_response": {
-                    "messages": [
-                        {
-                            "text": {
-                                "text": [
-                                    (
-                                        f'Age {parameter_dict["age"]} not valid '
-                                        "(must be positive)"
-                                    )
-                                ],
-                            }
-                        }
-                    ]
-                }
-            }
+        return responses.text_response(
+            f'Age {parameter_dict["age"]} not valid (must be positive)'
         )
-    return json.dumps(
-        {
-            "fulfillment_response": {
-                "messages": [
-                    {
-                        "text": {
-                            "text": ["Valid age"],
-                        }
-                    }
-                ]
-            }
-        }
-    )
+    return responses.text_response("Valid age")
 
 
-def set_session_param(request):
+@ROUTER.route("set_session_param")
+def set_session_param(request_dict):
     """Sets a session param detected in the intent."""
-    request_dict = request.get_json()
     parameters = request_dict["sessionInfo"]["parameters"]
     key = parameters["key"]
     val = parameters["val"]
-    return json.dumps(
+    return responses.text_and_parameters_response(
+        "Session parameter set",
         {
-            "fulfillment_response": {
-                "messages": [
-                    {
-                        "text": {
-                            "text": ["Session parameter set"],
-                        }
-                    }
-                ]
-            },
-            "session_info": {
-                "parameters": {
-                    key: val,
-                    "key": None,
-                    "val": None,
-                }
-            },
-        }
+            key: val,
+            "key": None,
+            "val": None,
+        },
     )
 
 
 def webhook_fcn(request):
     """Delegates a request to an appropriate function, based on tag."""
-    request_dict = request.get_json()
-    tag = request_dict["fulfillmentInfo"]["tag"]
-    if tag == "echo_webhook":
-        return echo_webhook(request)
-    if tag == "basic_webhook":
-        return basic_webhook(request)
-    if tag == "validate_form":
-        return validate_form(request)
-    if tag == "set_session_param":
-        return set_session_param(request)
-    raise RuntimeError(f"Unrecognized tag: {tag}")
+    return ROUTER.handle(request)
 
 
 def get_webhook_entrypoint() -> str:
@@ -169,14 +106,14 @@ def build_request_dict_basic(tag, text):
     return request_mapping
 
 
-def extract_text(response_json: str, message_index=0):
+def extract_text(response_json, message_index=0):
     """Extracts the text response from the json response of a Dialogflow webhook."""
-    response = json.loads(response_json)
+    response = responses.loads(response_json)
     messages = response["fulfillment_response"]["messages"]
     return messages[message_index]["text"]["text"][0]
 
 
-def extract_session_parameters(response_json: str):
+def extract_session_parameters(response_json):
     """Extracts session parameters from the json response of a Dialogflow webhook."""
-    response = json.loads(response_json)
+    response = responses.loads(response_json)
     return response["session_info"]["parameters"]
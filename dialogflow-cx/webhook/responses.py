@@ -0,0 +1,140 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Builds Dialogflow CX webhook responses as ready-to-send JSON bytes.
+
+The static part of a response envelope is serialized once, when its template
+is created; rendering a response only serializes the dynamic values and joins
+them with the precomputed chunks. orjson or ujson are used when installed (the
+webhook's requirements.txt installs orjson), and the standard library json
+module otherwise.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+# Shared, as json.dumps builds a new encoder for every call with options.
+_STDLIB_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def _stdlib_dumps(obj):
+    return _STDLIB_ENCODER.encode(obj).encode()
+
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    dumps = orjson.dumps
+    loads = orjson.loads
+elif ujson is not None:
+    JSON_BACKEND = "ujson"
+
+    def dumps(obj):
+        """Serializes obj to compact JSON bytes."""
+        return ujson.dumps(obj, ensure_ascii=False).encode()
+
+    loads = ujson.loads
+else:
+    JSON_BACKEND = "json"
+    dumps = _stdlib_dumps
+    loads = json.loads
+
+
+class Slot:
+    """Placeholder for a value that is filled in when a template is rendered."""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class ResponseTemplate:
+    """JSON document with static parts serialized ahead of time."""
+
+    def __init__(self, template):
+        self._markers = {}
+        rest = _stdlib_dumps(self._mark(template))
+        self.chunks = []
+        self.slots = []
+        # Markers are serialized in the order in which _mark visited them.
+        for marker, name in self._markers.items():
+            chunk, rest = rest.split(_stdlib_dumps(marker), 1)
+            self.chunks.append(chunk)
+            self.slots.append(name)
+        self.chunks.append(rest)
+
+    def _mark(self, template):
+        """Replaces Slots by marker strings that survive serialization."""
+        if isinstance(template, Slot):
+            marker = f"\x00slot{len(self._markers)}\x00"
+            self._markers[marker] = template.name
+            return marker
+        if isinstance(template, dict):
+            return {key: self._mark(value) for key, value in template.items()}
+        if isinstance(template, (list, tuple)):
+            return [self._mark(value) for value in template]
+        return template
+
+    def render(self, **values):
+        """Serializes the values of the slots into the precomputed envelope."""
+        parts = [self.chunks[0]]
+        for name, chunk in zip(self.slots, self.chunks[1:]):
+            parts.append(dumps(values[name]))
+            parts.append(chunk)
+        return b"".join(parts)
+
+
+def text_message(text, **kwargs):
+    """Builds a text response message."""
+    return {"text": {"text": [text], **kwargs}}
+
+
+TEXT_RESPONSE = ResponseTemplate(
+    {"fulfillment_response": {"messages": [text_message(Slot("text"))]}}
+)
+
+TEXT_RESPONSE_NO_INTERRUPTION = ResponseTemplate(
+    {
+        "fulfillment_response": {
+            "messages": [text_message(Slot("text"), allow_playback_interruption=False)]
+        }
+    }
+)
+
+TEXT_AND_PARAMETERS_RESPONSE = ResponseTemplate(
+    {
+        "fulfillment_response": {"messages": [text_message(Slot("text"))]},
+        "session_info": {"parameters": Slot("parameters")},
+    }
+)
+
+
+def text_response(text, allow_playback_interruption=True):
+    """Builds a response with a single text message."""
+    if allow_playback_interruption:
+        return TEXT_RESPONSE.render(text=text)
+    return TEXT_RESPONSE_NO_INTERRUPTION.render(text=text)
+
+
+def text_and_parameters_response(text, parameters):
+    """Builds a response with a single text message that sets session parameters."""
+    return TEXT_AND_PARAMETERS_RESPONSE.render(text=text, parameters=parameters)
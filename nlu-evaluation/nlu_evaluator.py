@@ -0,0 +1,240 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming, resumable NLU evaluation engine.
+
+Utterances are read lazily and evaluated chunk by chunk with a bounded number
+of concurrent DetectIntent calls. The results of every chunk are appended to a
+JSONL checkpoint before the next chunk starts, so an interrupted evaluation
+resumes where it stopped. Results keep the utterance and expected intent of
+their row, and a checkpoint is not resumed against a dataset that no longer
+has them.
+"""
+
+import concurrent.futures
+import csv
+import dataclasses
+import itertools
+import json
+import os
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+NO_MATCH = "NO_MATCH"
+
+Row = dict[str, Any]
+DetectIntent = Callable[[Row], tuple[str, float]]
+
+
+class CheckpointMismatchError(ValueError):
+    """The checkpoint holds results of a different dataset."""
+
+
+def get_row_key(row: Row) -> tuple[str, str]:
+    """Utterance and expected intent, which identify the row of a result."""
+    return row["Utterance"], row["Expected Intent"]
+
+
+@dataclasses.dataclass
+class EvaluationResult:
+    """Outcome of one utterance of the dataset."""
+
+    row: int
+    utterance: str
+    expected_intent: str
+    detected_intent: str
+    confidence: float
+    frequency: int = 1
+
+    @property
+    def key(self) -> tuple[str, str]:
+        """Utterance and expected intent of the row, as get_row_key."""
+        return self.utterance, self.expected_intent
+
+    @property
+    def passed(self) -> bool:
+        """Whether the detected intent is the expected one."""
+        return self.detected_intent == self.expected_intent
+
+    def to_json(self) -> str:
+        """Serializes the result as a single JSON line."""
+        return json.dumps(dataclasses.asdict(self))
+
+    @classmethod
+    def from_json(cls, line: str) -> "EvaluationResult":
+        """Parses a result serialized by to_json."""
+        return cls(**json.loads(line))
+
+
+@dataclasses.dataclass
+class EvaluationSummary:
+    """Frequency-weighted pass and no-match counts."""
+
+    utterances: int = 0
+    passed: int = 0
+    no_match: int = 0
+
+    def add(self, result: EvaluationResult) -> None:
+        """Counts one result."""
+        self.utterances += result.frequency
+        if result.passed:
+            self.passed += result.frequency
+        if result.detected_intent == NO_MATCH:
+            self.no_match += result.frequency
+
+    @property
+    def passed_ratio(self) -> float:
+        """Fraction of utterances that matched the expected intent."""
+        return self.passed / self.utterances if self.utterances else 0.0
+
+    @property
+    def no_match_ratio(self) -> float:
+        """Fraction of utterances that did not match any intent."""
+        return self.no_match / self.utterances if self.utterances else 0.0
+
+
+class Checkpoint:
+    """Append-only JSONL file of evaluation results."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def read(self) -> Iterator[EvaluationResult]:
+        """Streams the results saved so far.
+
+        A partially written last line, left by a crash mid-write, is skipped;
+        its row is evaluated again on resume.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    yield EvaluationResult.from_json(line)
+                except (ValueError, TypeError):
+                    continue
+
+    def completed_rows(self) -> set[int]:
+        """Indices of the rows that already have a result."""
+        return {result.row for result in self.read()}
+
+    def append(self, results: Iterable[EvaluationResult]) -> None:
+        """Durably appends results to the checkpoint."""
+        with open(self.path, "a+", encoding="utf-8") as checkpoint_file:
+            if checkpoint_file.tell():
+                checkpoint_file.seek(checkpoint_file.tell() - 1)
+                if checkpoint_file.read(1) != "\n":
+                    checkpoint_file.write("\n")
+            for result in results:
+                checkpoint_file.write(result.to_json() + "\n")
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+
+    def summarize(self) -> EvaluationSummary:
+        """Summarizes the results saved so far."""
+        summary = EvaluationSummary()
+        for result in self.read():
+            summary.add(result)
+        return summary
+
+    def remove(self) -> None:
+        """Deletes the checkpoint, e.g. once its results have been exported."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def read_csv(path: str) -> Iterator[Row]:
+    """Streams the rows of a CSV dataset, stripping spaces around values."""
+    with open(path, newline="", encoding="utf-8") as dataset_file:
+        for row in csv.DictReader(dataset_file):
+            yield {
+                key: value.strip() if isinstance(value, str) else value
+                for key, value in row.items()
+            }
+
+
+def iter_chunks(iterable: Iterable[Any], chunk_size: int) -> Iterator[list[Any]]:
+    """Splits an iterable in lists of at most chunk_size items."""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+def get_frequency(row: Row) -> int:
+    """Frequency of a row; missing or empty frequencies count once."""
+    frequency = row.get("Frequency")
+    return int(frequency) if frequency not in (None, "") else 1
+
+
+#  pylint: disable=too-many-arguments
+def evaluate(
+    rows: Iterable[Row],
+    detect_intent: DetectIntent,
+    checkpoint: Checkpoint,
+    chunk_size: int = 500,
+    max_workers: int = 10,
+    progress: Optional[Callable[[int], None]] = None,
+) -> EvaluationSummary:
+    """Evaluates every row of a dataset that is not in the checkpoint yet.
+
+    detect_intent maps a row to the detected intent display name (or NO_MATCH)
+    and its confidence. At most max_workers calls are in flight and at most
+    chunk_size rows are evaluated at a time. progress is called with the number
+    of rows evaluated in this run after every chunk. Returns the summary of the
+    whole checkpoint, including the rows of previous runs.
+
+    Raises CheckpointMismatchError if a row of the checkpoint is not the row
+    with the same index in the dataset, e.g. after the dataset was edited or
+    reordered; remove the checkpoint to start over.
+    """
+    completed = {result.row: result.key for result in checkpoint.read()}
+    evaluated = 0
+
+    def evaluate_row(indexed_row):
+        index, row = indexed_row
+        detected_intent, confidence = detect_intent(row)
+        return EvaluationResult(
+            row=index,
+            utterance=row["Utterance"],
+            expected_intent=row["Expected Intent"],
+            detected_intent=detected_intent,
+            confidence=confidence,
+            frequency=get_frequency(row),
+        )
+
+    def check_row(index, row):
+        if get_row_key(row) != completed.pop(index):
+            raise CheckpointMismatchError(
+                f"Row {index} of the dataset is not the row of checkpoint "
+                f"{checkpoint.path}, remove it to start over."
+            )
+
+    def iter_pending_rows():
+        for index, row in enumerate(rows):
+            if index in completed:
+                check_row(index, row)
+            else:
+                yield index, row
+        if completed:
+            raise CheckpointMismatchError(
+                f"Checkpoint {checkpoint.path} has rows missing from the dataset, "
+                "remove it to start over."
+            )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for chunk in iter_chunks(iter_pending_rows(), chunk_size):
+            checkpoint.append(executor.map(evaluate_row, chunk))
+            evaluated += len(chunk)
+            if progress:
+                progress(evaluated)
+    return checkpoint.summarize()
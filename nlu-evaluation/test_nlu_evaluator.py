@@ -0,0 +1,158 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the streaming NLU evaluation engine."""
+
+import json
+import os
+import threading
+
+import nlu_evaluator
+import pytest
+
+NOTEBOOK_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLED_MODULES = {
+    "rate_limiter.py": os.path.join(NOTEBOOK_DIR, "..", "dialogflow-cx"),
+    "nlu_evaluator.py": NOTEBOOK_DIR,
+}
+
+
+def get_rows(count):
+    """Builds a dataset where odd utterances are not matched."""
+    return [
+        {"Utterance": f"utterance {index}", "Expected Intent": f"intent {index}"}
+        for index in range(count)
+    ]
+
+
+class MockDetectIntent:
+    """Matches even utterances, optionally failing on one of them."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, row):
+        with self.lock:
+            self.calls.append(row["Utterance"])
+        if row["Utterance"] == self.fail_on:
+            raise RuntimeError("MOCK_ERROR")
+        index = int(row["Utterance"].split()[-1])
+        if index % 2:
+            return nlu_evaluator.NO_MATCH, 0.0
+        return f"intent {index}", 0.9
+
+
+def test_evaluate(tmp_path):
+    """Evaluates every row and summarizes the results."""
+    checkpoint = nlu_evaluator.Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    progress = []
+    summary = nlu_evaluator.evaluate(
+        get_rows(10),
+        MockDetectIntent(),
+        checkpoint,
+        chunk_size=4,
+        progress=progress.append,
+    )
+    assert progress == [4, 8, 10]
+    assert (summary.utterances, summary.passed, summary.no_match) == (10, 5, 5)
+    assert summary.passed_ratio == 0.5
+    assert sorted(checkpoint.completed_rows()) == list(range(10))
+
+
+def test_evaluate_resumes(tmp_path):
+    """An interrupted evaluation only re-runs the rows without a result."""
+    checkpoint = nlu_evaluator.Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    with pytest.raises(RuntimeError, match="MOCK_ERROR"):
+        nlu_evaluator.evaluate(
+            get_rows(10),
+            MockDetectIntent(fail_on="utterance 6"),
+            checkpoint,
+            chunk_size=4,
+            max_workers=1,
+        )
+    assert sorted(checkpoint.completed_rows()) == list(range(6))
+
+    detect_intent = MockDetectIntent()
+    summary = nlu_evaluator.evaluate(
+        get_rows(10), detect_intent, checkpoint, chunk_size=4
+    )
+    assert sorted(detect_intent.calls) == [f"utterance {i}" for i in range(6, 10)]
+    assert summary.utterances == 10
+
+
+def test_evaluate_refuses_changed_dataset(tmp_path):
+    """A checkpoint is not resumed once the dataset is reordered or shortened."""
+    checkpoint = nlu_evaluator.Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    nlu_evaluator.evaluate(get_rows(4), MockDetectIntent(), checkpoint)
+
+    detect_intent = MockDetectIntent()
+    with pytest.raises(nlu_evaluator.CheckpointMismatchError, match="Row 0"):
+        nlu_evaluator.evaluate(get_rows(5)[::-1], detect_intent, checkpoint)
+    with pytest.raises(nlu_evaluator.CheckpointMismatchError, match="missing"):
+        nlu_evaluator.evaluate(get_rows(3), detect_intent, checkpoint)
+    assert not detect_intent.calls
+    assert sorted(checkpoint.completed_rows()) == list(range(4))
+
+
+def test_checkpoint_skips_truncated_line(tmp_path):
+    """A line cut short by a crash is ignored and not glued to new results."""
+    path = tmp_path / "checkpoint.jsonl"
+    result = nlu_evaluator.EvaluationResult(
+        0, "utterance 0", "intent 0", "intent 0", 0.9
+    )
+    path.write_text(result.to_json() + '\n{"row": 1, "expec', encoding="utf-8")
+    checkpoint = nlu_evaluator.Checkpoint(str(path))
+    assert checkpoint.completed_rows() == {0}
+
+    checkpoint.append([nlu_evaluator.EvaluationResult(1, "utterance 1", "a", "b", 0.1)])
+    assert checkpoint.completed_rows() == {0, 1}
+
+
+def test_frequency_weighting(tmp_path):
+    """Frequencies weight the summary; empty frequencies count once."""
+    rows = get_rows(2)
+    rows[0]["Frequency"] = "3"
+    rows[1]["Frequency"] = ""
+    checkpoint = nlu_evaluator.Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    summary = nlu_evaluator.evaluate(rows, MockDetectIntent(), checkpoint)
+    assert (summary.utterances, summary.passed) == (4, 3)
+
+
+def test_read_csv(tmp_path):
+    """Streams CSV rows with stripped values."""
+    path = tmp_path / "dataset.csv"
+    path.write_text("Utterance,Expected Intent\n hi , greeting \n", encoding="utf-8")
+    assert list(nlu_evaluator.read_csv(str(path))) == [
+        {"Utterance": "hi", "Expected Intent": "greeting"}
+    ]
+
+
+@pytest.mark.parametrize("name", sorted(BUNDLED_MODULES))
+def test_notebook_bundles_module(name):
+    """The notebook writes the current version of the modules it imports."""
+    with open(
+        os.path.join(NOTEBOOK_DIR, "nlu_evaluation.ipynb"), encoding="utf-8"
+    ) as notebook_file:
+        notebook = json.load(notebook_file)
+    with open(
+        os.path.join(BUNDLED_MODULES[name], name), encoding="utf-8"
+    ) as module_file:
+        expected = f"%%writefile {name}\n{module_file.read()}"
+    assert expected in (
+        "".join(cell["source"])
+        for cell in notebook["cells"]
+        if cell["cell_type"] == "code"
+    )